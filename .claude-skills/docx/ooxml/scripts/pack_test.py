@@ -0,0 +1,293 @@
+import codecs
+import multiprocessing
+import os
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+import pack
+from pack import (
+    _ArchiveWriter,
+    _UseMinidom,
+    _condense_xml_minidom,
+    _format_xml,
+    _pretty_xml_minidom,
+    condense_xml_data,
+    pretty_xml_data,
+)
+from unpack import unpack_document
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+# Documents _format_xml() writes itself
+DOCUMENTS = {
+    "paragraphs": (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<w:document xmlns:w="{W}" xmlns:r="{R}">\n'
+        "  <w:body>\n"
+        "    <w:p>\n"
+        '      <w:r><w:t xml:space="preserve"> spaced </w:t></w:r>\n'
+        "      <w:r><w:t>   </w:t></w:r>\n"
+        '      <w:hyperlink r:id="rId4"><w:r><w:t>link</w:t></w:r></w:hyperlink>\n'
+        "    </w:p>\n"
+        "    <w:p/>\n"
+        "  </w:body>\n"
+        "</w:document>\n"
+    ),
+    "comments and instructions": (
+        f'<?xml version="1.0"?>\n<?mso-application progid="Word.Document"?>\n'
+        f'<w:document xmlns:w="{W}"><!-- top -->\n'
+        "  <w:body><!-- in body --><w:p><w:r><w:t><!-- kept -->x</w:t></w:r></w:p>"
+        "<?pi data?></w:body>\n"
+        "</w:document>"
+    ),
+    "escapes": (
+        f'<w:document xmlns:w="{W}">'
+        '<w:p w:val="a &amp; b &lt; &quot;c&quot; &#9;&#10;&#13;">'
+        "<w:r><w:t>x &amp; y &lt; z &gt; &quot;q&quot;\r\n</w:t></w:r></w:p>"
+        "</w:document>"
+    ),
+    "mixed content": (
+        f'<w:document xmlns:w="{W}">'
+        "<w:p>lead<w:r>run</w:r>tail<w:r/>  <w:r>two</w:r>end</w:p>"
+        "<w:p>  only whitespace  </w:p><w:p>one</w:p>"
+        "</w:document>"
+    ),
+    "non-ascii": (
+        f'<?xml version="1.0" encoding="UTF-8"?>'
+        f'<w:document xmlns:w="{W}" w:name="café">'
+        "<w:p><w:r><w:t>über – \U0001f600</w:t></w:r></w:p></w:document>"
+    ).encode("utf-8"),
+    "default and nested namespaces": (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="t" Target="a.xml"/>'
+        '<x:ext xmlns:x="urn:x" x:flag="1"><x:inner xmlns:x="urn:y" x:flag="2"/></x:ext>'
+        "</Relationships>"
+    ),
+}
+
+# Documents _format_xml() leaves to minidom
+FALLBACKS = {
+    "doctype": (
+        '<?xml version="1.0"?><!DOCTYPE w:document>'
+        f'<w:document xmlns:w="{W}"><w:p/></w:document>'
+    ),
+    "cdata": (
+        f'<w:document xmlns:w="{W}"><w:p><w:t><![CDATA[a < b]]></w:t> </w:p>'
+        "</w:document>"
+    ),
+    "utf-16": codecs.BOM_UTF16_LE
+    + (
+        '<?xml version="1.0" encoding="UTF-16"?>'
+        f'<w:document xmlns:w="{W}"><w:p> <w:r/> </w:p></w:document>'
+    ).encode("utf-16-le"),
+    "ambiguous prefix": (
+        f'<w:document xmlns:w="{W}" xmlns:v="{W}">'
+        '<w:p w:val="1"> <w:r/> </w:p></w:document>'
+    ),
+}
+
+
+def _as_bytes(document):
+    return document if isinstance(document, bytes) else document.encode("utf-8")
+
+
+class TestFormatXml(unittest.TestCase):
+    """The streamed formatting must be byte-identical to minidom's."""
+
+    def test_condense_matches_minidom(self):
+        for name, document in DOCUMENTS.items():
+            with self.subTest(name):
+                data = _as_bytes(document)
+                self.assertEqual(
+                    _format_xml(data, "UTF-8", condense=True),
+                    _condense_xml_minidom(data),
+                )
+
+    def test_pretty_matches_minidom(self):
+        for name, document in DOCUMENTS.items():
+            with self.subTest(name):
+                data = _as_bytes(document)
+                self.assertEqual(
+                    _format_xml(data, "ascii", indent="  ", newl="\n"),
+                    _pretty_xml_minidom(data),
+                )
+
+    def test_pretty_then_condense_matches_minidom(self):
+        for name, document in DOCUMENTS.items():
+            with self.subTest(name):
+                pretty = _pretty_xml_minidom(_as_bytes(document))
+                self.assertEqual(
+                    condense_xml_data(pretty), _condense_xml_minidom(pretty)
+                )
+
+    def test_fallbacks_are_left_to_minidom(self):
+        for name, document in FALLBACKS.items():
+            with self.subTest(name):
+                data = _as_bytes(document)
+                with self.assertRaises(_UseMinidom):
+                    _format_xml(data, "UTF-8", condense=True)
+                self.assertEqual(condense_xml_data(data), _condense_xml_minidom(data))
+                self.assertEqual(pretty_xml_data(data), _pretty_xml_minidom(data))
+
+    def test_ambiguous_prefix_without_prefixed_attributes(self):
+        """Two prefixes for one URI only matter for prefixed attributes."""
+        data = _as_bytes(
+            f'<w:document xmlns:w="{W}" xmlns:v="{W}"><w:p val="1"/></w:document>'
+        )
+        self.assertEqual(condense_xml_data(data), _condense_xml_minidom(data))
+
+
+class TestArchiveWriter(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.dir = Path(temp_dir.name)
+
+    def test_members_are_copied_as_they_are(self):
+        source = self.dir / "source.docx"
+        with zipfile.ZipFile(source, "w", zipfile.ZIP_DEFLATED) as zf:
+            info = zipfile.ZipInfo("word/settings.xml", (2020, 5, 17, 10, 30, 12))
+            info.extra = b"\x99\x99\x04\x00abcd"
+            info.comment = b"comment"
+            zf.writestr(info, b"<settings/>" * 100)
+            zf.writestr("word/media/bild_\u00fc.png", bytes(range(256)) * 20)
+        (self.dir / "new.bin").write_bytes(b"new" * 1000)
+
+        output = self.dir / "output.docx"
+        with zipfile.ZipFile(source) as reference, _ArchiveWriter(output) as writer:
+            for info in reference.infolist():
+                writer.copy(source, info)
+            writer.writestr(zipfile.ZipInfo("word/document.xml"), b"<document/>")
+            writer.write(self.dir / "new.bin", "customXml/new.bin")
+
+        with zipfile.ZipFile(source) as reference, zipfile.ZipFile(output) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(
+                zf.namelist(),
+                reference.namelist() + ["word/document.xml", "customXml/new.bin"],
+            )
+            for original in reference.infolist():
+                copied = zf.getinfo(original.filename)
+                self.assertEqual(zf.read(copied), reference.read(original))
+                for name in ("extra", "comment", "date_time", "CRC", "compress_size"):
+                    self.assertEqual(getattr(copied, name), getattr(original, name))
+            self.assertEqual(zf.read("word/document.xml"), b"<document/>")
+            self.assertEqual(zf.read("customXml/new.bin"), b"new" * 1000)
+
+
+class TestPackLazilyUnpacked(unittest.TestCase):
+    """Parts left in the source archive must still be what was unpacked."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.dir = Path(temp_dir.name)
+        self.source = self.dir / "source.docx"
+        self.write_source(DOCUMENTS["paragraphs"])
+        self.unpacked = self.dir / "unpacked"
+        unpack_document(self.source, self.unpacked, parts=["word/styles.xml"])
+        self.output = self.dir / "output.docx"
+
+    def write_source(self, document=None):
+        """Write the source archive, without word/document.xml if None."""
+        with zipfile.ZipFile(self.source, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("[Content_Types].xml", "<Types/>")
+            if document is not None:
+                zf.writestr("word/document.xml", document)
+            zf.writestr("word/styles.xml", f'<w:styles xmlns:w="{W}"/>')
+
+    def assertPackFails(self, message):
+        self.output.write_bytes(b"previous")
+        files = sorted(self.dir.iterdir())
+        with self.assertRaisesRegex(ValueError, message):
+            pack.pack_document(self.unpacked, self.output)
+        # Neither the output file nor a partial archive was left
+        self.assertEqual(self.output.read_bytes(), b"previous")
+        self.assertEqual(sorted(self.dir.iterdir()), files)
+
+    def test_unchanged_source(self):
+        self.assertTrue(pack.pack_document(self.unpacked, self.output))
+        with zipfile.ZipFile(self.source) as source, zipfile.ZipFile(self.output) as zf:
+            self.assertEqual(
+                zf.read("word/document.xml"), source.read("word/document.xml")
+            )
+
+    def test_part_changed_in_source(self):
+        self.write_source(DOCUMENTS["paragraphs"].replace("link", "edited"))
+        self.assertPackFails("word/document.xml has changed in .*unpack the document")
+
+    def test_part_removed_from_source(self):
+        self.write_source()
+        self.assertPackFails("word/document.xml is no longer in .*unpack the document")
+
+    def test_original_that_is_not_a_file(self):
+        for original in (self.dir / "missing.docx", self.dir):
+            with self.subTest(original=original.name):
+                with self.assertRaisesRegex(ValueError, "is not a file"):
+                    pack.pack_document(self.unpacked, self.output, original=original)
+                self.assertFalse(self.output.exists())
+
+    def test_original_that_is_not_an_archive(self):
+        original = self.dir / "original.docx"
+        original.write_bytes(b"not a zip file")
+        with self.assertRaisesRegex(ValueError, "Cannot read .*original.docx"):
+            pack.pack_document(self.unpacked, self.output, original=original)
+        self.assertFalse(self.output.exists())
+
+    def test_source_removed(self):
+        self.source.unlink()
+        self.assertPackFails("Cannot read .*source.docx.*unpack the document")
+
+
+def _pack_or_die(input_dir, output_file, original=None):
+    """_pack_batch_job() whose worker process dies on directories named "crash"."""
+    if Path(input_dir).name == "crash":
+        os._exit(1)
+    return _pack_batch_job(input_dir, output_file, original)
+
+
+_pack_batch_job = pack._pack_batch_job
+
+
+class TestPackDocuments(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.dir = Path(temp_dir.name)
+
+    def job(self, name):
+        input_dir = self.dir / name
+        input_dir.mkdir()
+        (input_dir / "[Content_Types].xml").write_text("<Types/>")
+        return str(input_dir), str(self.dir / f"{name}.docx")
+
+    @unittest.skipUnless(
+        multiprocessing.get_start_method() == "fork",
+        "the patched job only reaches workers that are forked",
+    )
+    def test_one_result_per_document_when_a_worker_dies(self):
+        jobs = [self.job(f"doc{i}") for i in range(6)]
+        jobs.insert(2, self.job("crash"))
+        jobs.append((str(self.dir / "missing"), str(self.dir / "missing.docx")))
+
+        with mock.patch.object(pack, "_pack_batch_job", _pack_or_die):
+            results = list(pack.pack_documents(jobs, workers=3))
+
+        statuses = {result["input_dir"]: result["status"] for result in results}
+        self.assertEqual(len(results), len(jobs))
+        self.assertEqual(
+            statuses,
+            {
+                **{input_dir: "packed" for input_dir, _ in jobs},
+                jobs[2][0]: "error",
+                jobs[-1][0]: "error",
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
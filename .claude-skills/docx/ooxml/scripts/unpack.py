@@ -1,29 +1,257 @@
 #!/usr/bin/env python3
-"""Unpack and format XML contents of Office files (.docx, .pptx, .xlsx)"""
+"""Unpack and format XML contents of Office files (.docx, .pptx, .xlsx)
 
+Example usage:
+    python unpack.py <office_file> <output_dir> [--jobs N] [--manifest FILE]
+    python unpack.py <office_file> <output_dir> --parts "word/*.xml" "[Content_Types].xml"
+"""
+
+import argparse
+import hashlib
+import json
+import os
 import random
 import sys
-import defusedxml.minidom
 import zipfile
-from pathlib import Path
-
-# Get command line arguments
-assert len(sys.argv) == 3, "Usage: python unpack.py <office_file> <output_dir>"
-input_file, output_dir = sys.argv[1], sys.argv[2]
-
-# Extract and format
-output_path = Path(output_dir)
-output_path.mkdir(parents=True, exist_ok=True)
-zipfile.ZipFile(input_file).extractall(output_path)
-
-# Pretty print all XML files
-xml_files = list(output_path.rglob("*.xml")) + list(output_path.rglob("*.rels"))
-for xml_file in xml_files:
-    content = xml_file.read_text(encoding="utf-8")
-    dom = defusedxml.minidom.parseString(content)
-    xml_file.write_bytes(dom.toprettyxml(indent="  ", encoding="ascii"))
-
-# For .docx files, suggest an RSID for tracked changes
-if input_file.endswith(".docx"):
-    suggested_rsid = "".join(random.choices("0123456789ABCDEF", k=8))
-    print(f"Suggested RSID for edit session: {suggested_rsid}")
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatchcase
+from pathlib import Path, PurePosixPath
+
+if __package__:
+    from .pack import pretty_xml_data
+    from .validation.package import read_manifest, write_manifest
+else:
+    from pack import pretty_xml_data
+    from validation.package import read_manifest, write_manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Unpack an Office file")
+    parser.add_argument("office_file", help="Office file (.docx/.pptx/.xlsx)")
+    parser.add_argument("output_dir", help="Directory to unpack into")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes unpacking parts (0 = all CPUs)",
+    )
+    parser.add_argument(
+        "--manifest",
+        metavar="FILE",
+        help="Write the name, size and SHA-256 of every unpacked part to FILE",
+    )
+    parser.add_argument(
+        "--parts",
+        nargs="+",
+        metavar="PATTERN",
+        help="Unpack only the parts matching these glob patterns; the others "
+        "are read from office_file when validating and packing",
+    )
+    args = parser.parse_args()
+
+    try:
+        manifest = unpack_document(
+            args.office_file,
+            args.output_dir,
+            workers=args.jobs or os.cpu_count() or 1,
+            parts=args.parts,
+        )
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+
+    if args.manifest:
+        with open(args.manifest, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    # For .docx files, suggest an RSID for tracked changes
+    if args.office_file.endswith(".docx"):
+        suggested_rsid = "".join(random.choices("0123456789ABCDEF", k=8))
+        print(f"Suggested RSID for edit session: {suggested_rsid}")
+
+
+def unpack_document(input_file, output_dir, workers=1, parts=None):
+    """Unpack an Office file into a directory, pretty-printing its XML parts.
+
+    Parts are decompressed and formatted in worker processes if workers > 1;
+    parts other than .xml and .rels are written unchanged.
+
+    The manifest is also written to output_dir (see
+    validation.package.read_manifest). pack.py uses it to copy the parts
+    that were not edited from input_file without recompressing them.
+
+    With parts, only the matching parts are unpacked. The other parts are
+    read from input_file when validating and packing, and can be unpacked
+    later with unpack_parts().
+
+    Args:
+        input_file: Path to Office file (.docx/.pptx/.xlsx)
+        output_dir: Directory to unpack into (created if needed)
+        workers: Number of processes unpacking parts
+        parts: Glob patterns (e.g. "word/*.xml") or names of the parts to
+            unpack, or None to unpack every part
+
+    Returns:
+        dict: Part name -> {"size", "sha256", "formatted", "unpacked",
+            "crc32"} in archive order. For unpacked parts, size and sha256 are
+            those of the file written and formatted tells whether it was
+            pretty-printed; other parts have their size in the archive and no
+            sha256. crc32 is the CRC-32 of the member in input_file.
+
+    Raises:
+        ValueError: If a part name points outside output_dir
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    with zipfile.ZipFile(input_file) as zf:
+        infos = zf.infolist()
+    members = {info.filename: info for info in infos if not info.is_dir()}
+    for info in infos:
+        path = _output_file(output_path, info.filename)  # Check every name first
+        if info.is_dir():
+            path.mkdir(parents=True, exist_ok=True)
+
+    selected = {
+        name: info.file_size
+        for name, info in members.items()
+        if parts is None or _matches(name, parts)
+    }
+    entries = _unpack_parts(input_file, selected, output_path, workers)
+    manifest = {
+        name: entries.get(name)
+        or {
+            "size": info.file_size,
+            "sha256": None,
+            "formatted": False,
+            "unpacked": False,
+            "crc32": info.CRC,
+        }
+        for name, info in members.items()
+    }
+
+    source = str(Path(input_file).resolve())
+    write_manifest(output_path, {"source": source, "parts": manifest})
+    return manifest
+
+
+def unpack_parts(unpacked_dir, patterns, workers=1):
+    """Unpack more parts of a lazily unpacked directory from its source archive.
+
+    Args:
+        unpacked_dir: Directory written by unpack_document() with parts
+        patterns: Glob patterns (e.g. "word/comments*.xml") or names of the
+            parts to unpack
+        workers: Number of processes unpacking parts
+
+    Returns:
+        list: Names of the parts unpacked; parts already unpacked are left
+            alone.
+    """
+    output_path = Path(unpacked_dir)
+    manifest = read_manifest(output_path)
+    if manifest is None:
+        return []
+
+    parts = manifest["parts"]
+    selected = {
+        name: entry["size"]
+        for name, entry in parts.items()
+        if not entry["unpacked"]
+        and not (output_path / name).exists()
+        and _matches(name, patterns)
+    }
+    if selected:
+        parts.update(_unpack_parts(manifest["source"], selected, output_path, workers))
+        write_manifest(output_path, manifest)
+    return list(selected)
+
+
+def _unpack_parts(input_file, sizes, output_path, workers):
+    """Unpack parts of input_file, given as name -> size; return their entries."""
+    workers = min(workers, len(sizes))
+    if workers <= 1:
+        with zipfile.ZipFile(input_file) as zf:
+            return dict(_unpack_part(zf, name, output_path) for name in sizes)
+
+    # Largest parts first, so one big part does not finish last on its own
+    names = sorted(sizes, key=sizes.get, reverse=True)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_unpack_worker,
+        initargs=(input_file,),
+    ) as executor:
+        return dict(
+            executor.map(_unpack_part_in_worker, names, [output_path] * len(names))
+        )
+
+
+def _matches(name, patterns):
+    """Return True if a part name is one of patterns or matches one of them.
+
+    Wildcards match within one path segment, as with Path.glob.
+    """
+    segments = name.split("/")
+    for pattern in patterns:
+        if name == pattern:
+            return True
+        pattern_segments = pattern.split("/")
+        if len(pattern_segments) == len(segments) and all(
+            map(fnmatchcase, segments, pattern_segments)
+        ):
+            return True
+    return False
+
+
+def _output_file(output_path, name):
+    """Return the path a part is unpacked to."""
+    parts = PurePosixPath(name).parts
+    if PurePosixPath(name).is_absolute() or ".." in parts:
+        raise ValueError(f"{name} is not a valid part name")
+    return output_path.joinpath(*parts)
+
+
+def _unpack_part(zf, name, output_path):
+    """Write one part to output_path and return (name, manifest entry)."""
+    path = _output_file(output_path, name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    formatted = name.endswith((".xml", ".rels"))
+    if formatted:
+        data = pretty_xml_data(zf.read(name))
+        path.write_bytes(data)
+        size, digest = len(data), hashlib.sha256(data)
+    else:
+        size, digest = 0, hashlib.sha256()
+        with zf.open(name) as src, open(path, "wb") as dst:
+            while chunk := src.read(1024 * 1024):
+                dst.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+
+    return name, {
+        "size": size,
+        "sha256": digest.hexdigest(),
+        "formatted": formatted,
+        "unpacked": True,
+        "crc32": zf.getinfo(name).CRC,
+    }
+
+
+# Archive read by unpack worker processes (see unpack_document)
+_unpack_worker_archive = None
+
+
+def _init_unpack_worker(input_file):
+    global _unpack_worker_archive
+    # Each worker opens the archive itself: an inherited handle would share
+    # its file position with the other workers
+    _unpack_worker_archive = zipfile.ZipFile(input_file)
+
+
+def _unpack_part_in_worker(name, output_path):
+    return _unpack_part(_unpack_worker_archive, name, output_path)
+
+
+if __name__ == "__main__":
+    main()
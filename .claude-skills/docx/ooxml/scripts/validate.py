@@ -3,21 +3,33 @@
 Command line tool to validate Office document XML files against XSD schemas and tracked changes.
 
 Usage:
-    python validate.py <dir> --original <original_file>
+    python validate.py <dir> --original <original_file> [--jobs N]
+    python validate.py <packed_file> --original <original_file> [--jobs N]
+    python validate.py <dir> --original <original_file> --json results.json --profile
 """
 
 import argparse
+import json
+import os
 import sys
+import zipfile
 from pathlib import Path
 
-from validation import DOCXSchemaValidator, PPTXSchemaValidator, RedliningValidator
+from validation import (
+    DOCXSchemaValidator,
+    PPTXSchemaValidator,
+    RedliningValidator,
+    ValidationReport,
+    format_profile,
+)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Validate Office document XML files")
     parser.add_argument(
         "unpacked_dir",
-        help="Path to unpacked Office document directory",
+        help="Path to unpacked Office document directory, or to a packed "
+        "document (.docx/.pptx/.xlsx) to validate without unpacking it",
     )
     parser.add_argument(
         "--original",
@@ -30,13 +42,37 @@ def main():
         action="store_true",
         help="Enable verbose output",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write cached XSD results (see OOXML_XSD_CACHE_DIR)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes for XSD validation (0 = all CPUs)",
+    )
+    parser.add_argument(
+        "--json",
+        metavar="FILE",
+        help="Write the results of every check (errors, wall and CPU time) to FILE",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the checks and parts ranked by cost",
+    )
     args = parser.parse_args()
 
     # Validate paths
     unpacked_dir = Path(args.unpacked_dir)
     original_file = Path(args.original)
     file_extension = original_file.suffix.lower()
-    assert unpacked_dir.is_dir(), f"Error: {unpacked_dir} is not a directory"
+    assert unpacked_dir.is_dir() or zipfile.is_zipfile(unpacked_dir), (
+        f"Error: {unpacked_dir} is not a directory or an Office document"
+    )
     assert original_file.is_file(), f"Error: {original_file} is not a file"
     assert file_extension in [".docx", ".pptx", ".xlsx"], (
         f"Error: {original_file} must be a .docx, .pptx, or .xlsx file"
@@ -54,14 +90,47 @@ def main():
 
     # Run validators
     success = True
-    for V in validators:
-        validator = V(unpacked_dir, original_file, verbose=args.verbose)
-        if not validator.validate():
-            success = False
+    reports = []
+    try:
+        for V in validators:
+            if V is RedliningValidator:
+                validator = V(unpacked_dir, original_file, verbose=args.verbose)
+                report = ValidationReport(
+                    unpacked_dir, original_file, validator=V.__name__
+                )
+                report.run_check("redlining", validator.validate)
+            else:
+                validator = V(
+                    unpacked_dir,
+                    original_file,
+                    verbose=args.verbose,
+                    use_xsd_cache=not args.no_cache,
+                    workers=args.jobs or os.cpu_count() or 1,
+                )
+                report = validator.validate()
+            reports.append(report)
+            if not report:
+                success = False
+    except ValueError as e:
+        # A lazily unpacked directory whose source archive changed
+        sys.exit(f"Error: {e}")
 
     if success:
         print("All validations PASSED!")
 
+    if args.profile:
+        print()
+        print(format_profile(reports))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {"passed": success, "reports": [r.to_dict() for r in reports]},
+                f,
+                indent=2,
+                ensure_ascii=False,
+            )
+
     sys.exit(0 if success else 1)
 
 
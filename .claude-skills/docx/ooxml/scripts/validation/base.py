@@ -2,11 +2,25 @@
 Base validator with common validation logic for document files.
 """
 
+import fnmatch
+import hashlib
+import posixpath
 import re
-from pathlib import Path
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path, PurePosixPath
 
 import lxml.etree
 
+from .cache import XMLTreeCache, XSDErrorStore, schema_registry
+from .package import DirectoryPackage, open_package
+from .relationships import Relationship, RelationshipGraph
+from .report import ValidationError, ValidationReport, failed
+from .stream import ElementRule, stream_part
+
+# Bundled XSD schemas shared by all document types
+SCHEMAS_DIR = Path(__file__).parent.parent.parent / "schemas"
+
 
 class BaseSchemaValidator:
     """Base validator with common validation logic for document files."""
@@ -103,51 +117,300 @@ class BaseSchemaValidator:
         "http://www.w3.org/XML/1998/namespace",
     }
 
-    def __init__(self, unpacked_dir, original_file, verbose=False):
+    def __init__(
+        self,
+        unpacked_dir,
+        original_file,
+        verbose=False,
+        tree_cache_budget=XMLTreeCache.DEFAULT_BUDGET,
+        use_xsd_cache=True,
+        workers=1,
+        snapshot=None,
+        dirty_parts=None,
+    ):
         self.unpacked_dir = Path(unpacked_dir).resolve()
         self.original_file = Path(original_file)
         self.verbose = verbose
 
+        # Number of processes used for XSD validation
+        self.workers = max(1, workers)
+
+        # Parts of the document being validated: the unpacked directory, or
+        # the .docx/.pptx/.xlsx archive itself (see package.open_package).
+        # Parts are addressed as unpacked_dir / part name either way.
+        self._package = None
+        self._part_names = self.package.names()
+        self._part_name_set = set(self._part_names)
+
+        # Relationships of all parts, built on first use (see relationship_graph)
+        self._relationship_graph = None
+
+        # Parsed trees shared by the checks that need whole trees
+        self._trees = XMLTreeCache(budget=tree_cache_budget, loader=self._load_tree)
+
+        # Results of the element rules, by part (see _rule_result)
+        self._rule_results = {}
+
+        # Report of the validate() call in progress (see _check)
+        self._report = None
+
+        # Original document (archive or directory), opened on first use
+        self._original_package = None
+        self._original_trees = {}  # part name -> parsed tree
+        self._original_errors = {}  # part name -> XSD errors
+
+        # Persistent XSD results keyed by part content (see XSDErrorStore)
+        self.xsd_error_store = (
+            XSDErrorStore.from_environment() if use_xsd_cache else None
+        )
+
+        # Results of earlier runs, reused for unchanged parts (see
+        # ValidationSnapshot). If dirty_parts is given, only those parts (and
+        # parts the snapshot has not seen) are assumed to have changed.
+        self.snapshot = snapshot
+        self.dirty_parts = None if dirty_parts is None else set(dirty_parts)
+        self._digests = {}  # path -> digest of the file in this run
+        if self.snapshot is not None:
+            self.snapshot.bind(self.original_file)
+
         # Set schemas directory
-        self.schemas_dir = Path(__file__).parent.parent.parent / "schemas"
+        self.schemas_dir = SCHEMAS_DIR
 
         # Get all XML and .rels files
-        patterns = ["*.xml", "*.rels"]
         self.xml_files = [
-            f for pattern in patterns for f in self.unpacked_dir.rglob(pattern)
+            self.unpacked_dir / name
+            for suffix in (".xml", ".rels")
+            for name in self._part_names
+            if name.endswith(suffix)
         ]
 
         if not self.xml_files:
             print(f"Warning: No XML files found in {self.unpacked_dir}")
 
+    def __getstate__(self):
+        """Pickle without parsed trees or open archives (used by XSD workers)."""
+        state = self.__dict__.copy()
+        state["_package"] = None
+        state["_trees"] = XMLTreeCache(
+            budget=self._trees.budget, loader=self._load_tree
+        )
+        state["_original_package"] = None
+        state["_original_trees"] = {}
+        state["_original_errors"] = {}
+        state["_rule_results"] = {}
+        state["_report"] = None
+        state["_relationship_graph"] = None
+        state["snapshot"] = None
+        return state
+
     def validate(self):
-        """Run all validation checks and return True if all pass."""
+        """Run all validation checks.
+
+        Returns:
+            ValidationReport: Results and timing of each check; true if all pass
+        """
         raise NotImplementedError("Subclasses must implement the validate method")
 
+    def _new_report(self):
+        """Start the report that the checks of a validate() call are recorded in."""
+        self._report = ValidationReport(
+            self.unpacked_dir,
+            self.original_file,
+            validator=type(self).__name__,
+        )
+        return self._report
+
+    def _check(self, name, check):
+        """Run a check as part of the current report. Returns False if it failed."""
+        return self._report.run_check(name, check).passed is not False
+
+    def _timed(self, part_name, compute):
+        """Return compute(), adding its cost to the part in the current report."""
+        if self._report is None:
+            return compute()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            return compute()
+        finally:
+            self._report.add_part_time(
+                part_name,
+                time.perf_counter() - wall_start,
+                time.process_time() - cpu_start,
+            )
+
+    @property
+    def package(self):
+        """Parts of the document being validated, opened on first use."""
+        if self._package is None:
+            self._package = open_package(self.unpacked_dir)
+        return self._package
+
+    def _part_name(self, path):
+        """Return the package part name (e.g. "word/document.xml") of a path."""
+        return path.relative_to(self.unpacked_dir).as_posix()
+
+    def _part_exists(self, path):
+        """Return True if path is a part of the document."""
+        return self._part_name(path) in self._part_name_set
+
+    def _glob_parts(self, pattern):
+        """Return the paths of the parts matching a glob pattern such as "ppt/slides/*.xml".
+
+        Wildcards match within one path segment, as with Path.glob.
+        """
+        segments = pattern.split("/")
+        return [
+            self.unpacked_dir / name
+            for name in self._part_names
+            if len(name.split("/")) == len(segments)
+            and all(map(fnmatch.fnmatchcase, name.split("/"), segments))
+        ]
+
+    def _open_part(self, path):
+        """Open a part for reading in binary mode."""
+        return self.package.open(self._part_name(path))
+
+    def _load_tree(self, path):
+        """Parse a part for the tree cache. Returns (tree, size of the part)."""
+        name = self._part_name(Path(path))
+        with self.package.open(name) as f:
+            return lxml.etree.parse(f), self.package.size(name)
+
+    def _parse(self, xml_file):
+        """Return the shared parsed tree for a file. The tree must not be modified."""
+        return self._trees.get(xml_file)
+
+    def _element_rules(self, xml_file):
+        """Return the element rules evaluated when a part is streamed, by name.
+
+        Subclasses extend this with their own rules. See stream.ElementRule.
+        """
+        rules = {
+            "xml": WellFormednessRule(self, xml_file),
+            "namespaces": IgnorableNamespacesRule(self, xml_file),
+            "root_name": RootNameRule(self, xml_file),
+            "unique_ids": UniqueIdRule(self, xml_file),
+        }
+        if xml_file.suffix != ".rels":
+            rels_file = self._get_rels_file(xml_file)
+            if self._part_exists(rels_file):
+                rules["relationship_ids"] = RelationshipIdRule(
+                    self, xml_file, rels_file
+                )
+        return rules
+
+    def _rule_result(self, name, xml_file, depends_on=()):
+        """Return the result of an element rule for a part.
+
+        All rules of a part are evaluated in a single streaming pass, the first
+        time any of their results is needed (or is not in the snapshot).
+        """
+
+        def compute():
+            if xml_file not in self._rule_results:
+                with self._open_part(xml_file) as source:
+                    self._rule_results[xml_file] = stream_part(
+                        source, self._element_rules(xml_file)
+                    )
+            return self._rule_results[xml_file][name]
+
+        return self._part_result(name, xml_file, compute, depends_on=depends_on)
+
+    def _get_rels_file(self, xml_file):
+        """Return the path of a part's relationships file (dir/_rels/file.xml.rels)."""
+        return xml_file.parent / "_rels" / f"{xml_file.name}.rels"
+
+    @property
+    def relationship_graph(self):
+        """Relationships of every part, read from all .rels parts on first use."""
+        if self._relationship_graph is None:
+            relationships = {}
+            for rels_file in self.xml_files:
+                if not rels_file.name.endswith(".rels"):
+                    continue
+                try:
+                    relationships[self._part_name(rels_file)] = self._part_result(
+                        "relationships",
+                        rels_file,
+                        lambda: self._read_relationships(rels_file),
+                    )
+                except Exception as e:
+                    relationships[self._part_name(rels_file)] = e
+            self._relationship_graph = RelationshipGraph(
+                self._part_names, relationships
+            )
+        return self._relationship_graph
+
+    def _read_relationships(self, rels_file):
+        """Return the Relationships of a .rels file, in document order."""
+        rels_root = self._parse(rels_file).getroot()
+        return [
+            Relationship(
+                rel.get("Id"), rel.get("Type", ""), rel.get("Target"), rel.sourceline
+            )
+            for rel in rels_root.findall(
+                f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
+            )
+        ]
+
+    def _part_result(self, check, xml_file, compute, depends_on=()):
+        """Return compute() for a per-part check, reusing the snapshot's result.
+
+        Args:
+            check: Name of the check, unique per kind of result
+            xml_file: Part the result is about
+            compute: Callable computing the result for the current content
+            depends_on: Other files the result depends on (e.g. the .rels file)
+        """
+        part_name = self._part_name(xml_file)
+        if self.snapshot is None:
+            return self._timed(part_name, compute)
+
+        digest = self._content_digest(xml_file, *depends_on)
+        found, result = self.snapshot.get(check, part_name, digest)
+        if not found:
+            result = self._timed(part_name, compute)
+            self.snapshot.put(check, part_name, digest, result)
+        return result
+
+    def _content_digest(self, *files):
+        """Return a combined digest of the current content of files."""
+        digests = []
+        for path in files:
+            if path not in self._digests:
+                self._digests[path] = self._part_digest(path)
+            digests.append(str(self._digests[path]))
+        return ":".join(digests)
+
+    def _part_digest(self, path):
+        """Return the SHA-256 of a part, or None if it does not exist."""
+        part_name = self._part_name(path)
+        package = self.package
+        part_file = (
+            package.file(part_name) if isinstance(package, DirectoryPackage) else None
+        )
+        if part_file is not None:
+            dirty = None
+            if self.dirty_parts is not None:
+                dirty = part_name in self.dirty_parts
+            return self.snapshot.digest(part_file, dirty=dirty)
+
+        # Parts of an archive (or still in the archive a directory was lazily
+        # unpacked from) have no mtime worth trusting; hash the member
+        try:
+            return hashlib.sha256(package.read(part_name)).hexdigest()
+        except KeyError:
+            return None
+
     def validate_xml(self):
         """Validate that all XML files are well-formed."""
         errors = []
 
         for xml_file in self.xml_files:
-            try:
-                # Try to parse the XML file
-                lxml.etree.parse(str(xml_file))
-            except lxml.etree.XMLSyntaxError as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                    f"Line {e.lineno}: {e.msg}"
-                )
-            except Exception as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                    f"Unexpected error: {str(e)}"
-                )
+            errors.extend(self._rule_result("xml", xml_file))
 
         if errors:
-            print(f"FAILED - Found {len(errors)} XML violations:")
-            for error in errors:
-                print(error)
-            return False
+            return failed(f"Found {len(errors)} XML violations:", errors)
         else:
             if self.verbose:
                 print("PASSED - All XML files are well-formed")
@@ -158,27 +421,10 @@ class BaseSchemaValidator:
         errors = []
 
         for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                declared = set(root.nsmap.keys()) - {None}  # Exclude default namespace
-
-                for attr_val in [
-                    v for k, v in root.attrib.items() if k.endswith("Ignorable")
-                ]:
-                    undeclared = set(attr_val.split()) - declared
-                    errors.extend(
-                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                        f"Namespace '{ns}' in Ignorable but not declared"
-                        for ns in undeclared
-                    )
-            except lxml.etree.XMLSyntaxError:
-                continue
+            errors.extend(self._rule_result("namespaces", xml_file))
 
         if errors:
-            print(f"FAILED - {len(errors)} namespace issues:")
-            for error in errors:
-                print(error)
-            return False
+            return failed(f"{len(errors)} namespace issues:", errors)
         if self.verbose:
             print("PASSED - All namespace prefixes properly declared")
         return True
@@ -189,86 +435,32 @@ class BaseSchemaValidator:
         global_ids = {}  # Track globally unique IDs across all files
 
         for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                file_ids = {}  # Track IDs that must be unique within this file
+            relative_path = xml_file.relative_to(self.unpacked_dir)
+            ids = self._rule_result("unique_ids", xml_file)
+
+            # File-level errors come from the part itself; global IDs are
+            # checked against the other parts here, in document order
+            for entry in ids:
+                if entry[0] != "global":
+                    errors.append(entry[1])
+                    continue
 
-                # Remove all mc:AlternateContent elements from the tree
-                mc_elements = root.xpath(
-                    ".//mc:AlternateContent", namespaces={"mc": self.MC_NAMESPACE}
-                )
-                for elem in mc_elements:
-                    elem.getparent().remove(elem)
-
-                # Now check IDs in the cleaned tree
-                for elem in root.iter():
-                    # Get the element name without namespace
-                    tag = (
-                        elem.tag.split("}")[-1].lower()
-                        if "}" in elem.tag
-                        else elem.tag.lower()
+                _, id_value, line, tag = entry
+                if id_value in global_ids:
+                    prev_file, prev_line, prev_tag = global_ids[id_value]
+                    errors.append(
+                        ValidationError(
+                            f"Global ID '{id_value}' in <{tag}> "
+                            f"already used in {prev_file} at line {prev_line} in <{prev_tag}>",
+                            relative_path,
+                            line,
+                        )
                     )
-
-                    # Check if this element type has ID uniqueness requirements
-                    if tag in self.UNIQUE_ID_REQUIREMENTS:
-                        attr_name, scope = self.UNIQUE_ID_REQUIREMENTS[tag]
-
-                        # Look for the specified attribute
-                        id_value = None
-                        for attr, value in elem.attrib.items():
-                            attr_local = (
-                                attr.split("}")[-1].lower()
-                                if "}" in attr
-                                else attr.lower()
-                            )
-                            if attr_local == attr_name:
-                                id_value = value
-                                break
-
-                        if id_value is not None:
-                            if scope == "global":
-                                # Check global uniqueness
-                                if id_value in global_ids:
-                                    prev_file, prev_line, prev_tag = global_ids[
-                                        id_value
-                                    ]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: Global ID '{id_value}' in <{tag}> "
-                                        f"already used in {prev_file} at line {prev_line} in <{prev_tag}>"
-                                    )
-                                else:
-                                    global_ids[id_value] = (
-                                        xml_file.relative_to(self.unpacked_dir),
-                                        elem.sourceline,
-                                        tag,
-                                    )
-                            elif scope == "file":
-                                # Check file-level uniqueness
-                                key = (tag, attr_name)
-                                if key not in file_ids:
-                                    file_ids[key] = {}
-
-                                if id_value in file_ids[key]:
-                                    prev_line = file_ids[key][id_value]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: Duplicate {attr_name}='{id_value}' in <{tag}> "
-                                        f"(first occurrence at line {prev_line})"
-                                    )
-                                else:
-                                    file_ids[key][id_value] = elem.sourceline
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+                else:
+                    global_ids[id_value] = (relative_path, line, tag)
 
         if errors:
-            print(f"FAILED - Found {len(errors)} ID uniqueness violations:")
-            for error in errors:
-                print(error)
-            return False
+            return failed(f"Found {len(errors)} ID uniqueness violations:", errors)
         else:
             if self.verbose:
                 print("PASSED - All required IDs are unique")
@@ -280,104 +472,60 @@ class BaseSchemaValidator:
         """
         errors = []
 
+        graph = self.relationship_graph
+
         # Find all .rels files
-        rels_files = list(self.unpacked_dir.rglob("*.rels"))
+        rels_files = graph.rels_parts
 
         if not rels_files:
             if self.verbose:
                 print("PASSED - No .rels files found")
             return True
 
-        # Get all files in the unpacked directory (excluding reference files)
+        # Get all parts of the document (excluding reference files)
         all_files = []
-        for file_path in self.unpacked_dir.rglob("*"):
+        for name in self._part_names:
             if (
-                file_path.is_file()
-                and file_path.name != "[Content_Types].xml"
-                and not file_path.name.endswith(".rels")
+                posixpath.basename(name) != "[Content_Types].xml"
+                and not name.endswith(".rels")
             ):  # This file is not referenced by .rels
-                all_files.append(file_path.resolve())
-
-        # Track all files that are referenced by any .rels file
-        all_referenced_files = set()
+                all_files.append(name)
 
         if self.verbose:
             print(
                 f"Found {len(rels_files)} .rels files and {len(all_files)} target files"
             )
 
-        # Check each .rels file
+        # Check each .rels file; targets were resolved when the graph was built
         for rels_file in rels_files:
             try:
-                # Parse relationships file
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-
-                # Get the directory where this .rels file is located
-                rels_dir = rels_file.parent
-
-                # Find all relationships and their targets
-                referenced_files = set()
-                broken_refs = []
-
-                for rel in rels_root.findall(
-                    ".//ns:Relationship",
-                    namespaces={"ns": self.PACKAGE_RELATIONSHIPS_NAMESPACE},
-                ):
-                    target = rel.get("Target")
-                    if target and not target.startswith(
-                        ("http", "mailto:")
-                    ):  # Skip external URLs
-                        # Resolve the target path relative to the .rels file location
-                        if rels_file.name == ".rels":
-                            # Root .rels file - targets are relative to unpacked_dir
-                            target_path = self.unpacked_dir / target
-                        else:
-                            # Other .rels files - targets are relative to their parent's parent
-                            # e.g., word/_rels/document.xml.rels -> targets relative to word/
-                            base_dir = rels_dir.parent
-                            target_path = base_dir / target
-
-                        # Normalize the path and check if it exists
-                        try:
-                            target_path = target_path.resolve()
-                            if target_path.exists() and target_path.is_file():
-                                referenced_files.add(target_path)
-                                all_referenced_files.add(target_path)
-                            else:
-                                broken_refs.append((target, rel.sourceline))
-                        except (OSError, ValueError):
-                            broken_refs.append((target, rel.sourceline))
-
-                # Report broken references
-                if broken_refs:
-                    rel_path = rels_file.relative_to(self.unpacked_dir)
-                    for broken_ref, line_num in broken_refs:
+                for rel, target_part in graph.target_parts(rels_file):
+                    if target_part is None:
                         errors.append(
-                            f"  {rel_path}: Line {line_num}: Broken reference to {broken_ref}"
+                            ValidationError(
+                                f"Broken reference to {rel.target}", rels_file, rel.line
+                            )
                         )
-
             except Exception as e:
-                rel_path = rels_file.relative_to(self.unpacked_dir)
-                errors.append(f"  Error parsing {rel_path}: {e}")
+                errors.append(ValidationError(f"Error parsing: {e}", rels_file))
 
         # Check for unreferenced files (files that exist but are not referenced anywhere)
-        unreferenced_files = set(all_files) - all_referenced_files
+        unreferenced_files = [
+            name for name in all_files if not graph.referenced_by(name)
+        ]
 
         if unreferenced_files:
-            for unref_file in sorted(unreferenced_files):
-                unref_rel_path = unref_file.relative_to(self.unpacked_dir)
-                errors.append(f"  Unreferenced file: {unref_rel_path}")
+            for unref_file in sorted(unreferenced_files, key=lambda n: n.split("/")):
+                errors.append(ValidationError("Unreferenced file", unref_file))
 
         if errors:
-            print(f"FAILED - Found {len(errors)} relationship validation errors:")
-            for error in errors:
-                print(error)
-            print(
+            return failed(
+                f"Found {len(errors)} relationship validation errors:",
+                errors,
                 "CRITICAL: These errors will cause the document to appear corrupt. "
                 + "Broken references MUST be fixed, "
-                + "and unreferenced files MUST be referenced or removed."
+                + "and unreferenced files MUST be referenced or removed.",
             )
-            return False
         else:
             if self.verbose:
                 print(
@@ -390,8 +538,6 @@ class BaseSchemaValidator:
         Validate that all r:id attributes in XML files reference existing IDs
         in their corresponding .rels files, and optionally validate relationship types.
         """
-        import lxml.etree
-
         errors = []
 
         # Process each XML file that might contain r:id references
@@ -401,83 +547,22 @@ class BaseSchemaValidator:
                 continue
 
             # Determine the corresponding .rels file
-            # For dir/file.xml, it's dir/_rels/file.xml.rels
-            rels_dir = xml_file.parent / "_rels"
-            rels_file = rels_dir / f"{xml_file.name}.rels"
+            rels_file = self._get_rels_file(xml_file)
 
             # Skip if there's no corresponding .rels file (that's okay)
-            if not rels_file.exists():
+            if not self._part_exists(rels_file):
                 continue
 
-            try:
-                # Parse the .rels file to get valid relationship IDs and their types
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-                rid_to_type = {}
-
-                for rel in rels_root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
-                    rid = rel.get("Id")
-                    rel_type = rel.get("Type", "")
-                    if rid:
-                        # Check for duplicate rIds
-                        if rid in rid_to_type:
-                            rels_rel_path = rels_file.relative_to(self.unpacked_dir)
-                            errors.append(
-                                f"  {rels_rel_path}: Line {rel.sourceline}: "
-                                f"Duplicate relationship ID '{rid}' (IDs must be unique)"
-                            )
-                        # Extract just the type name from the full URL
-                        type_name = (
-                            rel_type.split("/")[-1] if "/" in rel_type else rel_type
-                        )
-                        rid_to_type[rid] = type_name
-
-                # Parse the XML file to find all r:id references
-                xml_root = lxml.etree.parse(str(xml_file)).getroot()
-
-                # Find all elements with r:id attributes
-                for elem in xml_root.iter():
-                    # Check for r:id attribute (relationship ID)
-                    rid_attr = elem.get(f"{{{self.OFFICE_RELATIONSHIPS_NAMESPACE}}}id")
-                    if rid_attr:
-                        xml_rel_path = xml_file.relative_to(self.unpacked_dir)
-                        elem_name = (
-                            elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
-                        )
-
-                        # Check if the ID exists
-                        if rid_attr not in rid_to_type:
-                            errors.append(
-                                f"  {xml_rel_path}: Line {elem.sourceline}: "
-                                f"<{elem_name}> references non-existent relationship '{rid_attr}' "
-                                f"(valid IDs: {', '.join(sorted(rid_to_type.keys())[:5])}{'...' if len(rid_to_type) > 5 else ''})"
-                            )
-                        # Check if we have type expectations for this element
-                        elif self.ELEMENT_RELATIONSHIP_TYPES:
-                            expected_type = self._get_expected_relationship_type(
-                                elem_name
-                            )
-                            if expected_type:
-                                actual_type = rid_to_type[rid_attr]
-                                # Check if the actual type matches or contains the expected type
-                                if expected_type not in actual_type.lower():
-                                    errors.append(
-                                        f"  {xml_rel_path}: Line {elem.sourceline}: "
-                                        f"<{elem_name}> references '{rid_attr}' which points to '{actual_type}' "
-                                        f"but should point to a '{expected_type}' relationship"
-                                    )
-
-            except Exception as e:
-                xml_rel_path = xml_file.relative_to(self.unpacked_dir)
-                errors.append(f"  Error processing {xml_rel_path}: {e}")
+            errors.extend(
+                self._rule_result("relationship_ids", xml_file, depends_on=(rels_file,))
+            )
 
         if errors:
-            print(f"FAILED - Found {len(errors)} relationship ID reference errors:")
-            for error in errors:
-                print(error)
-            print("\nThese ID mismatches will cause the document to appear corrupt!")
-            return False
+            return failed(
+                f"Found {len(errors)} relationship ID reference errors:",
+                errors,
+                "\nThese ID mismatches will cause the document to appear corrupt!",
+            )
         else:
             if self.verbose:
                 print("PASSED - All relationship ID references are valid")
@@ -525,13 +610,12 @@ class BaseSchemaValidator:
 
         # Find [Content_Types].xml file
         content_types_file = self.unpacked_dir / "[Content_Types].xml"
-        if not content_types_file.exists():
-            print("FAILED - [Content_Types].xml file not found")
-            return False
+        if not self._part_exists(content_types_file):
+            return failed("[Content_Types].xml file not found")
 
         try:
             # Parse and get all declared parts and extensions
-            root = lxml.etree.parse(str(content_types_file)).getroot()
+            root = self._parse(content_types_file).getroot()
             declared_parts = set()
             declared_extensions = set()
 
@@ -575,15 +659,12 @@ class BaseSchemaValidator:
                 "emf": "image/x-emf",
             }
 
-            # Get all files in the unpacked directory
-            all_files = list(self.unpacked_dir.rglob("*"))
-            all_files = [f for f in all_files if f.is_file()]
+            # Get all parts of the document
+            all_files = [PurePosixPath(name) for name in self._part_names]
 
             # Check all XML files for Override declarations
             for xml_file in self.xml_files:
-                path_str = str(xml_file.relative_to(self.unpacked_dir)).replace(
-                    "\\", "/"
-                )
+                path_str = self._part_name(xml_file)
 
                 # Skip non-content files
                 if any(
@@ -592,17 +673,17 @@ class BaseSchemaValidator:
                 ):
                     continue
 
-                try:
-                    root_tag = lxml.etree.parse(str(xml_file)).getroot().tag
-                    root_name = root_tag.split("}")[-1] if "}" in root_tag else root_tag
+                root_name = self._rule_result("root_name", xml_file)
+                if root_name is None:
+                    continue  # Skip unparseable files
 
-                    if root_name in declarable_roots and path_str not in declared_parts:
-                        errors.append(
-                            f"  {path_str}: File with <{root_name}> root not declared in [Content_Types].xml"
+                if root_name in declarable_roots and path_str not in declared_parts:
+                    errors.append(
+                        ValidationError(
+                            f"File with <{root_name}> root not declared in [Content_Types].xml",
+                            path_str,
                         )
-
-                except Exception:
-                    continue  # Skip unparseable files
+                    )
 
             # Check all non-XML files for Default extension declarations
             for file_path in all_files:
@@ -618,19 +699,21 @@ class BaseSchemaValidator:
                 if extension and extension not in declared_extensions:
                     # Check if it's a known media extension that should be declared
                     if extension in media_extensions:
-                        relative_path = file_path.relative_to(self.unpacked_dir)
                         errors.append(
-                            f'  {relative_path}: File with extension \'{extension}\' not declared in [Content_Types].xml - should add: <Default Extension="{extension}" ContentType="{media_extensions[extension]}"/>'
+                            ValidationError(
+                                f"File with extension '{extension}' not declared in [Content_Types].xml - should add: "
+                                f'<Default Extension="{extension}" ContentType="{media_extensions[extension]}"/>',
+                                file_path,
+                            )
                         )
 
         except Exception as e:
-            errors.append(f"  Error parsing [Content_Types].xml: {e}")
+            errors.append(ValidationError(f"Error parsing: {e}", "[Content_Types].xml"))
 
         if errors:
-            print(f"FAILED - Found {len(errors)} content type declaration errors:")
-            for error in errors:
-                print(error)
-            return False
+            return failed(
+                f"Found {len(errors)} content type declaration errors:", errors
+            )
         else:
             if self.verbose:
                 print(
@@ -692,11 +775,9 @@ class BaseSchemaValidator:
         valid_count = 0
         skipped_count = 0
 
-        for xml_file in self.xml_files:
+        results = self._validate_files_against_xsd(self.xml_files)
+        for xml_file, (is_valid, new_file_errors) in zip(self.xml_files, results):
             relative_path = str(xml_file.relative_to(self.unpacked_dir))
-            is_valid, new_file_errors = self.validate_file_against_xsd(
-                xml_file, verbose=False
-            )
 
             if is_valid is None:
                 skipped_count += 1
@@ -711,11 +792,16 @@ class BaseSchemaValidator:
                 continue
 
             # Has new errors
-            new_errors.append(f"  {relative_path}: {len(new_file_errors)} new error(s)")
-            for error in list(new_file_errors)[:3]:  # Show first 3 errors
-                new_errors.append(
-                    f"    - {error[:250]}..." if len(error) > 250 else f"    - {error}"
+            new_errors.append(
+                ValidationError(
+                    f"{len(new_file_errors)} new error(s)",
+                    relative_path,
+                    details=[
+                        f"{error[:250]}..." if len(error) > 250 else error
+                        for error in sorted(new_file_errors)[:3]  # Show first 3 errors
+                    ],
                 )
+            )
 
         # Print summary
         if self.verbose:
@@ -724,20 +810,78 @@ class BaseSchemaValidator:
             print(f"  - Skipped (no schema): {skipped_count}")
             if original_error_count:
                 print(f"  - With original errors (ignored): {original_error_count}")
-            print(
-                f"  - With NEW errors: {len(new_errors) > 0 and len([e for e in new_errors if not e.startswith('    ')]) or 0}"
-            )
+            print(f"  - With NEW errors: {len(new_errors)}")
 
         if new_errors:
-            print("\nFAILED - Found NEW validation errors:")
-            for error in new_errors:
-                print(error)
-            return False
+            print()
+            return failed("Found NEW validation errors:", new_errors)
         else:
             if self.verbose:
                 print("\nPASSED - No new XSD validation errors introduced")
             return True
 
+    def _validate_files_against_xsd(self, xml_files):
+        """Run validate_file_against_xsd on each file, in parallel if workers > 1.
+
+        Parts whose result is recorded in the snapshot are not validated again.
+
+        Returns:
+            list: (is_valid, new_errors_set) tuples in the order of xml_files
+        """
+        results = {}
+        pending = []
+        if self.snapshot is None:
+            pending = list(xml_files)
+        else:
+            for xml_file in xml_files:
+                part_name = self._part_name(xml_file)
+                digest = self._content_digest(xml_file)
+                found, result = self.snapshot.get("xsd", part_name, digest)
+                if found:
+                    results[xml_file] = result
+                else:
+                    pending.append(xml_file)
+
+        for xml_file, (result, wall_time, cpu_time) in zip(
+            pending, self._run_xsd_validation(pending)
+        ):
+            results[xml_file] = result
+            if self._report is not None:
+                self._report.add_part_time(
+                    self._part_name(xml_file), wall_time, cpu_time
+                )
+            if self.snapshot is not None:
+                part_name = self._part_name(xml_file)
+                digest = self._content_digest(xml_file)
+                self.snapshot.put("xsd", part_name, digest, result)
+
+        return [results[xml_file] for xml_file in xml_files]
+
+    def _run_xsd_validation(self, xml_files):
+        """Validate files against XSD schemas, in worker processes if workers > 1.
+
+        Returns:
+            list: (result, wall time, cpu time) for each file, where result is
+                what validate_file_against_xsd returned
+        """
+        workers = min(self.workers, len(xml_files))
+        if workers <= 1:
+            return [_validate_file_timed(self, xml_file) for xml_file in xml_files]
+
+        # Each worker process gets its own copy of this validator, and with it
+        # its own compiled-schema registry and original-document index
+        chunksize = max(1, len(xml_files) // (workers * 4))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_xsd_worker,
+            initargs=(self,),
+        ) as executor:
+            return list(
+                executor.map(
+                    _validate_file_in_xsd_worker, xml_files, chunksize=chunksize
+                )
+            )
+
     def _get_schema_path(self, xml_file):
         """Determine the appropriate schema path for an XML file."""
         # Check exact filename match
@@ -830,78 +974,159 @@ class BaseSchemaValidator:
             return None, None  # Skip file
 
         try:
-            # Load schema
-            with open(schema_path, "rb") as xsd_file:
-                parser = lxml.etree.XMLParser()
-                xsd_doc = lxml.etree.parse(
-                    xsd_file, parser=parser, base_url=str(schema_path)
-                )
-                schema = lxml.etree.XMLSchema(xsd_doc)
+            with self._open_part(xml_file) as f:
+                data = f.read()
+        except (OSError, KeyError) as e:
+            return False, {str(e)}
 
-            # Load and preprocess XML
-            with open(xml_file, "r") as f:
-                xml_doc = lxml.etree.parse(f)
+        return self._validate_xsd_cached(
+            data,
+            schema_path,
+            xml_file.relative_to(base_path),
+            lambda: self._parse(xml_file),
+        )
 
-            xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
-            xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
+    def _validate_xsd_cached(self, data, schema_path, relative_path, load_doc):
+        """Validate a part against XSD schema, reusing stored results for identical bytes.
 
-            # Clean ignorable namespaces if needed
-            relative_path = xml_file.relative_to(base_path)
-            if (
-                relative_path.parts
-                and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
-            ):
-                xml_doc = self._clean_ignorable_namespaces(xml_doc)
+        Args:
+            data: Raw bytes of the part
+            schema_path: Path to the XSD schema for the part
+            relative_path: Path of the part within the package
+            load_doc: Callable returning the parsed part, only called on a cache miss
 
-            # Validate
-            if schema.validate(xml_doc):
-                return True, set()
+        Returns:
+            tuple: (is_valid, errors_set)
+        """
+        clean_namespaces = bool(
+            relative_path.parts and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
+        )
+        key = None
+        if self.xsd_error_store is not None:
+            try:
+                schema_name = schema_path.relative_to(self.schemas_dir).as_posix()
+            except ValueError:
+                schema_name = str(schema_path)
+            try:
+                schema_digest = schema_registry.digest(schema_path)
+            except OSError:
+                pass  # Reported below, when the schema is loaded
             else:
-                errors = set()
-                for error in schema.error_log:
-                    # Store normalized error message (without line numbers for comparison)
-                    errors.add(error.message)
-                return False, errors
+                key = self.xsd_error_store.key(
+                    schema_name, schema_digest, clean_namespaces, data
+                )
+                errors = self.xsd_error_store.get(key)
+                if errors is not None:
+                    return not errors, errors
 
+        try:
+            # Schema load failures depend on the installation, not the part,
+            # so they are reported without being stored
+            schema_registry.get(schema_path)
+            xml_doc = load_doc()
         except Exception as e:
             return False, {str(e)}
 
+        try:
+            is_valid, errors = self._validate_xsd_doc(
+                xml_doc, schema_path, relative_path
+            )
+        except Exception as e:
+            # Not the errors of a completed validation: not stored either
+            return False, {str(e)}
+        if key is not None:
+            self.xsd_error_store.put(key, errors)
+        return is_valid, errors
+
+    def _validate_xsd_doc(self, xml_doc, schema_path, relative_path):
+        """Validate a parsed document against an XSD schema. Returns (is_valid, errors_set).
+
+        The document is not modified; preprocessing works on a copy. Failures
+        to load the schema or preprocess the document are raised.
+        """
+        # Load schema (compiled once per process)
+        schema = schema_registry.get(schema_path)
+
+        # Preprocess XML
+        xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
+        xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
+
+        # Clean ignorable namespaces if needed
+        if relative_path.parts and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS:
+            xml_doc = self._clean_ignorable_namespaces(xml_doc)
+
+        # Validate
+        if schema.validate(xml_doc):
+            return True, set()
+        else:
+            errors = set()
+            for error in schema.error_log:
+                # Store normalized error message (without line numbers for comparison)
+                errors.add(error.message)
+            return False, errors
+
+    @property
+    def original_package(self):
+        """Index of the original document's parts, opened on first use."""
+        if self._original_package is None:
+            self._original_package = open_package(self.original_file)
+        return self._original_package
+
+    def _get_original_tree(self, part_name):
+        """Return the parsed tree of a part of the original document.
+
+        Trees are parsed once per validator and must not be modified.
+
+        Args:
+            part_name: Archive path of the part (e.g. "word/document.xml")
+
+        Raises:
+            KeyError: If the part does not exist in the original document
+        """
+        if part_name not in self._original_trees:
+            data = self.original_package.read(part_name)
+            self._original_trees[part_name] = lxml.etree.fromstring(data).getroottree()
+        return self._original_trees[part_name]
+
     def _get_original_file_errors(self, xml_file):
         """Get XSD validation errors from a single file in the original document.
 
+        Results are memoized per part.
+
         Args:
             xml_file: Path to the XML file in unpacked_dir to check
 
         Returns:
             set: Set of error messages from the original file
         """
-        import tempfile
-        import zipfile
-
-        # Resolve both paths to handle symlinks (e.g., /var vs /private/var on macOS)
-        xml_file = Path(xml_file).resolve()
-        unpacked_dir = self.unpacked_dir.resolve()
-        relative_path = xml_file.relative_to(unpacked_dir)
+        # Resolve the path to handle symlinks (e.g., /var vs /private/var on macOS)
+        relative_path = Path(xml_file).resolve().relative_to(self.unpacked_dir)
+        part_name = relative_path.as_posix()
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            # Extract original file
-            with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                zip_ref.extractall(temp_path)
+        if part_name not in self._original_errors:
+            self._original_errors[part_name] = self._compute_original_file_errors(
+                relative_path
+            )
+        return self._original_errors[part_name]
 
-            # Find corresponding file in original
-            original_xml_file = temp_path / relative_path
+    def _compute_original_file_errors(self, relative_path):
+        """Validate one part of the original document against its XSD schema."""
+        part_name = relative_path.as_posix()
+        if part_name not in self.original_package:
+            # File didn't exist in original, so no original errors
+            return set()
 
-            if not original_xml_file.exists():
-                # File didn't exist in original, so no original errors
-                return set()
+        schema_path = self._get_schema_path(relative_path)
+        if not schema_path:
+            return set()
 
-            # Validate the specific file in original
-            is_valid, errors = self._validate_single_file_xsd(
-                original_xml_file, temp_path
-            )
-            return errors if errors else set()
+        _, errors = self._validate_xsd_cached(
+            self.original_package.read(part_name),
+            schema_path,
+            relative_path,
+            lambda: self._get_original_tree(part_name),
+        )
+        return errors if errors else set()
 
     def _remove_template_tags_from_text_nodes(self, xml_doc):
         """Remove template tags from XML text nodes and collect warnings.
@@ -947,5 +1172,237 @@ class BaseSchemaValidator:
         return lxml.etree.ElementTree(xml_copy), warnings
 
 
+class WellFormednessRule(ElementRule):
+    """Reports the part if it is not well-formed XML."""
+
+    def failed(self, error):
+        if isinstance(error, lxml.etree.XMLSyntaxError):
+            return [ValidationError(error.msg, self.relative_path, error.lineno)]
+        return [ValidationError(f"Unexpected error: {error}", self.relative_path)]
+
+
+class IgnorableNamespacesRule(ElementRule):
+    """Finds prefixes listed in the root's mc:Ignorable that are not declared."""
+
+    root_only = True
+
+    def __init__(self, validator, xml_file):
+        super().__init__(validator, xml_file)
+        self.errors = []
+
+    def start(self, elem, stream):
+        declared = set(elem.nsmap.keys()) - {None}  # Exclude default namespace
+        for attr_val in [v for k, v in elem.attrib.items() if k.endswith("Ignorable")]:
+            undeclared = set(attr_val.split()) - declared
+            self.errors.extend(
+                ValidationError(
+                    f"Namespace '{ns}' in Ignorable but not declared",
+                    self.relative_path,
+                )
+                for ns in undeclared
+            )
+
+    def result(self):
+        return self.errors
+
+    def failed(self, error):
+        if isinstance(error, lxml.etree.XMLSyntaxError):
+            return []  # Reported by the well-formedness check
+        return super().failed(error)
+
+
+class RootNameRule(ElementRule):
+    """Records the local name of the root element (None if unparseable)."""
+
+    root_only = True
+
+    def __init__(self, validator, xml_file):
+        super().__init__(validator, xml_file)
+        self.root_name = None
+
+    def start(self, elem, stream):
+        tag = elem.tag
+        self.root_name = tag.split("}")[-1] if "}" in tag else tag
+
+    def result(self):
+        return self.root_name
+
+    def failed(self, error):
+        return None
+
+
+class UniqueIdRule(ElementRule):
+    """Checks file-level ID uniqueness and collects IDs that must be globally unique.
+
+    Elements inside mc:AlternateContent are ignored. The result lists, in
+    document order, ("error", message) for file-level violations and
+    ("global", id_value, line, tag) for IDs that validate_unique_ids checks
+    across all parts.
+    """
+
+    def __init__(self, validator, xml_file):
+        super().__init__(validator, xml_file)
+        self.alternate_content = f"{{{validator.MC_NAMESPACE}}}AlternateContent"
+        self.entries = []
+        self.file_ids = {}  # Track IDs that must be unique within this file
+        self.requirements = {}  # Clark name -> (local name, ID requirement)
+
+    def start(self, elem, stream):
+        # Look up the element name without namespace, once per distinct tag
+        requirement = self.requirements.get(elem.tag)
+        if requirement is None:
+            tag = (
+                elem.tag.split("}")[-1].lower() if "}" in elem.tag else elem.tag.lower()
+            )
+            requirement = self.requirements[elem.tag] = (
+                tag,
+                self.validator.UNIQUE_ID_REQUIREMENTS.get(tag),
+            )
+
+        # Check if this element type has ID uniqueness requirements
+        tag, id_requirement = requirement
+        if id_requirement is None or stream.inside(self.alternate_content):
+            return
+        attr_name, scope = id_requirement
+
+        # Look for the specified attribute
+        id_value = None
+        for attr, value in elem.attrib.items():
+            attr_local = attr.split("}")[-1].lower() if "}" in attr else attr.lower()
+            if attr_local == attr_name:
+                id_value = value
+                break
+
+        if id_value is None:
+            return
+        if scope == "global":
+            # Checked across all files by validate_unique_ids
+            self.entries.append(("global", id_value, elem.sourceline, tag))
+        elif scope == "file":
+            # Check file-level uniqueness
+            ids = self.file_ids.setdefault((tag, attr_name), {})
+            if id_value in ids:
+                self.entries.append(
+                    (
+                        "error",
+                        ValidationError(
+                            f"Duplicate {attr_name}='{id_value}' in <{tag}> "
+                            f"(first occurrence at line {ids[id_value]})",
+                            self.relative_path,
+                            elem.sourceline,
+                        ),
+                    )
+                )
+            else:
+                ids[id_value] = elem.sourceline
+
+    def result(self):
+        return self.entries
+
+    def failed(self, error):
+        return [("error", ValidationError(f"Error: {error}", self.relative_path))]
+
+
+class RelationshipIdRule(ElementRule):
+    """Checks that r:id attributes reference relationships of the part's .rels file."""
+
+    def __init__(self, validator, xml_file, rels_file):
+        super().__init__(validator, xml_file)
+        self.rels_file = rels_file
+        self.rid_attr = f"{{{validator.OFFICE_RELATIONSHIPS_NAMESPACE}}}id"
+        self.rid_to_type = {}
+        self.rels_errors = []
+        self.errors = []
+
+    def prepare(self):
+        # Valid relationship IDs and their types, from the relationship graph
+        rels_name = self.rels_file.relative_to(self.validator.unpacked_dir).as_posix()
+        for rel in self.validator.relationship_graph.relationships(rels_name):
+            if rel.id:
+                # Check for duplicate rIds
+                if rel.id in self.rid_to_type:
+                    self.rels_errors.append(
+                        ValidationError(
+                            f"Duplicate relationship ID '{rel.id}' (IDs must be unique)",
+                            rels_name,
+                            rel.line,
+                        )
+                    )
+                # Extract just the type name from the full URL
+                type_name = rel.type.split("/")[-1] if "/" in rel.type else rel.type
+                self.rid_to_type[rel.id] = type_name
+
+    def start(self, elem, stream):
+        # Check for r:id attribute (relationship ID)
+        rid_attr = elem.get(self.rid_attr)
+        if not rid_attr:
+            return
+
+        rid_to_type = self.rid_to_type
+        elem_name = elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
+
+        # Check if the ID exists
+        if rid_attr not in rid_to_type:
+            self.errors.append(
+                ValidationError(
+                    f"<{elem_name}> references non-existent relationship '{rid_attr}' "
+                    f"(valid IDs: {', '.join(sorted(rid_to_type.keys())[:5])}{'...' if len(rid_to_type) > 5 else ''})",
+                    self.relative_path,
+                    elem.sourceline,
+                )
+            )
+        # Check if we have type expectations for this element
+        elif self.validator.ELEMENT_RELATIONSHIP_TYPES:
+            expected_type = self.validator._get_expected_relationship_type(elem_name)
+            if expected_type:
+                actual_type = rid_to_type[rid_attr]
+                # Check if the actual type matches or contains the expected type
+                if expected_type not in actual_type.lower():
+                    self.errors.append(
+                        ValidationError(
+                            f"<{elem_name}> references '{rid_attr}' which points to '{actual_type}' "
+                            f"but should point to a '{expected_type}' relationship",
+                            self.relative_path,
+                            elem.sourceline,
+                        )
+                    )
+
+    def result(self):
+        return self.rels_errors + self.errors
+
+    def failed(self, error):
+        return self.rels_errors + [
+            ValidationError(f"Error processing: {error}", self.relative_path)
+        ]
+
+
+# Validator used by XSD worker processes (see _validate_files_against_xsd)
+_xsd_worker_validator = None
+
+
+def _init_xsd_worker(validator):
+    global _xsd_worker_validator
+    # With the fork start method the validator is inherited rather than
+    # unpickled, open archives included; reset it to its pickled state so
+    # each worker reads the archives through its own file handles
+    validator.__dict__.update(validator.__getstate__())
+    _xsd_worker_validator = validator
+
+
+def _validate_file_in_xsd_worker(xml_file):
+    return _validate_file_timed(_xsd_worker_validator, xml_file)
+
+
+def _validate_file_timed(validator, xml_file):
+    """Validate a file against its XSD schema, measuring wall and CPU time."""
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    result = validator.validate_file_against_xsd(xml_file, verbose=False)
+    return (
+        result,
+        time.perf_counter() - wall_start,
+        time.process_time() - cpu_start,
+    )
+
+
 if __name__ == "__main__":
     raise RuntimeError("This module should not be run directly.")
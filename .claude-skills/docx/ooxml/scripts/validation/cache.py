@@ -0,0 +1,411 @@
+"""
+Caches shared by the document validators.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import lxml.etree
+
+XSD_NAMESPACE = "http://www.w3.org/2001/XMLSchema"
+
+
+class XMLTreeCache:
+    """Parsed XML trees shared by every check of a validator.
+
+    Each file is parsed at most once while it stays in the cache. The cache is
+    bounded by the total size of the source files it holds; the least recently
+    used trees are dropped when the budget is exceeded.
+
+    Trees returned by get() are shared and must be treated as read-only.
+    Checks that need to modify a tree should call get_copy() to obtain a
+    private copy instead.
+    """
+
+    # Budget in bytes of source XML (parsed trees take several times more)
+    DEFAULT_BUDGET = 256 * 1024 * 1024
+
+    def __init__(self, budget=DEFAULT_BUDGET, loader=None):
+        self.budget = budget
+        # Optional callable returning (tree, source size) for a path, used
+        # instead of parsing the file at that path
+        self.loader = loader
+        self._entries = OrderedDict()  # key -> (tree or exception, cost)
+        self._used = 0
+
+    def get(self, path):
+        """Return the shared parsed tree for a file.
+
+        Raises:
+            lxml.etree.XMLSyntaxError: If the file is not well-formed
+        """
+        key = str(path)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._load(path)
+            self._store(key, entry)
+        else:
+            self._entries.move_to_end(key)
+
+        result = entry[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def get_copy(self, path):
+        """Return a private copy of the parsed tree that may be modified."""
+        return copy.deepcopy(self.get(path))
+
+    def clear(self):
+        """Drop all cached trees."""
+        self._entries.clear()
+        self._used = 0
+
+    def _load(self, path):
+        try:
+            if self.loader is not None:
+                return self.loader(path)
+            path = Path(path)
+            try:
+                cost = path.stat().st_size
+            except OSError:
+                cost = 0
+            return lxml.etree.parse(str(path)), cost
+        except Exception as e:
+            # Remember failures too so every check sees the same error
+            return e, 0
+
+    def _store(self, key, entry):
+        cost = entry[1]
+        if cost > self.budget:
+            return  # Too large to keep; the caller still gets the parsed tree
+
+        self._entries[key] = entry
+        self._used += cost
+        while self._used > self.budget:
+            _, (_, evicted_cost) = self._entries.popitem(last=False)
+            self._used -= evicted_cost
+
+
+class SchemaRegistry:
+    """Process-wide registry of compiled XSD schemas keyed by schema path.
+
+    Compiling the OOXML schemas (and everything they import) is the most
+    expensive step of XSD validation, so each schema is compiled at most once
+    per process and shared by every validator. Compilation failures are
+    remembered as well and raised again on every lookup.
+    """
+
+    def __init__(self):
+        self._schemas = {}  # resolved path -> XMLSchema or exception
+        self._digests = {}  # resolved path -> SHA-256 of the schema files
+        self._locks = {}  # resolved path -> lock held while compiling
+        self._lock = threading.Lock()
+
+    def get(self, schema_path):
+        """Return the compiled schema for schema_path, compiling it if needed."""
+        key = str(Path(schema_path).resolve())
+        result = self._schemas.get(key)
+        if result is None:
+            with self._lock:
+                lock = self._locks.setdefault(key, threading.Lock())
+            with lock:
+                result = self._schemas.get(key)
+                if result is None:
+                    result = self._compile(key)
+                    self._schemas[key] = result
+
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def digest(self, schema_path):
+        """Return the SHA-256 of a schema and of the schemas it uses.
+
+        The files the schema imports, includes or redefines are hashed with
+        it, recursively. Each schema is hashed once per process.
+
+        Raises:
+            OSError: If the schema file cannot be read
+        """
+        key = str(Path(schema_path).resolve())
+        digest = self._digests.get(key)
+        if digest is None:
+            digest = self._digests[key] = _schema_files_digest(key)
+        return digest
+
+    def warm_start(self, schemas_dir, first=()):
+        """Compile every schema under schemas_dir in a background thread.
+
+        Args:
+            schemas_dir: Directory containing the bundled .xsd files
+            first: Schema paths to compile before the rest
+
+        Returns:
+            threading.Thread: The started daemon thread
+        """
+        schema_paths = list(first) + sorted(Path(schemas_dir).rglob("*.xsd"))
+
+        def compile_all():
+            for schema_path in schema_paths:
+                try:
+                    self.get(schema_path)
+                except Exception:
+                    pass  # Reported again when a validator needs the schema
+
+        thread = threading.Thread(
+            target=compile_all, name="xsd-warm-start", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def _compile(self, schema_path):
+        try:
+            with open(schema_path, "rb") as xsd_file:
+                parser = lxml.etree.XMLParser()
+                xsd_doc = lxml.etree.parse(
+                    xsd_file, parser=parser, base_url=schema_path
+                )
+                return lxml.etree.XMLSchema(xsd_doc)
+        except Exception as e:
+            return e
+
+
+def _schema_files_digest(schema_path):
+    """Return the SHA-256 of a schema file and of the local files it uses."""
+    digest = hashlib.sha256()
+    pending, seen = [Path(schema_path)], set()
+    while pending:
+        path = pending.pop(0)
+        if path in seen:
+            continue
+        seen.add(path)
+        data = path.read_bytes()
+        digest.update(len(data).to_bytes(8, "big") + data)
+        try:
+            root = lxml.etree.fromstring(data)
+        except lxml.etree.XMLSyntaxError:
+            continue  # Reported when the schema is compiled
+        for location in root.xpath(
+            "xs:import/@schemaLocation | xs:include/@schemaLocation"
+            " | xs:redefine/@schemaLocation",
+            namespaces={"xs": XSD_NAMESPACE},
+        ):
+            if "://" not in location:
+                pending.append((path.parent / location).resolve())
+    return digest.hexdigest()
+
+
+# Shared by all validators in this process
+schema_registry = SchemaRegistry()
+
+
+class XSDErrorStore:
+    """On-disk cache of XSD validation results keyed by part content.
+
+    Entries map (schema and digest of its files, preprocessing mode, SHA-256
+    of the part bytes) to the set of schema errors reported for that part, so unchanged parts (the
+    original document's baseline in particular) are not validated again on
+    later runs. The store is bounded by max_bytes; the least recently used
+    entries are evicted first.
+    """
+
+    DEFAULT_DIR = Path.home() / ".cache" / "ooxml" / "xsd-errors"
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+    # Bump when the validation preprocessing changes the reported errors
+    FORMAT_VERSION = "1"
+
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._size = None  # Total size of entries, computed on first write
+
+    @classmethod
+    def from_environment(cls):
+        """Return the store configured by OOXML_XSD_CACHE_DIR.
+
+        Returns None (no caching) if the variable is set to an empty string.
+        """
+        directory = os.environ.get("OOXML_XSD_CACHE_DIR")
+        if directory is None:
+            return cls()
+        if not directory:
+            return None
+        return cls(directory)
+
+    def key(self, schema_name, schema_digest, clean_namespaces, data):
+        """Return the cache key for a part validated against a schema.
+
+        schema_digest is the digest of the schema files (see
+        SchemaRegistry.digest), so editing or upgrading them invalidates
+        the entries made with the previous versions.
+        """
+        digest = hashlib.sha256()
+        header = "\0".join(
+            [
+                self.FORMAT_VERSION,
+                ".".join(map(str, lxml.etree.LIBXML_VERSION)),
+                schema_name,
+                schema_digest,
+                "clean" if clean_namespaces else "raw",
+            ]
+        )
+        digest.update(header.encode("utf-8") + b"\0")
+        digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached set of errors for key, or None if not cached."""
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                errors = json.load(f)["errors"]
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return set(errors)
+
+    def put(self, key, errors):
+        """Store the set of errors for key. Failures to write are ignored."""
+        path = self._entry_path(key)
+        content = json.dumps({"errors": sorted(errors)}).encode("utf-8")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(temp_path, path)
+        except OSError:
+            return
+
+        if self._size is None:
+            self._size = self._entries_size()
+        else:
+            self._size += len(content)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _entry_path(self, key):
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _entries(self):
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _entries_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """Remove least recently used entries until the store is 90% full."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+        self._size = total
+
+
+class ValidationSnapshot:
+    """Per-part results of earlier validation runs over the same package.
+
+    Results of per-part checks are recorded together with the SHA-256 of the
+    part (and of any files the result depends on, such as the part's .rels
+    file). A later run reuses a result while those digests are unchanged, so
+    only edited parts are checked again. Files are hashed again only when
+    their size or mtime changed since they were last hashed.
+
+    A snapshot belongs to one original document; binding it to a different
+    or modified original discards the recorded results. An original directory
+    is known by its path only, as its mtime changes whenever a file is added.
+    """
+
+    # A file modified within this many nanoseconds of being hashed may change
+    # again without a visible mtime change, so its digest is not trusted
+    RACY_WINDOW_NS = 2 * 10**9
+
+    def __init__(self):
+        self._digests = {}  # path -> (mtime_ns, size, hashed_at_ns, digest)
+        self._results = {}  # (check, part name) -> (digest, result)
+        self._original = None
+
+    def bind(self, original_file):
+        """Tie the snapshot to an original document, resetting it if that changed."""
+        path = Path(original_file)
+        try:
+            stat = path.stat()
+            identity = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+            if path.is_dir():
+                identity = identity[:1]
+        except OSError:
+            identity = None
+        if identity != self._original:
+            self._results.clear()
+            self._original = identity
+
+    def digest(self, path, dirty=None):
+        """Return the SHA-256 of a file, or None if it does not exist.
+
+        Args:
+            path: File to hash
+            dirty: True to always hash the file again, False to trust the last
+                digest without looking at the file, None to hash again only
+                if its size or mtime changed
+        """
+        key = str(path)
+        entry = self._digests.get(key)
+        if dirty is False and entry is not None:
+            return entry[3]
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._digests.pop(key, None)
+            return None
+        if (
+            not dirty
+            and entry is not None
+            and entry[:2] == (stat.st_mtime_ns, stat.st_size)
+            and entry[2] - stat.st_mtime_ns > self.RACY_WINDOW_NS
+        ):
+            return entry[3]
+
+        hashed_at = time.time_ns()
+        try:
+            with open(path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            self._digests.pop(key, None)
+            return None
+        self._digests[key] = (stat.st_mtime_ns, stat.st_size, hashed_at, digest)
+        return digest
+
+    def get(self, check, part_name, digest):
+        """Return (True, result) if check was recorded for this content of a part."""
+        entry = self._results.get((check, part_name))
+        if entry is not None and entry[0] == digest:
+            return True, entry[1]
+        return False, None
+
+    def put(self, check, part_name, digest, result):
+        """Record the result of check for this content of a part."""
+        self._results[(check, part_name)] = (digest, result)
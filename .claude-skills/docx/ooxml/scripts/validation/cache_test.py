@@ -0,0 +1,67 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+if __package__:
+    from .cache import SchemaRegistry, XSDErrorStore
+else:
+    from cache import SchemaRegistry, XSDErrorStore
+
+SCHEMA = """<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:{kind} schemaLocation="{location}"/>
+  <xs:element name="a"/>
+</xs:schema>
+"""
+
+IMPORTED = """<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:element name="{name}"/>
+</xs:schema>
+"""
+
+
+class TestSchemaDigest(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.dir = Path(temp_dir.name)
+        (self.dir / "shared").mkdir()
+
+    def write(self, name, content):
+        path = self.dir / name
+        path.write_text(content, encoding="utf-8")
+        return path
+
+    def test_files_used_by_the_schema_are_hashed(self):
+        for kind in ("import", "include", "redefine"):
+            with self.subTest(kind):
+                schema = self.write(
+                    "main.xsd", SCHEMA.format(kind=kind, location="shared/b.xsd")
+                )
+                self.write("shared/b.xsd", IMPORTED.format(name="b"))
+                before = SchemaRegistry().digest(schema)
+                self.assertEqual(SchemaRegistry().digest(schema), before)
+                self.write("shared/b.xsd", IMPORTED.format(name="c"))
+                self.assertNotEqual(SchemaRegistry().digest(schema), before)
+
+    def test_schemas_using_each_other(self):
+        schema = self.write("main.xsd", SCHEMA.format(kind="include", location="b.xsd"))
+        self.write("b.xsd", SCHEMA.format(kind="include", location="main.xsd"))
+        self.assertTrue(SchemaRegistry().digest(schema))
+
+    def test_hashed_once_per_process(self):
+        registry = SchemaRegistry()
+        schema = self.write("main.xsd", IMPORTED.format(name="a"))
+        before = registry.digest(schema)
+        self.write("main.xsd", IMPORTED.format(name="b"))
+        self.assertEqual(registry.digest(schema), before)
+
+    def test_store_key_depends_on_the_digest(self):
+        store = XSDErrorStore(self.dir / "store")
+        self.assertNotEqual(
+            store.key("wml.xsd", "1" * 64, True, b"<a/>"),
+            store.key("wml.xsd", "2" * 64, True, b"<a/>"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
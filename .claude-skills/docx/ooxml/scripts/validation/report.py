@@ -0,0 +1,252 @@
+"""
+Machine-readable validation results with per-check and per-part timing.
+"""
+
+import json
+import time
+
+
+class ValidationError:
+    """One problem found by a check, located in a part where possible.
+
+    str() renders the error the way the checks print it:
+    "  part: Line N: message", with any details on the lines below.
+    """
+
+    def __init__(self, message, file=None, line=None, details=()):
+        self.message = message
+        self.file = None if file is None else str(file)
+        self.line = line
+        self.details = list(details)
+
+    def __str__(self):
+        location = ""
+        if self.file is not None:
+            location = f"{self.file}: "
+            if self.line is not None:
+                location += f"Line {self.line}: "
+        return "\n".join(
+            [f"  {location}{self.message}"]
+            + [f"    - {detail}" for detail in self.details]
+        )
+
+    def __repr__(self):
+        return (
+            f"ValidationError({self.message!r}, file={self.file!r}, line={self.line!r})"
+        )
+
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization."""
+        return {
+            "message": self.message,
+            "file": self.file,
+            "line": self.line,
+            "details": self.details,
+        }
+
+
+class CheckFailure:
+    """Result of a failed check: a headline and the errors found.
+
+    A failure is false, so checks can return it where they used to return
+    False. str() renders the FAILED block the check prints.
+    """
+
+    def __init__(self, headline, errors=(), footer=None):
+        self.headline = headline
+        self.listed = list(errors)
+        self.footer = footer
+
+    def __bool__(self):
+        return False
+
+    @property
+    def errors(self):
+        """The errors found; the headline itself if none were listed."""
+        return self.listed or [ValidationError(self.headline)]
+
+    def __str__(self):
+        lines = [f"FAILED - {self.headline}"]
+        lines.extend(str(error) for error in self.listed)
+        if self.footer is not None:
+            lines.append(self.footer)
+        return "\n".join(lines)
+
+
+def failed(headline, errors=(), footer=None):
+    """Print the FAILED block of a check and return it as the check's result.
+
+    Args:
+        headline: Summary printed after "FAILED - "
+        errors: ValidationErrors found by the check
+        footer: Advice printed after the errors, if any
+
+    Returns:
+        CheckFailure: The failure, which is false
+    """
+    failure = CheckFailure(headline, errors, footer)
+    print(failure)
+    return failure
+
+
+class CheckResult:
+    """Outcome, errors and cost of one validation check."""
+
+    def __init__(self, name):
+        self.name = name
+        self.passed = None  # True/False, or None for informational checks
+        self.errors = []  # ValidationErrors
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.part_times = {}  # part name -> [wall time, cpu time]
+
+    def add_part_time(self, part_name, wall_time, cpu_time):
+        """Add time spent on one part while running this check."""
+        times = self.part_times.setdefault(part_name, [0.0, 0.0])
+        times[0] += wall_time
+        times[1] += cpu_time
+
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization."""
+        return {
+            "name": self.name,
+            "passed": self.passed,
+            "wall_time": round(self.wall_time, 6),
+            "cpu_time": round(self.cpu_time, 6),
+            "errors": [
+                {"check": self.name, **error.to_dict()} for error in self.errors
+            ],
+            "parts": {
+                part_name: {"wall_time": round(wall, 6), "cpu_time": round(cpu, 6)}
+                for part_name, (wall, cpu) in self.part_times.items()
+            },
+        }
+
+
+class ValidationReport:
+    """Results of the checks run by a validator on one document.
+
+    A report is true if no check failed, so callers that only need a pass or
+    fail answer can keep treating the result of validate() as a bool.
+
+    Wall-clock and CPU times are measured per check and, where a check works
+    part by part, per part. CPU time is that of the current process; XSD
+    validation in worker processes is reported per part with the worker's
+    CPU time. A part's element rules are evaluated in one pass, whose cost is
+    attributed to the first check that needed it (usually "xml").
+    """
+
+    def __init__(self, document, original=None, validator=None):
+        self.document = str(document)
+        self.original = None if original is None else str(original)
+        self.validator = validator
+        self.checks = []
+        self.current = None  # CheckResult of the check being run
+
+    def __bool__(self):
+        return self.passed
+
+    @property
+    def passed(self):
+        """True if no check failed."""
+        return all(check.passed is not False for check in self.checks)
+
+    @property
+    def wall_time(self):
+        return sum(check.wall_time for check in self.checks)
+
+    @property
+    def cpu_time(self):
+        return sum(check.cpu_time for check in self.checks)
+
+    def run_check(self, name, check):
+        """Run check(), recording its outcome, errors and cost.
+
+        Args:
+            name: Name of the check in the report
+            check: Callable returning True, False or a CheckFailure, or None
+                if informational
+
+        Returns:
+            CheckResult: The result of the check
+        """
+        result = CheckResult(name)
+        self.checks.append(result)
+        self.current = result
+
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            passed = check()
+        finally:
+            result.wall_time = time.perf_counter() - wall_start
+            result.cpu_time = time.process_time() - cpu_start
+            self.current = None
+
+        result.passed = None if passed is None else bool(passed)
+        if isinstance(passed, CheckFailure):
+            result.errors = passed.errors
+        return result
+
+    def add_part_time(self, part_name, wall_time, cpu_time):
+        """Add time spent on a part to the check being run, if any."""
+        if self.current is not None:
+            self.current.add_part_time(part_name, wall_time, cpu_time)
+
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization."""
+        return {
+            "document": self.document,
+            "original": self.original,
+            "validator": self.validator,
+            "passed": self.passed,
+            "wall_time": round(self.wall_time, 6),
+            "cpu_time": round(self.cpu_time, 6),
+            "checks": [check.to_dict() for check in self.checks],
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+def format_profile(reports, limit=10):
+    """Return a text report ranking checks and parts by wall-clock time.
+
+    Args:
+        reports: ValidationReports to rank together
+        limit: Number of parts to list
+
+    Returns:
+        str: The profile, one entry per line
+    """
+    checks = [
+        (check.wall_time, check.cpu_time, check.name, report.validator)
+        for report in reports
+        for check in report.checks
+    ]
+    parts = {}
+    for report in reports:
+        for check in report.checks:
+            for part_name, (wall, cpu) in check.part_times.items():
+                times = parts.setdefault(part_name, [0.0, 0.0, set()])
+                times[0] += wall
+                times[1] += cpu
+                times[2].add(check.name)
+
+    total = sum(wall for wall, _, _, _ in checks)
+    lines = [f"Profile ({total:.3f}s wall):", "  Checks by wall time:"]
+    for wall, cpu, name, validator in sorted(checks, key=lambda c: -c[0]):
+        share = wall / total * 100 if total else 0.0
+        owner = f" [{validator}]" if validator and len(reports) > 1 else ""
+        lines.append(
+            f"    {wall:8.3f}s wall {cpu:8.3f}s cpu {share:5.1f}%  {name}{owner}"
+        )
+
+    if parts:
+        lines.append(f"  Parts by wall time (top {min(limit, len(parts))}):")
+        ranked = sorted(parts.items(), key=lambda item: -item[1][0])[:limit]
+        for part_name, (wall, cpu, names) in ranked:
+            lines.append(
+                f"    {wall:8.3f}s wall {cpu:8.3f}s cpu  {part_name} "
+                f"({', '.join(sorted(names))})"
+            )
+    return "\n".join(lines)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark the lxml and minidom backends of XMLEditor.
+
+Each XML part is parsed, searched with get_node() by line, edited with
+insert_after() and saved with each backend. The saved files must be the same
+XML (compared in canonical form, without the whitespace between elements).
+Every run is made in a fresh process, so
+peak memory can be compared.
+
+Usage:
+    python benchmark_editor.py <path>... [--lookups N] [--edits N] [--repeat N]
+
+Each path is an XML part or an unpacked Office document directory, whose XML
+parts are all benchmarked.
+"""
+
+import argparse
+import hashlib
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from lxml import etree
+
+from utilities import BACKENDS, XMLEditor
+
+STEPS = ("parse", "find", "edit", "save")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the lxml and minidom backends of XMLEditor"
+    )
+    parser.add_argument("paths", nargs="+", help="XML parts or unpacked directories")
+    parser.add_argument(
+        "--lookups", type=int, default=200, help="get_node() calls per part"
+    )
+    parser.add_argument(
+        "--edits", type=int, default=50, help="insert_after() calls per part"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Runs per measurement (best is kept)"
+    )
+    args = parser.parse_args()
+
+    parts = [part for path in args.paths for part in find_parts(Path(path))]
+    if not parts:
+        sys.exit("Error: no XML parts found")
+
+    identical = True
+    print(
+        f"{'part':<40} {'size':>9} {'backend':<8} "
+        + " ".join(f"{step:>7}" for step in STEPS)
+        + f" {'total':>7} {'MB':>7}  output"
+    )
+    for part in parts:
+        results = {
+            backend: measure(part, backend, args.lookups, args.edits, args.repeat)
+            for backend in BACKENDS
+        }
+        digests = {digest for _, _, digest in results.values()}
+        same = len(digests) == 1
+        identical = identical and same
+        for backend, (times, memory, _) in results.items():
+            print(
+                f"{part_label(part):<40} {part.stat().st_size:>9} {backend:<8} "
+                + " ".join(f"{times[step]:>6.3f}s" for step in STEPS)
+                + f" {sum(times.values()):>6.3f}s {memory:>7.1f}  "
+                + ("identical" if same else "DIFFERENT")
+            )
+
+    if not identical:
+        print("FAILED - the backends saved different XML", file=sys.stderr)
+        sys.exit(1)
+
+
+def find_parts(path):
+    if path.is_dir():
+        return [
+            f
+            for f in sorted(path.rglob("*"))
+            if f.is_file() and f.name.endswith((".xml", ".rels"))
+        ]
+    return [path]
+
+
+def part_label(path):
+    label = str(path)
+    return label if len(label) <= 40 else "..." + label[-37:]
+
+
+def measure(part, backend, lookups, edits, repeat):
+    """Return ({step: best time}, peak memory in MB, output digest)."""
+    best, peak, digest = None, 0.0, None
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            times, memory, digest = executor.submit(
+                _run, part, backend, lookups, edits
+            ).result()
+        best = times if best is None else {s: min(best[s], times[s]) for s in STEPS}
+        peak = max(peak, memory)
+    return best, peak, digest
+
+
+def _run(part, backend, lookups, edits):
+    times = {}
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(shutil.copy(part, temp_dir))
+
+        start = time.perf_counter()
+        editor = XMLEditor(path, backend=backend)
+        times["parse"] = time.perf_counter() - start
+
+        # The same elements with either backend: every n-th one in document order
+        elements = editor.dom.getElementsByTagName("*")[1:]
+        lookup_targets = _sample(elements, lookups)
+        edit_targets = _sample(elements, edits)
+        start = time.perf_counter()
+        for elem in lookup_targets:
+            try:
+                editor.get_node(tag=elem.tagName, line_number=elem.parse_position[0])
+            except ValueError:
+                pass  # Several elements with this tag on the line
+        times["find"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for elem in edit_targets:
+            editor.insert_after(elem, f"<{elem.tagName}/>")
+        times["edit"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        editor.save()
+        times["save"] = time.perf_counter() - start
+
+        output = path.read_bytes()
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    # The backends may place the whitespace between elements differently
+    blank_free = etree.fromstring(output, etree.XMLParser(remove_blank_text=True))
+    canonical = etree.tostring(blank_free, method="c14n")
+    return times, peak / 1024, hashlib.sha256(canonical).hexdigest()
+
+
+def _sample(elements, count):
+    if count <= 0 or not elements:
+        return []
+    step = max(len(elements) // count, 1)
+    return elements[::step][:count]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark the attribute injection of DocxXMLEditor on large inserted fragments.
+
+A section of tracked paragraphs (or a table with one such paragraph per row)
+is inserted into a document with insert_after(). The attributes are injected
+with the single walk of _inject_attributes_to_nodes and with the per-tag walks
+it replaces (one getElementsByTagName() per tag, and an ancestor walk for
+every w:r). Only the time spent injecting is measured. Both outputs must be
+identical, apart from the dates and the tracked change IDs (the single walk
+numbers them in document order, the per-tag walks numbered w:ins first).
+
+Usage:
+    PYTHONPATH=<skill root> python benchmark_inject.py [--paragraphs N]
+        [--layout paragraphs|table] [--inserts N] [--repeat N]
+"""
+
+import argparse
+import functools
+import hashlib
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from lxml import etree
+
+from scripts.document import DocxXMLEditor, _is_inside_deletion
+from scripts.utilities import BACKENDS
+
+DOCUMENT = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    "<w:body><w:p><w:r><w:t>Start</w:t></w:r></w:p><w:sectPr/></w:body></w:document>"
+)
+
+PARAGRAPH = (
+    '<w:p><w:pPr><w:pStyle w:val="Normal"/></w:pPr>'
+    '<w:r><w:rPr><w:b/></w:rPr><w:t xml:space="preserve">Clause {i}: </w:t></w:r>'
+    "<w:ins><w:r><w:t> replaced </w:t></w:r></w:ins>"
+    "<w:del><w:r><w:delText>original</w:delText></w:r></w:del>"
+    "<w:r><w:t>terms apply.</w:t></w:r></w:p>"
+)
+
+# Fragment layout -> (start, paragraph wrapper, end)
+LAYOUTS = {
+    "paragraphs": ("", "{}", ""),
+    "table": ("<w:tbl>", "<w:tr><w:tc>{}</w:tc></w:tr>", "</w:tbl>"),
+}
+
+# Attributes left out of the comparison
+IGNORED = (
+    "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}date",
+    "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}id",
+    "{http://schemas.microsoft.com/office/word/2023/wordml/word16du}dateUtc",
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the single-walk and per-tag attribute injection"
+    )
+    parser.add_argument(
+        "--paragraphs", type=int, default=2000, help="Paragraphs per fragment"
+    )
+    parser.add_argument(
+        "--layout", choices=LAYOUTS, default="paragraphs", help="Fragment layout"
+    )
+    parser.add_argument(
+        "--inserts", type=int, default=5, help="insert_after() calls per run"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per measurement (best is kept)"
+    )
+    args = parser.parse_args()
+
+    start, wrapper, end = LAYOUTS[args.layout]
+    fragment = (
+        start
+        + "".join(wrapper.format(PARAGRAPH.format(i=i)) for i in range(args.paragraphs))
+        + end
+    )
+    identical = True
+    print(f"{'backend':<8} {'single':>8} {'per-tag':>8} {'speedup':>7}  output")
+    for backend in BACKENDS:
+        new_time, new_digest = measure(
+            backend, fragment, args.inserts, args.repeat, per_tag=False
+        )
+        old_time, old_digest = measure(
+            backend, fragment, args.inserts, args.repeat, per_tag=True
+        )
+        same = new_digest == old_digest
+        identical = identical and same
+        print(
+            f"{backend:<8} {new_time:>7.3f}s {old_time:>7.3f}s {old_time / new_time:>6.1f}x  "
+            + ("identical" if same else "DIFFERENT")
+        )
+
+    if not identical:
+        print("FAILED - the injections gave different XML", file=sys.stderr)
+        sys.exit(1)
+
+
+def measure(backend, fragment, inserts, repeat, per_tag):
+    """Return (best time spent injecting, output digest)."""
+    best, digest = None, None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "document.xml"
+            path.write_text(DOCUMENT, encoding="utf-8")
+            editor = DocxXMLEditor(path, rsid="00AB12CD", backend=backend)
+            if per_tag:
+                inject = functools.partial(inject_per_tag, editor)
+            else:
+                inject = editor._inject_attributes_to_nodes
+            elapsed = 0.0
+
+            def timed_inject(nodes):
+                nonlocal elapsed
+                start = time.perf_counter()
+                inject(nodes)
+                elapsed += time.perf_counter() - start
+
+            editor._inject_attributes_to_nodes = timed_inject
+            anchor = editor.dom.getElementsByTagName("w:p")[0]
+
+            random.seed(0)  # The same paraIds in both runs
+            for _ in range(inserts):
+                editor.insert_after(anchor, fragment)
+
+            editor.save()
+            digest = _digest(path.read_bytes())
+        best = elapsed if best is None else min(best, elapsed)
+    return best, digest
+
+
+def inject_per_tag(editor, nodes):
+    """The injection as it was: one walk per tag, and ancestors for every w:r."""
+    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    injectors = editor._attribute_injectors(timestamp)
+
+    def inject(elem):
+        tag = elem.tagName
+        injectors[tag](elem, tag == "w:r" and _is_inside_deletion(elem))
+
+    for node in nodes:
+        if node.nodeType != node.ELEMENT_NODE:
+            continue
+        if node.tagName in injectors:
+            inject(node)
+        for tag in injectors:
+            for elem in node.getElementsByTagName(tag):
+                inject(elem)
+
+
+def _digest(output):
+    root = etree.fromstring(output)
+    for elem in root.iter():
+        for name in IGNORED:
+            elem.attrib.pop(name, None)
+    return hashlib.sha256(etree.tostring(root, method="c14n")).hexdigest()
+
+
+if __name__ == "__main__":
+    main()
@@ -26,16 +26,24 @@ Usage:
     doc.save()
 """
 
+import contextlib
+import functools
+import hashlib
 import html
 import random
 import shutil
 import tempfile
-from datetime import datetime, timezone
 from pathlib import Path
 
 from defusedxml import minidom
-from ooxml.scripts.pack import pack_document
+from ooxml.scripts.unpack import unpack_parts
+from ooxml.scripts.validation.cache import ValidationSnapshot
 from ooxml.scripts.validation.docx import DOCXSchemaValidator
+from ooxml.scripts.validation.package import (
+    MANIFEST_NAME,
+    read_manifest,
+    write_manifest,
+)
 from ooxml.scripts.validation.redlining import RedliningValidator
 
 from .utilities import XMLEditor
@@ -43,6 +51,21 @@ from .utilities import XMLEditor
 # Path to template files
 TEMPLATE_DIR = Path(__file__).parent / "templates"
 
+# Parts read or edited when a Document is created, copied into its workspace
+# up front (and unpacked first if the directory was unpacked lazily, see
+# unpack.py --parts)
+DOCUMENT_PARTS = [
+    "[Content_Types].xml",
+    "word/document.xml",
+    "word/_rels/document.xml.rels",
+    "word/settings.xml",
+    "word/people.xml",
+    "word/comments.xml",
+    "word/commentsExtended.xml",
+    "word/commentsIds.xml",
+    "word/commentsExtensible.xml",
+]
+
 
 class DocxXMLEditor(XMLEditor):
     """XMLEditor that automatically applies RSID, author, and date to new elements.
@@ -53,11 +76,16 @@ class DocxXMLEditor(XMLEditor):
     - w:id (for w:ins and w:del elements)
 
     Attributes:
-        dom (defusedxml.minidom.Document): The DOM document for direct manipulation
+        dom: The DOM document for direct manipulation (minidom API)
     """
 
     def __init__(
-        self, xml_path, rsid: str, author: str = "Claude", initials: str = "C"
+        self,
+        xml_path,
+        rsid: str,
+        author: str = "Claude",
+        initials: str = "C",
+        backend: str = "minidom",
     ):
         """Initialize with required RSID and optional author.
 
@@ -66,25 +94,22 @@ class DocxXMLEditor(XMLEditor):
             rsid: RSID to automatically apply to new elements
             author: Author name for tracked changes and comments (default: "Claude")
             initials: Author initials (default: "C")
+            backend: Library the DOM is built with, "minidom" or "lxml"
+                (default: "minidom", see XMLEditor)
         """
-        super().__init__(xml_path)
+        super().__init__(xml_path, backend=backend)
         self.rsid = rsid
         self.author = author
         self.initials = initials
+        self._change_ids = self._add_id_counter(("w:ins", "w:del"), "w:id")
 
     def _get_next_change_id(self):
-        """Get the next available change ID by checking all tracked change elements."""
-        max_id = -1
-        for tag in ("w:ins", "w:del"):
-            elements = self.dom.getElementsByTagName(tag)
-            for elem in elements:
-                change_id = elem.getAttribute("w:id")
-                if change_id:
-                    try:
-                        max_id = max(max_id, int(change_id))
-                    except ValueError:
-                        pass
-        return max_id + 1
+        """Get the next available change ID and reserve it.
+
+        The tracked change elements are scanned once; after that the IDs
+        handed out and those of inserted elements are counted instead.
+        """
+        return self._change_ids.take()
 
     def _ensure_w16du_namespace(self):
         """Ensure w16du namespace is declared on the root element."""
@@ -124,23 +149,52 @@ class DocxXMLEditor(XMLEditor):
         - w:comment: gets w:author, w:date, w:initials
         - w16cex:commentExtensible: gets w16cex:dateUtc
 
+        Each node and its descendants are walked once, in document order.
+        Whether an element is inside a w:del is carried down from its parent,
+        so only the ancestors of the nodes themselves are looked at.
+
         Args:
             nodes: List of DOM nodes to process
         """
         from datetime import datetime, timezone
 
         timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        injectors = self._attribute_injectors(timestamp)
 
-        def is_inside_deletion(elem):
-            """Check if element is inside a w:del element."""
-            parent = elem.parentNode
-            while parent:
-                if parent.nodeType == parent.ELEMENT_NODE and parent.tagName == "w:del":
-                    return True
-                parent = parent.parentNode
-            return False
+        for node in nodes:
+            if node.nodeType != node.ELEMENT_NODE:
+                continue
 
-        def add_rsid_to_p(elem):
+            # Whether each element walked so far is, or is inside, a w:del
+            deleted = {node: _is_inside_deletion(node)}
+            tag = node.tagName
+            if tag in injectors:
+                injectors[tag](node, deleted[node])
+            deleted[node] = deleted[node] or tag == "w:del"
+
+            # Descendants come after their parent in document order
+            for elem in node.getElementsByTagName("*"):
+                inside = deleted[elem.parentNode]
+                tag = elem.tagName
+                if tag in injectors:
+                    injectors[tag](elem, inside)
+                deleted[elem] = inside or tag == "w:del"
+
+    def _attribute_injectors(self, timestamp):
+        """Return {tag: inject(elem, deleted)} for _inject_attributes_to_nodes.
+
+        Args:
+            timestamp: Date given to tracked changes and comments
+        """
+        ensured = set()
+
+        def ensure_namespace(ensure):
+            # Check the root element once, not for every element
+            if ensure not in ensured:
+                ensure()
+                ensured.add(ensure)
+
+        def add_rsid_to_p(elem, deleted):
             if not elem.hasAttribute("w:rsidR"):
                 elem.setAttribute("w:rsidR", self.rsid)
             if not elem.hasAttribute("w:rsidRDefault"):
@@ -149,22 +203,22 @@ class DocxXMLEditor(XMLEditor):
                 elem.setAttribute("w:rsidP", self.rsid)
             # Add w14:paraId and w14:textId if not present
             if not elem.hasAttribute("w14:paraId"):
-                self._ensure_w14_namespace()
+                ensure_namespace(self._ensure_w14_namespace)
                 elem.setAttribute("w14:paraId", _generate_hex_id())
             if not elem.hasAttribute("w14:textId"):
-                self._ensure_w14_namespace()
+                ensure_namespace(self._ensure_w14_namespace)
                 elem.setAttribute("w14:textId", _generate_hex_id())
 
-        def add_rsid_to_r(elem):
+        def add_rsid_to_r(elem, deleted):
             # Use w:rsidDel for <w:r> inside <w:del>, otherwise w:rsidR
-            if is_inside_deletion(elem):
+            if deleted:
                 if not elem.hasAttribute("w:rsidDel"):
                     elem.setAttribute("w:rsidDel", self.rsid)
             else:
                 if not elem.hasAttribute("w:rsidR"):
                     elem.setAttribute("w:rsidR", self.rsid)
 
-        def add_tracked_change_attrs(elem):
+        def add_tracked_change_attrs(elem, deleted):
             # Auto-assign w:id if not present
             if not elem.hasAttribute("w:id"):
                 elem.setAttribute("w:id", str(self._get_next_change_id()))
@@ -173,13 +227,11 @@ class DocxXMLEditor(XMLEditor):
             if not elem.hasAttribute("w:date"):
                 elem.setAttribute("w:date", timestamp)
             # Add w16du:dateUtc for tracked changes (same as w:date since we generate UTC timestamps)
-            if elem.tagName in ("w:ins", "w:del") and not elem.hasAttribute(
-                "w16du:dateUtc"
-            ):
-                self._ensure_w16du_namespace()
+            if not elem.hasAttribute("w16du:dateUtc"):
+                ensure_namespace(self._ensure_w16du_namespace)
                 elem.setAttribute("w16du:dateUtc", timestamp)
 
-        def add_comment_attrs(elem):
+        def add_comment_attrs(elem, deleted):
             if not elem.hasAttribute("w:author"):
                 elem.setAttribute("w:author", self.author)
             if not elem.hasAttribute("w:date"):
@@ -187,13 +239,13 @@ class DocxXMLEditor(XMLEditor):
             if not elem.hasAttribute("w:initials"):
                 elem.setAttribute("w:initials", self.initials)
 
-        def add_comment_extensible_date(elem):
+        def add_comment_extensible_date(elem, deleted):
             # Add w16cex:dateUtc for comment extensible elements
             if not elem.hasAttribute("w16cex:dateUtc"):
-                self._ensure_w16cex_namespace()
+                ensure_namespace(self._ensure_w16cex_namespace)
                 elem.setAttribute("w16cex:dateUtc", timestamp)
 
-        def add_xml_space_to_t(elem):
+        def add_xml_space_to_t(elem, deleted):
             # Add xml:space="preserve" to w:t if text has leading/trailing whitespace
             if (
                 elem.firstChild
@@ -204,61 +256,42 @@ class DocxXMLEditor(XMLEditor):
                     if not elem.hasAttribute("xml:space"):
                         elem.setAttribute("xml:space", "preserve")
 
-        for node in nodes:
-            if node.nodeType != node.ELEMENT_NODE:
-                continue
-
-            # Handle the node itself
-            if node.tagName == "w:p":
-                add_rsid_to_p(node)
-            elif node.tagName == "w:r":
-                add_rsid_to_r(node)
-            elif node.tagName == "w:t":
-                add_xml_space_to_t(node)
-            elif node.tagName in ("w:ins", "w:del"):
-                add_tracked_change_attrs(node)
-            elif node.tagName == "w:comment":
-                add_comment_attrs(node)
-            elif node.tagName == "w16cex:commentExtensible":
-                add_comment_extensible_date(node)
-
-            # Process descendants (getElementsByTagName doesn't return the element itself)
-            for elem in node.getElementsByTagName("w:p"):
-                add_rsid_to_p(elem)
-            for elem in node.getElementsByTagName("w:r"):
-                add_rsid_to_r(elem)
-            for elem in node.getElementsByTagName("w:t"):
-                add_xml_space_to_t(elem)
-            for tag in ("w:ins", "w:del"):
-                for elem in node.getElementsByTagName(tag):
-                    add_tracked_change_attrs(elem)
-            for elem in node.getElementsByTagName("w:comment"):
-                add_comment_attrs(elem)
-            for elem in node.getElementsByTagName("w16cex:commentExtensible"):
-                add_comment_extensible_date(elem)
+        return {
+            "w:p": add_rsid_to_p,
+            "w:r": add_rsid_to_r,
+            "w:t": add_xml_space_to_t,
+            "w:ins": add_tracked_change_attrs,
+            "w:del": add_tracked_change_attrs,
+            "w:comment": add_comment_attrs,
+            "w16cex:commentExtensible": add_comment_extensible_date,
+        }
 
     def replace_node(self, elem, new_content):
         """Replace node with automatic attribute injection."""
-        nodes = super().replace_node(elem, new_content)
-        self._inject_attributes_to_nodes(nodes)
+        with self._node_index.editing():
+            nodes = super().replace_node(elem, new_content)
+            self._inject_attributes_to_nodes(nodes)
         return nodes
 
     def insert_after(self, elem, xml_content):
         """Insert after with automatic attribute injection."""
-        nodes = super().insert_after(elem, xml_content)
-        self._inject_attributes_to_nodes(nodes)
+        with self._node_index.editing():
+            nodes = super().insert_after(elem, xml_content)
+            self._inject_attributes_to_nodes(nodes)
         return nodes
 
     def insert_before(self, elem, xml_content):
         """Insert before with automatic attribute injection."""
-        nodes = super().insert_before(elem, xml_content)
-        self._inject_attributes_to_nodes(nodes)
+        with self._node_index.editing():
+            nodes = super().insert_before(elem, xml_content)
+            self._inject_attributes_to_nodes(nodes)
         return nodes
 
     def append_to(self, elem, xml_content):
         """Append to with automatic attribute injection."""
-        nodes = super().append_to(elem, xml_content)
-        self._inject_attributes_to_nodes(nodes)
+        with self._node_index.editing():
+            nodes = super().append_to(elem, xml_content)
+            self._inject_attributes_to_nodes(nodes)
         return nodes
 
     def revert_insertion(self, elem):
@@ -418,7 +451,7 @@ class DocxXMLEditor(XMLEditor):
                 ins_elem.appendChild(new_run)
 
             # Insert the new insertion after the deletion
-            nodes = self.insert_after(del_elem, ins_elem.toxml())
+            nodes = self.insert_after(del_elem, [ins_elem])
 
             # If processing a single w:del, track the created insertion
             if is_single_del and nodes:
@@ -604,6 +637,16 @@ def _generate_hex_id() -> str:
     return f"{random.randint(1, 0x7FFFFFFE):08X}"
 
 
+def _is_inside_deletion(elem) -> bool:
+    """Check if element is inside a w:del element."""
+    parent = elem.parentNode
+    while parent:
+        if parent.nodeType == parent.ELEMENT_NODE and parent.tagName == "w:del":
+            return True
+        parent = parent.parentNode
+    return False
+
+
 def _generate_rsid() -> str:
     """Generate random 8-character hex RSID."""
     return "".join(random.choices("0123456789ABCDEF", k=8))
@@ -619,6 +662,7 @@ class Document:
         track_revisions=False,
         author="Claude",
         initials="C",
+        backend="minidom",
     ):
         """
         Initialize with path to unpacked Word document directory.
@@ -630,20 +674,40 @@ class Document:
             track_revisions: If True, enables track revisions in settings.xml (default: False)
             author: Default author name for comments (default: "Claude")
             initials: Default author initials for comments (default: "C")
+            backend: Library the XML parts are edited with, "minidom" or "lxml"
+                (default: "minidom", see XMLEditor)
         """
         self.original_path = Path(unpacked_dir)
 
         if not self.original_path.exists() or not self.original_path.is_dir():
             raise ValueError(f"Directory not found: {unpacked_dir}")
 
-        # Create temporary directory with subdirectories for unpacked content and baseline
+        # Temporary directory with two copy-on-write overlays of the original
+        # directory (see package.DirectoryPackage), so nothing is copied up
+        # front: the workspace, which parts are copied into when first opened
+        # (see _checkout), and the validation baseline, which keeps the
+        # original version of the parts save() changes in the original
+        # directory (see _save_part)
         self.temp_dir = tempfile.mkdtemp(prefix="docx_")
         self.unpacked_path = Path(self.temp_dir) / "unpacked"
-        shutil.copytree(self.original_path, self.unpacked_path)
+        self.baseline_path = Path(self.temp_dir) / "original"
+        for overlay in (self.unpacked_path, self.baseline_path):
+            overlay.mkdir()
+            write_manifest(
+                overlay,
+                {
+                    "source": None,
+                    "base": str(self.original_path.resolve()),
+                    "parts": {},
+                    "deleted": [],
+                },
+            )
 
-        # Pack original directory into temporary .docx for validation baseline (outside unpacked dir)
-        self.original_docx = Path(self.temp_dir) / "original.docx"
-        pack_document(self.original_path, self.original_docx, validate=False)
+        # Part name -> SHA-256 of its content in the original directory, for
+        # the parts copied into the workspace (None if it has no such part)
+        self._original_digests = {}
+        for xml_path in DOCUMENT_PARTS:
+            self._checkout(xml_path)
 
         self.word_path = self.unpacked_path / "word"
 
@@ -654,10 +718,15 @@ class Document:
         # Set default author and initials
         self.author = author
         self.initials = initials
+        self.backend = backend
 
         # Cache for lazy-loaded editors
         self._editors = {}
 
+        # Per-part results of earlier validations, so later saves only
+        # re-check the parts that changed
+        self._validation_snapshot = ValidationSnapshot()
+
         # Comment file paths
         self.comments_path = self.word_path / "comments.xml"
         self.comments_extended_path = self.word_path / "commentsExtended.xml"
@@ -690,6 +759,10 @@ class Document:
         Returns:
             DocxXMLEditor instance for the specified file
 
+        The part is copied from the original directory into the workspace on
+        first access (and unpacked there first if the directory was unpacked
+        lazily and the part is still in the source archive).
+
         Raises:
             ValueError: If the file does not exist
 
@@ -701,12 +774,16 @@ class Document:
             comment = doc["word/comments.xml"].get_node(tag="w:comment", attrs={"w:id": "0"})
         """
         if xml_path not in self._editors:
-            file_path = self.unpacked_path / xml_path
+            file_path = self._checkout(xml_path)
             if not file_path.exists():
                 raise ValueError(f"XML file not found: {xml_path}")
             # Use DocxXMLEditor with RSID, author, and initials for all editors
             self._editors[xml_path] = DocxXMLEditor(
-                file_path, rsid=self.rsid, author=self.author, initials=self.initials
+                file_path,
+                rsid=self.rsid,
+                author=self.author,
+                initials=self.initials,
+                backend=self.backend,
             )
         return self._editors[xml_path]
 
@@ -730,31 +807,13 @@ class Document:
         comment_id = self.next_comment_id
         para_id = _generate_hex_id()
         durable_id = _generate_hex_id()
-        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
         # Add comment ranges to document.xml immediately
-        self._document.insert_before(start, self._comment_range_start_xml(comment_id))
+        self._insert_comment_ranges(comment_id, start, end)
 
-        # If end node is a paragraph, append comment markup inside it
-        # Otherwise insert after it (for run-level anchors)
-        if end.tagName == "w:p":
-            self._document.append_to(end, self._comment_range_end_xml(comment_id))
-        else:
-            self._document.insert_after(end, self._comment_range_end_xml(comment_id))
-
-        # Add to comments.xml immediately
-        self._add_to_comments_xml(
-            comment_id, para_id, text, self.author, self.initials, timestamp
-        )
-
-        # Add to commentsExtended.xml immediately
-        self._add_to_comments_extended_xml(para_id, parent_para_id=None)
-
-        # Add to commentsIds.xml immediately
-        self._add_to_comments_ids_xml(para_id, durable_id)
-
-        # Add to commentsExtensible.xml immediately
-        self._add_to_comments_extensible_xml(durable_id)
+        # Add to comments.xml, commentsExtended.xml, commentsIds.xml and
+        # commentsExtensible.xml immediately
+        self._add_comment_entries([(comment_id, para_id, durable_id, text, None)])
 
         # Update existing_comments so replies work
         self.existing_comments[comment_id] = {"para_id": para_id}
@@ -787,7 +846,6 @@ class Document:
         comment_id = self.next_comment_id
         para_id = _generate_hex_id()
         durable_id = _generate_hex_id()
-        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
         # Add comment ranges to document.xml immediately
         parent_start_elem = self._document.get_node(
@@ -796,40 +854,53 @@ class Document:
         parent_ref_elem = self._document.get_node(
             tag="w:commentReference", attrs={"w:id": str(parent_comment_id)}
         )
-
-        self._document.insert_after(
-            parent_start_elem, self._comment_range_start_xml(comment_id)
-        )
-        parent_ref_run = parent_ref_elem.parentNode
-        self._document.insert_after(
-            parent_ref_run, f'<w:commentRangeEnd w:id="{comment_id}"/>'
-        )
-        self._document.insert_after(
-            parent_ref_run, self._comment_ref_run_xml(comment_id)
+        self._insert_reply_ranges(
+            comment_id, parent_start_elem, parent_ref_elem.parentNode
         )
 
-        # Add to comments.xml immediately
-        self._add_to_comments_xml(
-            comment_id, para_id, text, self.author, self.initials, timestamp
+        # Add to comments.xml, commentsExtended.xml (with parent), commentsIds.xml
+        # and commentsExtensible.xml immediately
+        self._add_comment_entries(
+            [(comment_id, para_id, durable_id, text, parent_info["para_id"])]
         )
 
-        # Add to commentsExtended.xml immediately (with parent)
-        self._add_to_comments_extended_xml(
-            para_id, parent_para_id=parent_info["para_id"]
-        )
-
-        # Add to commentsIds.xml immediately
-        self._add_to_comments_ids_xml(para_id, durable_id)
-
-        # Add to commentsExtensible.xml immediately
-        self._add_to_comments_extensible_xml(durable_id)
-
         # Update existing_comments so replies work
         self.existing_comments[comment_id] = {"para_id": para_id}
 
         self.next_comment_id += 1
         return comment_id
 
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Queue edits of word/document.xml and apply them together when the block ends.
+
+        Comments, replies, tracked changes and insertions are queued on the
+        returned DocumentBatch. At the end of the block, word/document.xml is
+        walked once to order the queued edits and find the comments replied
+        to. The edits are then applied in document order, and the new
+        comments are added to each comment part in one edit. If the block
+        raises, nothing is applied.
+
+        Yields:
+            DocumentBatch: Queue of edits, with the methods of the same name
+                on Document and DocxXMLEditor
+
+        Example:
+            with doc.batch() as batch:
+                for para in paragraphs:
+                    comment_id = batch.add_comment(start=para, end=para, text="Check")
+                    batch.reply_to_comment(parent_comment_id=comment_id, text="Done")
+                batch.suggest_deletion(run)
+        """
+        batch = DocumentBatch(self)
+        try:
+            yield batch
+        except BaseException:
+            batch.discard()
+            raise
+        batch.apply()
+
     def __del__(self):
         """Clean up temporary directory on deletion."""
         if hasattr(self, "temp_dir") and Path(self.temp_dir).exists():
@@ -844,10 +915,13 @@ class Document:
         """
         # Create validators with current state
         schema_validator = DOCXSchemaValidator(
-            self.unpacked_path, self.original_docx, verbose=False
+            self.unpacked_path,
+            self.baseline_path,
+            verbose=False,
+            snapshot=self._validation_snapshot,
         )
         redlining_validator = RedliningValidator(
-            self.unpacked_path, self.original_docx, verbose=False
+            self.unpacked_path, self.baseline_path, verbose=False
         )
 
         # Run validations
@@ -879,9 +953,67 @@ class Document:
         if validate:
             self.validate()
 
-        # Copy contents from temp directory to destination (or original directory)
+        # Copy the parts in the workspace to the original directory, or to
+        # destination after the parts that were never opened
         target_path = Path(destination) if destination else self.original_path
-        shutil.copytree(self.unpacked_path, target_path, dirs_exist_ok=True)
+        in_place = target_path.resolve() == self.original_path.resolve()
+        if not in_place:
+            shutil.copytree(self.original_path, target_path, dirs_exist_ok=True)
+        for file_path in sorted(self.unpacked_path.rglob("*")):
+            if file_path.is_file() and file_path.name != MANIFEST_NAME:
+                xml_path = file_path.relative_to(self.unpacked_path).as_posix()
+                self._save_part(xml_path, target_path, in_place)
+
+    # ==================== Private: Workspace ====================
+
+    def _checkout(self, xml_path):
+        """Return the path of a part in the workspace, copying it there from the
+        original directory on first use.
+
+        The path does not exist if the document has no such part.
+        """
+        file_path = self.unpacked_path / xml_path
+        if xml_path not in self._original_digests and not file_path.exists():
+            unpack_parts(self.original_path, [xml_path])
+            original_file = self.original_path / xml_path
+            digest = None
+            if original_file.is_file():
+                data = original_file.read_bytes()
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                file_path.write_bytes(data)
+                digest = hashlib.sha256(data).hexdigest()
+            self._original_digests[xml_path] = digest
+        return file_path
+
+    def _save_part(self, xml_path, target_path, in_place):
+        """Write a part of the workspace to target_path, unless it is unchanged.
+
+        A part is unchanged if it has the digest recorded for the original
+        directory. Before a part of the original directory is first changed,
+        its original version is copied to the validation baseline (or, if
+        the part is new, listed there as deleted).
+        """
+        data = (self.unpacked_path / xml_path).read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest == self._original_digests.get(xml_path):
+            return
+
+        if in_place:
+            manifest = read_manifest(self.baseline_path)
+            baseline_file = self.baseline_path / xml_path
+            original_file = self.original_path / xml_path
+            if not baseline_file.exists() and xml_path not in manifest["deleted"]:
+                if original_file.is_file():
+                    baseline_file.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copyfile(original_file, baseline_file)
+                else:
+                    manifest["deleted"].append(xml_path)
+                    write_manifest(self.baseline_path, manifest)
+            self._original_digests[xml_path] = digest
+
+        target_file = target_path / xml_path
+        target_file.parent.mkdir(parents=True, exist_ok=True)
+        target_file.write_bytes(data)
 
     # ==================== Private: Initialization ====================
 
@@ -1065,95 +1197,161 @@ class Document:
 
     # ==================== Private: XML File Creation ====================
 
-    def _add_to_comments_xml(
-        self, comment_id, para_id, text, author, initials, timestamp
-    ):
-        """Add a single comment to comments.xml."""
-        if not self.comments_path.exists():
-            shutil.copy(TEMPLATE_DIR / "comments.xml", self.comments_path)
+    def _insert_comment_ranges(self, comment_id, start, end):
+        """Mark a comment's range in document.xml, from start to end.
 
-        editor = self["word/comments.xml"]
-        root = editor.get_node(tag="w:comments")
+        Returns:
+            tuple: The w:commentRangeStart element and the run holding the
+                w:commentReference, where replies are anchored
+        """
+        range_start = self._document.insert_before(
+            start, self._comment_range_start_nodes(comment_id)
+        )[0]
 
-        escaped_text = (
-            text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        # If end node is a paragraph, append comment markup inside it
+        # Otherwise insert after it (for run-level anchors)
+        if end.tagName == "w:p":
+            nodes = self._document.append_to(
+                end, self._comment_range_end_nodes(comment_id)
+            )
+        else:
+            nodes = self._document.insert_after(
+                end, self._comment_range_end_nodes(comment_id)
+            )
+        ref_run = next(
+            node
+            for node in nodes
+            if node.nodeType == node.ELEMENT_NODE and node.tagName == "w:r"
+        )
+        return range_start, ref_run
+
+    def _insert_reply_ranges(self, comment_id, parent_start_elem, parent_ref_run):
+        """Mark a reply's range in document.xml, inside its parent's range.
+
+        Returns:
+            tuple: As for _insert_comment_ranges
+        """
+        range_start = self._document.insert_after(
+            parent_start_elem, self._comment_range_start_nodes(comment_id)
+        )[0]
+        self._document.insert_after(
+            parent_ref_run,
+            self._comment_nodes('<w:commentRangeEnd w:id=""/>', comment_id),
         )
+        nodes = self._document.insert_after(
+            parent_ref_run, self._comment_ref_run_nodes(comment_id)
+        )
+        return range_start, nodes[0]
+
+    def _add_comment_entries(self, comments):
+        """Add comments to the four comment parts, with one edit per part.
+
+        Args:
+            comments: List of (comment_id, para_id, durable_id, text,
+                parent_para_id) tuples; parent_para_id is None for a comment
+                that is not a reply
+        """
         # Note: w:rsidR, w:rsidRDefault, w:rsidP on w:p, w:rsidR on w:r,
         # and w:author, w:date, w:initials on w:comment are automatically added by DocxXMLEditor
-        comment_xml = f'''<w:comment w:id="{comment_id}">
+        comments_xml = []
+        extended_xml = []
+        ids_xml = []
+        extensible_xml = []
+        for comment_id, para_id, durable_id, text, parent_para_id in comments:
+            escaped_text = (
+                text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+            )
+            comments_xml.append(f'''<w:comment w:id="{comment_id}">
   <w:p w14:paraId="{para_id}" w14:textId="77777777">
     <w:r><w:rPr><w:rStyle w:val="CommentReference"/></w:rPr><w:annotationRef/></w:r>
     <w:r><w:rPr><w:color w:val="000000"/><w:sz w:val="20"/><w:szCs w:val="20"/></w:rPr><w:t>{escaped_text}</w:t></w:r>
   </w:p>
-</w:comment>'''
-        editor.append_to(root, comment_xml)
-
-    def _add_to_comments_extended_xml(self, para_id, parent_para_id):
-        """Add a single comment to commentsExtended.xml."""
-        if not self.comments_extended_path.exists():
-            shutil.copy(
-                TEMPLATE_DIR / "commentsExtended.xml", self.comments_extended_path
+</w:comment>''')
+            if parent_para_id:
+                extended_xml.append(
+                    f'<w15:commentEx w15:paraId="{para_id}" w15:paraIdParent="{parent_para_id}" w15:done="0"/>'
+                )
+            else:
+                extended_xml.append(
+                    f'<w15:commentEx w15:paraId="{para_id}" w15:done="0"/>'
+                )
+            ids_xml.append(
+                f'<w16cid:commentId w16cid:paraId="{para_id}" w16cid:durableId="{durable_id}"/>'
             )
-
-        editor = self["word/commentsExtended.xml"]
-        root = editor.get_node(tag="w15:commentsEx")
-
-        if parent_para_id:
-            xml = f'<w15:commentEx w15:paraId="{para_id}" w15:paraIdParent="{parent_para_id}" w15:done="0"/>'
-        else:
-            xml = f'<w15:commentEx w15:paraId="{para_id}" w15:done="0"/>'
-        editor.append_to(root, xml)
-
-    def _add_to_comments_ids_xml(self, para_id, durable_id):
-        """Add a single comment to commentsIds.xml."""
-        if not self.comments_ids_path.exists():
-            shutil.copy(TEMPLATE_DIR / "commentsIds.xml", self.comments_ids_path)
-
-        editor = self["word/commentsIds.xml"]
-        root = editor.get_node(tag="w16cid:commentsIds")
-
-        xml = f'<w16cid:commentId w16cid:paraId="{para_id}" w16cid:durableId="{durable_id}"/>'
-        editor.append_to(root, xml)
-
-    def _add_to_comments_extensible_xml(self, durable_id):
-        """Add a single comment to commentsExtensible.xml."""
-        if not self.comments_extensible_path.exists():
-            shutil.copy(
-                TEMPLATE_DIR / "commentsExtensible.xml", self.comments_extensible_path
+            extensible_xml.append(
+                f'<w16cex:commentExtensible w16cex:durableId="{durable_id}"/>'
             )
 
-        editor = self["word/commentsExtensible.xml"]
-        root = editor.get_node(tag="w16cex:commentsExtensible")
+        self._append_to_comment_part(self.comments_path, "w:comments", comments_xml)
+        self._append_to_comment_part(
+            self.comments_extended_path, "w15:commentsEx", extended_xml
+        )
+        self._append_to_comment_part(
+            self.comments_ids_path, "w16cid:commentsIds", ids_xml
+        )
+        self._append_to_comment_part(
+            self.comments_extensible_path, "w16cex:commentsExtensible", extensible_xml
+        )
+
+    def _append_to_comment_part(self, path, root_tag, entries):
+        """Append XML entries to the root of a comment part, created if needed."""
+        if not entries:
+            return
+        if not path.exists():
+            # Copy from template
+            shutil.copy(TEMPLATE_DIR / path.name, path)
 
-        xml = f'<w16cex:commentExtensible w16cex:durableId="{durable_id}"/>'
-        editor.append_to(root, xml)
+        editor = self[path.relative_to(self.unpacked_path).as_posix()]
+        root = editor.get_node(tag=root_tag)
+        editor.append_to(root, "\n".join(entries))
 
     # ==================== Private: XML Fragments ====================
 
-    def _comment_range_start_xml(self, comment_id):
-        """Generate XML for comment range start."""
-        return f'<w:commentRangeStart w:id="{comment_id}"/>'
+    def _comment_range_start_nodes(self, comment_id):
+        """Generate nodes for comment range start."""
+        return self._comment_nodes('<w:commentRangeStart w:id=""/>', comment_id)
 
-    def _comment_range_end_xml(self, comment_id):
-        """Generate XML for comment range end with reference run.
+    def _comment_range_end_nodes(self, comment_id):
+        """Generate nodes for comment range end with reference run.
 
         Note: w:rsidR is automatically added by DocxXMLEditor.
         """
-        return f'''<w:commentRangeEnd w:id="{comment_id}"/>
+        return self._comment_nodes(
+            """<w:commentRangeEnd w:id=""/>
 <w:r>
   <w:rPr><w:rStyle w:val="CommentReference"/></w:rPr>
-  <w:commentReference w:id="{comment_id}"/>
-</w:r>'''
+  <w:commentReference w:id=""/>
+</w:r>""",
+            comment_id,
+        )
 
-    def _comment_ref_run_xml(self, comment_id):
-        """Generate XML for comment reference run.
+    def _comment_ref_run_nodes(self, comment_id):
+        """Generate nodes for comment reference run.
 
         Note: w:rsidR is automatically added by DocxXMLEditor.
         """
-        return f'''<w:r>
+        return self._comment_nodes(
+            """<w:r>
   <w:rPr><w:rStyle w:val="CommentReference"/></w:rPr>
-  <w:commentReference w:id="{comment_id}"/>
-</w:r>'''
+  <w:commentReference w:id=""/>
+</w:r>""",
+            comment_id,
+        )
+
+    def _comment_nodes(self, template, comment_id):
+        """Copy comment markup for document.xml, with w:id set to comment_id.
+
+        The template has no ID, so document.xml's editor parses it only once
+        (see XMLEditor._parse_fragment).
+        """
+        nodes = self._document._parse_fragment(template)
+        for node in nodes:
+            if node.nodeType != node.ELEMENT_NODE:
+                continue
+            for elem in [node, *node.getElementsByTagName("*")]:
+                if elem.hasAttribute("w:id"):
+                    elem.setAttribute("w:id", str(comment_id))
+        return nodes
 
     # ==================== Private: Metadata Updates ====================
 
@@ -1274,3 +1472,187 @@ class Document:
                 f'<Override PartName="{part_name}" ContentType="{content_type}"/>'
             )
             editor.append_to(root, override_xml)
+
+
+class DocumentBatch:
+    """Edits of word/document.xml queued by Document.batch().
+
+    Comments and replies get their IDs when they are queued, so replies can
+    answer comments of the same batch. The other methods return nothing, as
+    their nodes only exist once the batch is applied. Elements passed in must
+    be in word/document.xml when the batch is applied.
+    """
+
+    def __init__(self, document):
+        self.document = document
+        self._first_comment_id = document.next_comment_id
+        # (anchor, apply) in queue order; the anchor is the element the edit
+        # is ordered by, or the ID of an existing comment whose range start is
+        self._edits = []
+        # Entries of the queued comments (see Document._add_comment_entries)
+        self._comments = []
+        # Comment ID -> anchor, for the queued comments and replies
+        self._anchors = {}
+        # Comment ID -> (w:commentRangeStart, reference run) of the comments
+        # replied to, found or inserted when the batch is applied
+        self._ranges = {}
+
+    def add_comment(self, start, end, text: str) -> int:
+        """Queue a comment spanning from one element to another (see Document.add_comment).
+
+        Returns:
+            The comment ID that will be created
+        """
+        document = self.document
+        comment_id = self._queue_comment(text, None)
+
+        def apply():
+            self._ranges[comment_id] = document._insert_comment_ranges(
+                comment_id, start, end
+            )
+
+        self._anchors[comment_id] = start
+        self._edits.append((start, apply))
+        return comment_id
+
+    def reply_to_comment(self, parent_comment_id: int, text: str) -> int:
+        """Queue a reply to an existing or queued comment (see Document.reply_to_comment).
+
+        Returns:
+            The comment ID that will be created for the reply
+
+        Raises:
+            ValueError: If the parent comment does not exist
+        """
+        document = self.document
+        if parent_comment_id not in document.existing_comments:
+            raise ValueError(f"Parent comment with id={parent_comment_id} not found")
+
+        parent_info = document.existing_comments[parent_comment_id]
+        comment_id = self._queue_comment(text, parent_info["para_id"])
+
+        def apply():
+            parent_start_elem, parent_ref_run = self._ranges[parent_comment_id]
+            self._ranges[comment_id] = document._insert_reply_ranges(
+                comment_id, parent_start_elem, parent_ref_run
+            )
+
+        anchor = self._anchors.get(parent_comment_id, parent_comment_id)
+        self._anchors[comment_id] = anchor
+        self._edits.append((anchor, apply))
+        return comment_id
+
+    def suggest_deletion(self, elem):
+        """Queue DocxXMLEditor.suggest_deletion(elem)."""
+        self._queue(elem, self.document._document.suggest_deletion, elem)
+
+    def revert_insertion(self, elem):
+        """Queue DocxXMLEditor.revert_insertion(elem)."""
+        self._queue(elem, self.document._document.revert_insertion, elem)
+
+    def revert_deletion(self, elem):
+        """Queue DocxXMLEditor.revert_deletion(elem)."""
+        self._queue(elem, self.document._document.revert_deletion, elem)
+
+    def insert_after(self, elem, xml_content):
+        """Queue DocxXMLEditor.insert_after(elem, xml_content)."""
+        self._queue(elem, self.document._document.insert_after, elem, xml_content)
+
+    def insert_before(self, elem, xml_content):
+        """Queue DocxXMLEditor.insert_before(elem, xml_content)."""
+        self._queue(elem, self.document._document.insert_before, elem, xml_content)
+
+    def append_to(self, elem, xml_content):
+        """Queue DocxXMLEditor.append_to(elem, xml_content)."""
+        self._queue(elem, self.document._document.append_to, elem, xml_content)
+
+    def apply(self):
+        """Apply the queued edits in document order.
+
+        Edits at the same element are applied in the order they were queued.
+        If an element is not found, the queue is discarded and nothing is
+        applied. If an edit fails, the edits before it stay applied, with the
+        comment parts updated for the comments among them.
+
+        Raises:
+            ValueError: If an element is not in word/document.xml, or the
+                range of a comment replied to is not found
+        """
+        document = self.document
+        existing = {a for a, _ in self._edits if isinstance(a, int)}
+        anchors = {a for a, _ in self._edits if not isinstance(a, int)}
+
+        # One walk over document.xml: the position of every anchor, and the
+        # range of every existing comment replied to
+        positions = {}
+        range_starts = {}
+        references = {}
+        for position, elem in enumerate(
+            document._document.dom.getElementsByTagName("*")
+        ):
+            if elem in anchors:
+                positions[elem] = position
+                if not existing and len(positions) == len(anchors):
+                    break
+            if existing:
+                tag = elem.tagName
+                if tag == "w:commentRangeStart":
+                    range_starts.setdefault(elem.getAttribute("w:id"), (position, elem))
+                elif tag == "w:commentReference":
+                    references.setdefault(elem.getAttribute("w:id"), elem)
+
+        for comment_id in existing:
+            key = str(comment_id)
+            if key not in range_starts or key not in references:
+                self.discard()
+                raise ValueError(
+                    f"Range of comment id={comment_id} not found in word/document.xml"
+                )
+            positions[comment_id], range_start = range_starts[key]
+            self._ranges[comment_id] = (range_start, references[key].parentNode)
+        if len(positions) < len(anchors) + len(existing):
+            self.discard()
+            raise ValueError("Element to edit is not in word/document.xml")
+
+        order = sorted(
+            range(len(self._edits)),
+            key=lambda i: (positions[self._edits[i][0]], i),
+        )
+        try:
+            for i in order:
+                self._edits[i][1]()
+        finally:
+            applied = []
+            for entry in self._comments:
+                if entry[0] in self._ranges:
+                    applied.append(entry)
+                else:
+                    document.existing_comments.pop(entry[0], None)
+            document._add_comment_entries(applied)
+            self._edits, self._comments = [], []
+
+    def discard(self):
+        """Drop the queued edits, freeing the comment IDs they were given."""
+        document = self.document
+        for entry in self._comments:
+            document.existing_comments.pop(entry[0], None)
+        if document.next_comment_id == self._first_comment_id + len(self._comments):
+            document.next_comment_id = self._first_comment_id
+        self._edits, self._comments = [], []
+
+    def _queue_comment(self, text, parent_para_id):
+        """Give a queued comment its IDs and record its comment part entries."""
+        document = self.document
+        comment_id = document.next_comment_id
+        para_id = _generate_hex_id()
+        durable_id = _generate_hex_id()
+        self._comments.append((comment_id, para_id, durable_id, text, parent_para_id))
+
+        # Update existing_comments so replies work
+        document.existing_comments[comment_id] = {"para_id": para_id}
+        document.next_comment_id += 1
+        return comment_id
+
+    def _queue(self, elem, edit, *args):
+        """Queue an edit at elem."""
+        self._edits.append((elem, functools.partial(edit, *args)))
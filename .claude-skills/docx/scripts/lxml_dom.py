@@ -0,0 +1,670 @@
+#!/usr/bin/env python3
+"""
+minidom-compatible documents backed by lxml, used by XMLEditor(backend="lxml").
+
+An lxml tree takes a fraction of the memory of a minidom tree, and is parsed
+and serialized in C. The element classes here give lxml elements the part of
+the minidom API used by XMLEditor, DocxXMLEditor and Document (tagName,
+getAttribute, childNodes, insertBefore, ...), so the same code runs on either
+tree. Elements keep the whole lxml API as well.
+
+Differences from minidom:
+    - lxml holds text as the text and tail of elements. childNodes and
+      firstChild return Text objects standing for it; moving one moves the
+      text, and text moved next to other text is merged with it.
+    - The text after an element (its tail) moves with it. Whitespace-only
+      tails, the indentation between elements of pretty-printed XML, are not
+      listed in childNodes.
+    - Elements only have a line, from lxml's sourceline: parse_position is
+      (line, None), and is missing on elements that were not parsed from the
+      file. The line of a start tag written over several lines is the one it
+      ends on, where minidom gives the one it starts on.
+    - toxml() writes the namespace declarations of an element before its
+      other attributes; the minidom of XMLEditor writes them after.
+    - Namespace declarations are not attributes: getAttribute("xmlns:w")
+      returns the URI of the prefix in scope, and setAttribute("xmlns:w", uri)
+      declares it.
+    - Changes made with lxml's own API (append(), set(), .text, ...) are not
+      noticed by the node index of XMLEditor; use the DOM methods.
+
+Example usage:
+    dom = parse("document.xml")
+    body = dom.getElementsByTagName("w:body")[0]
+    body.appendChild(dom.createElement("w:p"))
+    data = dom.toxml(encoding="utf-8")
+"""
+
+import copy
+import re
+import weakref
+import xml.dom
+from xml.dom import Node
+
+from lxml import etree
+
+XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
+
+# Root element -> LxmlDocument, to notice changes to the tree of a document
+_documents = weakref.WeakValueDictionary()
+
+# Namespace declarations of a serialized element, which lxml writes before
+# its attributes
+_DECLARATIONS = re.compile(r'<[^\s/>]+((?:\s+xmlns(?::[^\s=]+)?="[^"]*")*)')
+_DECLARATION = re.compile(r'\s+xmlns(?::([^\s=]+))?="[^"]*"')
+
+
+def parse(xml_path):
+    """Parse an XML file into an LxmlDocument."""
+    return LxmlDocument(etree.parse(str(xml_path), _parser()))
+
+
+def namespace_declarations(document):
+    """Return the namespace declarations in scope on the root element as XML."""
+    return " ".join(
+        f'xmlns:{prefix}="{uri}"' if prefix else f'xmlns="{uri}"'
+        for prefix, uri in document.documentElement.nsmap.items()
+    )
+
+
+def parse_fragment(document, xml_content, declarations=None):
+    """
+    Parse XML content in the namespaces of a document's root element.
+
+    Args:
+        document: LxmlDocument the nodes are for
+        xml_content: String containing XML fragment
+        declarations: Namespace declarations to parse the content with
+            (default: namespace_declarations(document))
+
+    Returns:
+        list: The top-level nodes of the fragment, not yet in the document.
+            Whitespace between them is kept as the tail of the node before
+            it and is not listed.
+    """
+    if declarations is None:
+        declarations = namespace_declarations(document)
+    wrapper = etree.fromstring(f"<root {declarations}>{xml_content}</root>", _parser())
+    for node in wrapper.iter():
+        node.sourceline = 0  # Not from the edited file: no line
+    if wrapper.text and not wrapper.text.strip():
+        wrapper.text = None
+    return wrapper.childNodes
+
+
+def copy_fragment(nodes):
+    """Return deep copies of nodes from parse_fragment(), with their tails."""
+    return [
+        Text(node.data) if isinstance(node, Text) else copy.deepcopy(node)
+        for node in nodes
+    ]
+
+
+def _parser():
+    # Entities are not expanded and nothing is fetched from the network
+    parser = etree.XMLParser(resolve_entities=False, no_network=True, load_dtd=False)
+    parser.set_element_class_lookup(
+        etree.ElementDefaultClassLookup(
+            element=LxmlElement,
+            comment=LxmlComment,
+            pi=LxmlProcessingInstruction,
+            entity=LxmlEntityReference,
+        )
+    )
+    return parser
+
+
+def _changed(node):
+    """Clear the ID cache of the document holding node, as minidom does.
+
+    The root is found in C: this runs for every attribute set. A detached
+    node may clear the cache of the document it came from, which is harmless.
+    """
+    document = _documents.get(node.getroottree().getroot())
+    if document is not None:
+        document._id_cache.clear()
+
+
+class _DOMNode:
+    """Node type constants of xml.dom.Node."""
+
+    ELEMENT_NODE = Node.ELEMENT_NODE
+    ATTRIBUTE_NODE = Node.ATTRIBUTE_NODE
+    TEXT_NODE = Node.TEXT_NODE
+    CDATA_SECTION_NODE = Node.CDATA_SECTION_NODE
+    ENTITY_REFERENCE_NODE = Node.ENTITY_REFERENCE_NODE
+    ENTITY_NODE = Node.ENTITY_NODE
+    PROCESSING_INSTRUCTION_NODE = Node.PROCESSING_INSTRUCTION_NODE
+    COMMENT_NODE = Node.COMMENT_NODE
+    DOCUMENT_NODE = Node.DOCUMENT_NODE
+    DOCUMENT_TYPE_NODE = Node.DOCUMENT_TYPE_NODE
+    DOCUMENT_FRAGMENT_NODE = Node.DOCUMENT_FRAGMENT_NODE
+    NOTATION_NODE = Node.NOTATION_NODE
+
+
+class _ChildNode(_DOMNode):
+    """DOM navigation of lxml nodes (elements, comments, ...)."""
+
+    def __bool__(self):
+        # DOM nodes are true; lxml elements are false if they have no children
+        return True
+
+    @property
+    def parentNode(self):
+        parent = self.getparent()
+        if parent is None:
+            return _documents.get(self)  # The document of a root element
+        return parent
+
+    @property
+    def ownerDocument(self):
+        top = self
+        for top in self.iterancestors():
+            pass
+        return _documents.get(top)
+
+    @property
+    def nextSibling(self):
+        if _visible_tail(self):
+            return Text(None, self, tail=True)
+        return self.getnext()
+
+    @property
+    def previousSibling(self):
+        previous = self.getprevious()
+        if previous is not None:
+            return (
+                Text(None, previous, tail=True) if _visible_tail(previous) else previous
+            )
+        parent = self.getparent()
+        if parent is not None and parent.text:
+            return Text(None, parent)
+        return None
+
+    def cloneNode(self, deep=False):
+        if deep or not isinstance(self, LxmlElement):
+            clone = copy.deepcopy(self)
+            for node in clone.iter():
+                node.sourceline = 0
+        else:
+            clone = self.makeelement(self.tag, self.attrib, nsmap=self.nsmap)
+        clone.tail = None
+        return clone
+
+    def toxml(self, encoding=None):
+        return etree.tostring(self, encoding=encoding or "unicode", with_tail=False)
+
+
+class LxmlElement(_ChildNode, etree.ElementBase):
+    """lxml element with the minidom Element API."""
+
+    nodeType = Node.ELEMENT_NODE
+    nodeValue = None
+
+    @property
+    def tagName(self):
+        tag = self.tag
+        local = tag[tag.find("}") + 1 :]
+        prefix = self.prefix
+        return f"{prefix}:{local}" if prefix else local
+
+    nodeName = tagName
+
+    @property
+    def localName(self):
+        return etree.QName(self).localname
+
+    @property
+    def namespaceURI(self):
+        return etree.QName(self).namespace
+
+    @property
+    def parse_position(self):
+        """(line, None): lxml does not keep columns."""
+        line = self.sourceline
+        if line is None:
+            raise AttributeError("parse_position")
+        return (line, None)
+
+    # ---- Attributes ----
+
+    @property
+    def attributes(self):
+        return _Attributes(self)
+
+    def getAttribute(self, name):
+        if name == "xmlns" or name.startswith("xmlns:"):
+            return self.nsmap.get(name[6:] or None, "")
+        key = self._attribute_key(name)
+        return "" if key is None else self.get(key, "")
+
+    def hasAttribute(self, name):
+        if name == "xmlns" or name.startswith("xmlns:"):
+            return (name[6:] or None) in self.nsmap
+        key = self._attribute_key(name)
+        return key is not None and key in self.attrib
+
+    def setAttribute(self, name, value):
+        if name == "xmlns" or name.startswith("xmlns:"):
+            self._declare_namespace(name[6:] or None, value)
+        else:
+            key = self._attribute_key(name)
+            if key is None:
+                raise ValueError(f"Namespace prefix of {name} is not declared")
+            self.set(key, value)
+        _changed(self)
+
+    def removeAttribute(self, name):
+        key = self._attribute_key(name)
+        if key is None or key not in self.attrib:
+            raise xml.dom.NotFoundErr(name)
+        del self.attrib[key]
+        _changed(self)
+
+    def _attribute_key(self, name):
+        """Return the lxml name of an attribute, None if its prefix is unknown."""
+        prefix, _, local = name.rpartition(":")
+        if not prefix:
+            return local
+        if prefix == "xml":
+            return f"{{{XML_NAMESPACE}}}{local}"
+        if prefix == self.prefix:  # Most attributes share the prefix of their element
+            return self.tag[: self.tag.find("}") + 1] + local
+        uri = self.nsmap.get(prefix)
+        return None if uri is None else f"{{{uri}}}{local}"
+
+    def _qualified_name(self, key, nsmap=None):
+        """Return prefix:local for an lxml attribute name."""
+        if key[0] != "{":
+            return key
+        uri, local = key[1:].split("}", 1)
+        if uri == XML_NAMESPACE:
+            return f"xml:{local}"
+        for prefix, prefix_uri in (nsmap or self.nsmap).items():
+            if prefix_uri == uri and prefix:
+                return f"{prefix}:{local}"
+        return local
+
+    def _declare_namespace(self, prefix, uri):
+        if self.nsmap.get(prefix) == uri:
+            return
+        # cleanup_namespaces() would also drop declarations it sees as unused,
+        # such as those only named in mc:Ignorable
+        keep = {prefix}
+        keep.update(p for _, (p, _) in etree.iterwalk(self, events=("start-ns",)) if p)
+        etree.cleanup_namespaces(self, top_nsmap={prefix: uri}, keep_ns_prefixes=keep)
+        if self.nsmap.get(prefix) != uri:
+            raise ValueError(f"Cannot declare namespace prefix {prefix} for {uri}")
+
+    # ---- Children ----
+
+    @property
+    def childNodes(self):
+        nodes = [Text(None, self)] if self.text else []
+        for child in self:
+            nodes.append(child)
+            if _visible_tail(child):
+                nodes.append(Text(None, child, tail=True))
+        return nodes
+
+    @property
+    def firstChild(self):
+        if self.text:
+            return Text(None, self)
+        return self[0] if len(self) else None
+
+    @property
+    def lastChild(self):
+        if not len(self):
+            return Text(None, self) if self.text else None
+        last = self[-1]
+        return Text(None, last, tail=True) if _visible_tail(last) else last
+
+    def hasChildNodes(self):
+        return bool(self.text) or len(self) > 0
+
+    def toxml(self, encoding=None):
+        """Serialize the element with the namespace declarations made on it.
+
+        lxml declares every namespace in scope on the element it serializes;
+        minidom only writes the xmlns attributes of the element, so the
+        declarations already in scope on its parent are left out.
+        """
+        xml = etree.tostring(self, encoding="unicode", with_tail=False)
+        parent = self.getparent()
+        if parent is not None:
+            parent_nsmap = parent.nsmap
+            inherited = {
+                prefix
+                for prefix, uri in self.nsmap.items()
+                if parent_nsmap.get(prefix) == uri
+            }
+            if inherited:
+                match = _DECLARATIONS.match(xml)
+                declarations = "".join(
+                    declaration.group(0)
+                    for declaration in _DECLARATION.finditer(match.group(1))
+                    if declaration.group(1) not in inherited
+                )
+                xml = xml[: match.start(1)] + declarations + xml[match.end(1) :]
+        return xml.encode(encoding, "xmlcharrefreplace") if encoding else xml
+
+    def getElementsByTagName(self, name):
+        """Return the descendants with a tag name (prefix:local), or all for "*"."""
+        if name == "*":
+            elements = list(self.iter(etree.Element))
+        else:
+            tag = self._tag_key(name)
+            elements = [] if tag is None else list(self.iter(tag))
+        if elements and elements[0] is self:
+            del elements[0]
+        return elements
+
+    def _tag_key(self, name):
+        """Return the lxml tag of prefix:local, None if the prefix is unknown."""
+        prefix, _, local = name.rpartition(":")
+        uri = self.nsmap.get(prefix or None)
+        if uri is None:
+            return None if prefix else local
+        return f"{{{uri}}}{local}"
+
+    def appendChild(self, node):
+        return self.insertBefore(node, None)
+
+    def insertBefore(self, node, ref):
+        """Insert node before ref, a child of this element (at the end if None)."""
+        old_parent = node.parentNode
+        if isinstance(node, Text):
+            data = node._take()
+            owner, tail = self._slot_before(ref)
+            if isinstance(ref, Text) and (ref._owner, ref._tail) == (owner, tail):
+                _set_slot(owner, tail, data + ref.data)  # Merged with ref
+            else:
+                _set_slot(owner, tail, (_get_slot(owner, tail) or "") + data)
+            node._owner, node._tail = owner, tail
+        elif ref is None:
+            self.append(node)
+        elif isinstance(ref, Text):
+            self._check_child(ref)
+            # The text of ref follows node, with node's own tail before it
+            text = ref.data
+            _set_slot(ref._owner, ref._tail, None)
+            if ref._tail:
+                ref._owner.addnext(node)
+            else:
+                self.insert(0, node)
+            node.tail = (node.tail or "") + text
+            ref._owner, ref._tail = node, True
+        else:
+            self._check_child(ref)
+            ref.addprevious(node)
+        if old_parent is not None and isinstance(old_parent, LxmlElement):
+            _changed(old_parent)
+        _changed(self)
+        return node
+
+    def removeChild(self, node):
+        self._check_child(node)
+        if isinstance(node, Text):
+            node._take()
+        else:
+            self.remove(node)
+        _changed(self)
+        return node
+
+    def replaceChild(self, new_child, old_child):
+        self.insertBefore(new_child, old_child)
+        return self.removeChild(old_child)
+
+    def _check_child(self, node):
+        if node.parentNode is not self:
+            raise xml.dom.NotFoundErr("Node is not a child of this element")
+
+    def _slot_before(self, ref):
+        """Return (owner, tail) of the text just before ref (or at the end)."""
+        if ref is None:
+            return (self[-1], True) if len(self) else (self, False)
+        self._check_child(ref)
+        if isinstance(ref, Text):
+            return ref._owner, ref._tail
+        previous = ref.getprevious()
+        return (previous, True) if previous is not None else (self, False)
+
+
+class LxmlComment(_ChildNode, etree.CommentBase):
+    """lxml comment with the minidom Comment API."""
+
+    nodeName = "#comment"
+
+    nodeType = Node.COMMENT_NODE
+
+    @property
+    def data(self):
+        return self.text or ""
+
+    @data.setter
+    def data(self, value):
+        self.text = value
+        _changed(self)
+
+    nodeValue = data
+
+
+class LxmlProcessingInstruction(_ChildNode, etree.PIBase):
+    """lxml processing instruction with the minidom API."""
+
+    nodeType = Node.PROCESSING_INSTRUCTION_NODE
+
+    @property
+    def nodeName(self):
+        return self.target
+
+    @property
+    def data(self):
+        return self.text or ""
+
+    nodeValue = data
+
+
+class LxmlEntityReference(_ChildNode, etree.EntityBase):
+    """Entity reference left unexpanded by the parser."""
+
+    nodeType = Node.ENTITY_REFERENCE_NODE
+
+    @property
+    def nodeName(self):
+        return self.name
+
+    nodeValue = None
+
+
+class Text(_DOMNode):
+    """
+    Text of an lxml tree as a minidom Text node.
+
+    Stands for the text of an element (tail=False) or the text after it
+    (tail=True), or holds its data itself while not in a tree.
+    """
+
+    __slots__ = ("_owner", "_tail", "_data")
+
+    nodeType = Node.TEXT_NODE
+    nodeName = "#text"
+
+    def __init__(self, data, owner=None, tail=False):
+        self._owner = owner
+        self._tail = tail
+        self._data = data
+
+    @property
+    def data(self):
+        if self._owner is None:
+            return self._data
+        return _get_slot(self._owner, self._tail) or ""
+
+    @data.setter
+    def data(self, value):
+        if self._owner is None:
+            self._data = value
+        else:
+            _set_slot(self._owner, self._tail, value or None)
+            _changed(self._owner)
+
+    nodeValue = data
+
+    @property
+    def parentNode(self):
+        if self._owner is None or not self._tail:
+            return self._owner
+        return self._owner.getparent()
+
+    @property
+    def nextSibling(self):
+        if self._owner is None:
+            return None
+        if self._tail:
+            return self._owner.getnext()
+        return self._owner[0] if len(self._owner) else None
+
+    @property
+    def previousSibling(self):
+        return self._owner if self._tail else None
+
+    def cloneNode(self, deep=False):
+        return Text(self.data)
+
+    def toxml(self, encoding=None):
+        text = self.data.replace("&", "&amp;").replace("<", "&lt;")
+        text = text.replace(">", "&gt;")
+        return text.encode(encoding) if encoding else text
+
+    def _take(self):
+        """Remove the text from its tree and return it."""
+        if self._owner is not None:
+            self._data = self.data
+            _set_slot(self._owner, self._tail, None)
+            _changed(self._owner)
+            self._owner = None
+        return self._data
+
+    def __repr__(self):
+        return f"<Text {self.data[:20]!r}>"
+
+
+def _get_slot(owner, tail):
+    return owner.tail if tail else owner.text
+
+
+def _set_slot(owner, tail, value):
+    if tail:
+        owner.tail = value
+    else:
+        owner.text = value
+
+
+def _visible_tail(node):
+    tail = node.tail
+    return bool(tail) and not tail.isspace()
+
+
+class _Attribute:
+    __slots__ = ("name", "value")
+
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+    nodeName = property(lambda self: self.name)
+    nodeValue = property(lambda self: self.value)
+
+
+class _Attributes:
+    """Attributes of an element, as minidom's NamedNodeMap (read-only)."""
+
+    def __init__(self, element):
+        nsmap = element.nsmap
+        self._items = [
+            _Attribute(element._qualified_name(key, nsmap), value)
+            for key, value in element.attrib.items()
+        ]
+
+    @property
+    def length(self):
+        return len(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def item(self, index):
+        return self._items[index] if 0 <= index < len(self._items) else None
+
+    def items(self):
+        return [(attr.name, attr.value) for attr in self._items]
+
+    def keys(self):
+        return [attr.name for attr in self._items]
+
+    def values(self):
+        return list(self._items)
+
+
+class LxmlDocument(_DOMNode):
+    """An lxml tree with the minidom Document API."""
+
+    nodeType = Node.DOCUMENT_NODE
+    nodeName = "#document"
+    parentNode = None
+
+    def __init__(self, tree):
+        self.tree = tree
+        # Cleared on every change to the tree, as minidom's Document._id_cache
+        self._id_cache = {}
+        _documents[tree.getroot()] = self
+
+    @property
+    def documentElement(self):
+        return self.tree.getroot()
+
+    @property
+    def childNodes(self):
+        root = self.tree.getroot()
+        return [
+            *reversed(list(root.itersiblings(preceding=True))),
+            root,
+            *root.itersiblings(),
+        ]
+
+    @property
+    def firstChild(self):
+        return self.childNodes[0]
+
+    def getElementsByTagName(self, name):
+        root = self.tree.getroot()
+        elements = root.getElementsByTagName(name)
+        if name == "*" or root._tag_key(name) == root.tag:
+            elements.insert(0, root)
+        return elements
+
+    def createElement(self, name):
+        """Create an element with the namespaces of the root element in scope."""
+        root = self.tree.getroot()
+        tag = root._tag_key(name)
+        if tag is None:
+            raise ValueError(f"Namespace prefix of {name} is not declared")
+        return root.makeelement(tag, nsmap=root.nsmap)
+
+    def createTextNode(self, data):
+        return Text(data)
+
+    def importNode(self, node, deep):
+        return node.cloneNode(deep)
+
+    def toxml(self, encoding=None):
+        """Serialize the document with an XML declaration, as minidom does."""
+        if encoding is None:
+            return '<?xml version="1.0" ?>' + etree.tostring(
+                self.tree, encoding="unicode"
+            )
+        declaration = f'<?xml version="1.0" encoding="{encoding}"?>'
+        return declaration.encode(encoding) + etree.tostring(
+            self.tree, encoding=encoding, xml_declaration=False
+        )
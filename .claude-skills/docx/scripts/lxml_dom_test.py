@@ -0,0 +1,118 @@
+import tempfile
+import unittest
+from pathlib import Path
+from xml.dom import Node
+
+if __package__:
+    from .utilities import XMLEditor
+else:
+    from utilities import XMLEditor
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+DOCUMENT = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="{W}" xmlns:r="{R}">
+  <w:body>
+    <w:p>
+      <w:pPr><w:rPr><w:b/><w:sz w:val="24"/></w:rPr></w:pPr>
+      <w:r><w:t xml:space="preserve"> a &amp; b </w:t></w:r>
+      <w:hyperlink r:id="rId4"><w:r><w:t>link</w:t></w:r></w:hyperlink>
+    </w:p>
+    <w:p
+        w:rsidR="00AB12CD"
+        w:rsidRDefault="00AB12CD">
+      <w:r><w:t>café</w:t></w:r>tail
+    </w:p>
+    <x:ext xmlns:x="urn:x"><x:inner xmlns:x="urn:y"><x:leaf/></x:inner></x:ext>
+  </w:body>
+</w:document>
+"""
+
+
+def _significant(nodes):
+    """The nodes as (type, name, data), adjacent text joined, whitespace dropped.
+
+    minidom splits text at character references, lxml_dom does not.
+    """
+    significant = []
+    for node in nodes:
+        data = getattr(node, "data", None)
+        if significant and node.nodeType == significant[-1][0] == node.TEXT_NODE:
+            significant[-1] = (node.TEXT_NODE, "#text", significant[-1][2] + data)
+        else:
+            significant.append((node.nodeType, node.nodeName, data))
+    return [
+        (node_type, name, data)
+        for node_type, name, data in significant
+        if node_type != Node.TEXT_NODE or data.strip()
+    ]
+
+
+class TestBackendParity(unittest.TestCase):
+    """An lxml_dom tree must read like the minidom tree of the same file."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        path = Path(temp_dir.name) / "document.xml"
+        path.write_text(DOCUMENT, encoding="utf-8")
+        self.lxml = XMLEditor(path, backend="lxml").dom
+        self.minidom = XMLEditor(path, backend="minidom").dom
+
+    def elements(self):
+        """Yield the elements of both trees in pairs, as subtests."""
+        pairs = zip(
+            self.lxml.getElementsByTagName("*"),
+            self.minidom.getElementsByTagName("*"),
+            strict=True,
+        )
+        for lxml_elem, minidom_elem in pairs:
+            with self.subTest(minidom_elem.tagName):
+                yield lxml_elem, minidom_elem
+
+    def test_tag_names_and_attributes(self):
+        for lxml_elem, minidom_elem in self.elements():
+            self.assertEqual(lxml_elem.tagName, minidom_elem.tagName)
+            self.assertEqual(
+                sorted(lxml_elem.attributes.items()),
+                sorted(
+                    item
+                    for item in minidom_elem.attributes.items()
+                    if not item[0].startswith("xmlns")
+                ),
+            )
+
+    def test_toxml_of_elements(self):
+        for lxml_elem, minidom_elem in self.elements():
+            self.assertEqual(lxml_elem.toxml(), minidom_elem.toxml())
+            self.assertEqual(lxml_elem.toxml("ascii"), minidom_elem.toxml("ascii"))
+
+    def test_toxml_of_created_elements(self):
+        for dom in (self.lxml, self.minidom):
+            with self.subTest(dom=type(dom).__name__):
+                body = dom.getElementsByTagName("w:body")[0]
+                paragraph = body.appendChild(dom.createElement("w:p"))
+                paragraph.appendChild(dom.createElement("w:r"))
+                self.assertEqual(paragraph.toxml(), "<w:p><w:r/></w:p>")
+
+    def test_child_nodes(self):
+        # lxml_dom does not list whitespace-only text between elements
+        for lxml_elem, minidom_elem in self.elements():
+            self.assertEqual(
+                _significant(lxml_elem.childNodes),
+                _significant(minidom_elem.childNodes),
+            )
+
+    def test_lines(self):
+        for lxml_elem, minidom_elem in self.elements():
+            line = lxml_elem.parse_position[0]
+            if minidom_elem.getAttribute("w:rsidR"):
+                # The line a start tag written over several lines ends on
+                self.assertEqual(line, minidom_elem.parse_position[0] + 2)
+            else:
+                self.assertEqual(line, minidom_elem.parse_position[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
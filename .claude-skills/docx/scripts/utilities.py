@@ -22,6 +22,10 @@ Example usage:
     # Combine filters
     elem = editor.get_node(tag="w:p", line_number=range(1, 50), contains="text")
 
+    # Find text across runs, for many queries at once
+    for match in editor.search(["first phrase", "second phrase"]):
+        print(match.query, match.paragraph, match.runs)
+
     # Replace, insert, or manipulate
     new_elem = editor.replace_node(elem, "<w:r><w:t>new text</w:t></w:r>")
     editor.insert_after(new_elem, "<w:r><w:t>more</w:t></w:r>")
@@ -30,12 +34,30 @@ Example usage:
     editor.save()
 """
 
+import contextlib
 import html
+import re
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional, Union
+from xml.parsers.expat import ExpatError
 
 import defusedxml.minidom
 import defusedxml.sax
+from lxml import etree
+
+if __package__:
+    from . import lxml_dom
+else:
+    import lxml_dom
+
+# Libraries the DOM of an XMLEditor can be built with
+BACKENDS = ("lxml", "minidom")
+
+# Parsed fragments an XMLEditor keeps to copy, and the longest one it keeps
+FRAGMENT_CACHE_ENTRIES = 64
+FRAGMENT_CACHE_MAX_LENGTH = 2048
 
 
 class XMLEditor:
@@ -46,22 +68,44 @@ class XMLEditor:
     of each element. This enables finding nodes by their line number in the original
     file, which is useful when working with Read tool output.
 
+    The DOM is a defusedxml.minidom tree by default. backend="lxml" builds it
+    with lxml instead: its elements have the minidom API used here (see
+    lxml_dom) and take a fraction of the memory, and parsing and saving are
+    several times faster. It is not the default because it does not behave
+    like minidom in every case: whitespace between elements is not listed in
+    childNodes and moves with the element before it (see lxml_dom).
+
+    Lookups go through an index of the elements by tag, attribute value and
+    line, with their text cached for contains=. It is built on the first
+    lookup and updated by replace_node() and the insert/append methods. Other
+    changes to the DOM make it rebuild on the next lookup. minidom does not
+    report assignments to the data of a text node, so with that backend the
+    text is only kept for the duration of one lookup.
+
+    Fragments of XML to insert are parsed in the namespaces of the root
+    element, whose declarations are read once. Short fragments are kept once
+    parsed, and inserting one again inserts a deep copy.
+
     Attributes:
         xml_path: Path to the XML file being edited
         encoding: Detected encoding of the XML file ('ascii' or 'utf-8')
         dom: Parsed DOM tree with parse_position attributes on elements
+        backend: Library the DOM is built with ("lxml" or "minidom")
     """
 
-    def __init__(self, xml_path):
+    def __init__(self, xml_path, backend="minidom"):
         """
         Initialize with path to XML file and parse with line number tracking.
 
         Args:
             xml_path: Path to XML file to edit (str or Path)
+            backend: "minidom" (default) or "lxml" (see BACKENDS)
 
         Raises:
-            ValueError: If the XML file does not exist
+            ValueError: If the XML file does not exist or the backend is unknown
         """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown XML backend: {backend}")
         self.xml_path = Path(xml_path)
         if not self.xml_path.exists():
             raise ValueError(f"XML file not found: {xml_path}")
@@ -70,8 +114,22 @@ class XMLEditor:
             header = f.read(200).decode("utf-8", errors="ignore")
         self.encoding = "ascii" if 'encoding="ascii"' in header else "utf-8"
 
-        parser = _create_line_tracking_parser()
-        self.dom = defusedxml.minidom.parse(str(self.xml_path), parser)
+        self.backend = backend
+        if backend == "lxml":
+            self.dom = lxml_dom.parse(self.xml_path)
+        else:
+            parser = _create_line_tracking_parser()
+            self.dom = defusedxml.minidom.parse(str(self.xml_path), parser)
+        self._node_index = _NodeIndex(self)
+        # Namespace declarations of the root element, for fragments (see
+        # _parse_fragment), and parsed fragments by XML content
+        self._namespace_declarations = None
+        self._fragments = OrderedDict()
+        # Counters of the ids the editor hands out (see _add_id_counter)
+        self._id_counters = []
+        self._rid_counter = self._add_id_counter(
+            ("Relationship",), "Id", prefix="rId", first=1
+        )
 
     def get_node(
         self,
@@ -89,12 +147,14 @@ class XMLEditor:
         Args:
             tag: The XML tag name (e.g., "w:del", "w:ins", "w:r")
             attrs: Dictionary of attribute name-value pairs to match (e.g., {"w:id": "1"})
-            line_number: Line number (int) or line range (range) in original XML file (1-indexed)
+            line_number: Line number (int) or line range (range) in original XML file (1-indexed).
+                         With the lxml backend, the line of an element whose start tag
+                         spans several lines is the line the start tag ends on.
             contains: Text string that must appear in any text node within the element.
                       Supports both entity notation (&#8220;) and Unicode characters (\u201c).
 
         Returns:
-            defusedxml.minidom.Element: The matching DOM element
+            Element: The matching DOM element
 
         Raises:
             ValueError: If node not found or multiple matches found
@@ -110,7 +170,7 @@ class XMLEditor:
             elem = editor.get_node(tag="w:t", contains="\u201cAgreement")   # Unicode character
         """
         matches = []
-        for elem in self.dom.getElementsByTagName(tag):
+        for elem in self._node_index.candidates(tag, attrs, line_number):
             # Check line_number filter
             if line_number is not None:
                 parse_pos = getattr(elem, "parse_position", (None,))
@@ -134,7 +194,7 @@ class XMLEditor:
 
             # Check contains filter
             if contains is not None:
-                elem_text = self._get_element_text(elem)
+                elem_text = self._node_index.text(elem)
                 # Normalize the search string: convert HTML entities to Unicode characters
                 # This allows searching for both "&#8220;Rowan" and ""Rowan"
                 normalized_contains = html.unescape(contains)
@@ -188,7 +248,7 @@ class XMLEditor:
         which typically represent XML formatting rather than document content.
 
         Args:
-            elem: defusedxml.minidom.Element to extract text from
+            elem: DOM element to extract text from
 
         Returns:
             str: Concatenated text from all non-whitespace text nodes within the element
@@ -208,20 +268,24 @@ class XMLEditor:
         Replace a DOM element with new XML content.
 
         Args:
-            elem: defusedxml.minidom.Element to replace
-            new_content: String containing XML to replace the node with
+            elem: DOM element to replace
+            new_content: String containing XML to replace the node with, or
+                a list of nodes of this document that are not in it
 
         Returns:
-            List[defusedxml.minidom.Node]: All inserted nodes
+            list: All inserted nodes
 
         Example:
             new_nodes = editor.replace_node(old_elem, "<w:r><w:t>text</w:t></w:r>")
         """
         parent = elem.parentNode
-        nodes = self._parse_fragment(new_content)
-        for node in nodes:
-            parent.insertBefore(node, elem)
-        parent.removeChild(elem)
+        nodes = self._fragment_nodes(new_content)
+        with self._node_index.editing():
+            for node in nodes:
+                parent.insertBefore(node, elem)
+            parent.removeChild(elem)
+            self._node_index.removed(elem, parent)
+            self._inserted(nodes)
         return nodes
 
     def insert_after(self, elem, xml_content):
@@ -229,23 +293,26 @@ class XMLEditor:
         Insert XML content after a DOM element.
 
         Args:
-            elem: defusedxml.minidom.Element to insert after
-            xml_content: String containing XML to insert
+            elem: DOM element to insert after
+            xml_content: String containing XML to insert, or a list of nodes
+                of this document that are not in it
 
         Returns:
-            List[defusedxml.minidom.Node]: All inserted nodes
+            list: All inserted nodes
 
         Example:
             new_nodes = editor.insert_after(elem, "<w:r><w:t>text</w:t></w:r>")
         """
         parent = elem.parentNode
         next_sibling = elem.nextSibling
-        nodes = self._parse_fragment(xml_content)
-        for node in nodes:
-            if next_sibling:
-                parent.insertBefore(node, next_sibling)
-            else:
-                parent.appendChild(node)
+        nodes = self._fragment_nodes(xml_content)
+        with self._node_index.editing():
+            for node in nodes:
+                if next_sibling:
+                    parent.insertBefore(node, next_sibling)
+                else:
+                    parent.appendChild(node)
+            self._inserted(nodes)
         return nodes
 
     def insert_before(self, elem, xml_content):
@@ -253,19 +320,22 @@ class XMLEditor:
         Insert XML content before a DOM element.
 
         Args:
-            elem: defusedxml.minidom.Element to insert before
-            xml_content: String containing XML to insert
+            elem: DOM element to insert before
+            xml_content: String containing XML to insert, or a list of nodes
+                of this document that are not in it
 
         Returns:
-            List[defusedxml.minidom.Node]: All inserted nodes
+            list: All inserted nodes
 
         Example:
             new_nodes = editor.insert_before(elem, "<w:r><w:t>text</w:t></w:r>")
         """
         parent = elem.parentNode
-        nodes = self._parse_fragment(xml_content)
-        for node in nodes:
-            parent.insertBefore(node, elem)
+        nodes = self._fragment_nodes(xml_content)
+        with self._node_index.editing():
+            for node in nodes:
+                parent.insertBefore(node, elem)
+            self._inserted(nodes)
         return nodes
 
     def append_to(self, elem, xml_content):
@@ -273,31 +343,125 @@ class XMLEditor:
         Append XML content as a child of a DOM element.
 
         Args:
-            elem: defusedxml.minidom.Element to append to
-            xml_content: String containing XML to append
+            elem: DOM element to append to
+            xml_content: String containing XML to append, or a list of nodes
+                of this document that are not in it
 
         Returns:
-            List[defusedxml.minidom.Node]: All inserted nodes
+            list: All inserted nodes
 
         Example:
             new_nodes = editor.append_to(elem, "<w:r><w:t>text</w:t></w:r>")
         """
-        nodes = self._parse_fragment(xml_content)
-        for node in nodes:
-            elem.appendChild(node)
+        nodes = self._fragment_nodes(xml_content)
+        with self._node_index.editing():
+            for node in nodes:
+                elem.appendChild(node)
+            self._inserted(nodes)
         return nodes
 
+    def _add_id_counter(self, tags, attribute, prefix="", first=0):
+        """Return a counter of the numbers in an id attribute of elements with
+        these tags, kept past the ids of the nodes the editor inserts.
+
+        See _IdCounter.
+        """
+        counter = _IdCounter(self, tags, attribute, prefix=prefix, first=first)
+        self._id_counters.append(counter)
+        return counter
+
+    def _inserted(self, nodes):
+        """Record nodes inserted by an edit, for the index and the id counters."""
+        self._node_index.inserted(nodes)
+        for counter in self._id_counters:
+            counter.seen(nodes)
+
+    def search(self, queries, regex=False, paragraph_tag="w:p", run_tag="w:r"):
+        r"""
+        Find text in paragraphs, including text split across runs.
+
+        The text of each paragraph is that of its runs, in order; it is indexed
+        once with the offsets of each run, and all queries are matched in one
+        pass over the paragraphs. Literal queries are matched together with an
+        Aho-Corasick automaton and may overlap; each regex finds
+        non-overlapping matches. Paragraphs nested in a paragraph (e.g. in
+        text boxes) are searched separately.
+
+        Args:
+            queries: Text (str) or list of texts to find. Literal queries
+                support entity notation (&#8220;) as in get_node(contains=...).
+            regex: If True, queries are regular expressions
+            paragraph_tag: Tag of paragraphs (e.g. "a:p" in presentations)
+            run_tag: Tag of runs (e.g. "a:r" in presentations)
+
+        Returns:
+            List[TextMatch]: Matches in document order, with the paragraph and
+                the runs covering each one
+
+        Raises:
+            ValueError: If a query is empty
+
+        Example:
+            matches = editor.search("Agreement")
+            matches = editor.search(["first phrase", "second phrase"])
+            matches = editor.search(r"\d+ days", regex=True)
+            runs = matches[0].runs  # Runs to replace to change the text
+        """
+        if isinstance(queries, str):
+            queries = [queries]
+        if not all(queries):
+            raise ValueError("Search queries must not be empty")
+        if regex:
+            patterns = [(query, re.compile(query)) for query in queries]
+            literals = None
+        else:
+            patterns = []
+            literals = [html.unescape(query) for query in queries]
+            if len(literals) > 1:
+                automaton = _AhoCorasick(literals)
+
+        matches = []
+        for paragraph in self._node_index.paragraphs(paragraph_tag, run_tag):
+            text = paragraph.text
+            found = []
+            for query, pattern in patterns:
+                found.extend(
+                    (m.start(), m.end(), query)
+                    for m in pattern.finditer(text)
+                    if m.end() > m.start()
+                )
+            if literals is not None and len(literals) == 1:
+                literal = literals[0]
+                start = text.find(literal)
+                while start >= 0:
+                    found.append((start, start + len(literal), queries[0]))
+                    start = text.find(literal, start + 1)
+            elif literals is not None:
+                found.extend(
+                    (end - len(literals[i]), end, queries[i])
+                    for end, i in automaton.find_all(text)
+                )
+            found.sort(key=lambda match: (match[0], match[1]))
+            matches.extend(
+                TextMatch(
+                    query,
+                    paragraph.element,
+                    start,
+                    end,
+                    text[start:end],
+                    paragraph.runs(start, end),
+                )
+                for start, end, query in found
+            )
+        return matches
+
     def get_next_rid(self):
-        """Get the next available rId for relationships files."""
-        max_id = 0
-        for rel_elem in self.dom.getElementsByTagName("Relationship"):
-            rel_id = rel_elem.getAttribute("Id")
-            if rel_id.startswith("rId"):
-                try:
-                    max_id = max(max_id, int(rel_id[3:]))
-                except ValueError:
-                    pass
-        return f"rId{max_id + 1}"
+        """Get the next available rId for relationships files.
+
+        The rIds are scanned once; the Relationships inserted by the editor
+        afterwards are taken into account without scanning again.
+        """
+        return f"rId{self._rid_counter.peek()}"
 
     def save(self):
         """
@@ -309,38 +473,483 @@ class XMLEditor:
         content = self.dom.toxml(encoding=self.encoding)
         self.xml_path.write_bytes(content)
 
+    def _fragment_nodes(self, content):
+        """Return the nodes to insert for XML content, or the nodes given."""
+        if isinstance(content, str):
+            return self._parse_fragment(content)
+        nodes = list(content)
+        elements = [n for n in nodes if n.nodeType == n.ELEMENT_NODE]
+        assert elements, "Fragment must contain at least one element"
+        return nodes
+
     def _parse_fragment(self, xml_content):
         """
         Parse XML fragment and return list of imported nodes.
 
+        Fragments up to FRAGMENT_CACHE_MAX_LENGTH characters are kept once
+        parsed (the last FRAGMENT_CACHE_ENTRIES of them), and copied when
+        parsed again.
+
         Args:
             xml_content: String containing XML fragment
 
         Returns:
-            List of defusedxml.minidom.Node objects imported into this document
+            List of DOM nodes for this document, not yet inserted
 
         Raises:
             AssertionError: If fragment contains no element nodes
         """
-        # Extract namespace declarations from the root document element
-        root_elem = self.dom.documentElement
-        namespaces = []
-        if root_elem and root_elem.attributes:
-            for i in range(root_elem.attributes.length):
-                attr = root_elem.attributes.item(i)
-                if attr.name.startswith("xmlns"):  # type: ignore
-                    namespaces.append(f'{attr.name}="{attr.value}"')  # type: ignore
+        nodes = self._fragments.get(xml_content)
+        if nodes is not None:
+            self._fragments.move_to_end(xml_content)
+            return self._copy_fragment(nodes)
 
-        ns_decl = " ".join(namespaces)
-        wrapper = f"<root {ns_decl}>{xml_content}</root>"
+        nodes = self._parse_new_fragment(xml_content)
+        elements = [n for n in nodes if n.nodeType == n.ELEMENT_NODE]
+        assert elements, "Fragment must contain at least one element"
+        if len(xml_content) > FRAGMENT_CACHE_MAX_LENGTH:
+            return nodes
+        self._fragments[xml_content] = nodes
+        if len(self._fragments) > FRAGMENT_CACHE_ENTRIES:
+            self._fragments.popitem(last=False)
+        return self._copy_fragment(nodes)
+
+    def _parse_new_fragment(self, xml_content):
+        declarations = self._namespace_declarations
+        if declarations is None:
+            declarations = self._read_namespace_declarations()
+        try:
+            nodes = self._parse_wrapped_fragment(xml_content, declarations)
+        except (ExpatError, etree.XMLSyntaxError):
+            # A namespace may have been declared on the root element since
+            current = self._read_namespace_declarations()
+            if current == declarations:
+                raise
+            declarations = current
+            nodes = self._parse_wrapped_fragment(xml_content, declarations)
+        self._namespace_declarations = declarations
+        return nodes
+
+    def _parse_wrapped_fragment(self, xml_content, declarations):
+        if self.backend == "lxml":
+            return lxml_dom.parse_fragment(self.dom, xml_content, declarations)
+
+        wrapper = f"<root {declarations}>{xml_content}</root>"
         fragment_doc = defusedxml.minidom.parseString(wrapper)
-        nodes = [
+        return [
             self.dom.importNode(child, deep=True)
             for child in fragment_doc.documentElement.childNodes  # type: ignore
         ]
-        elements = [n for n in nodes if n.nodeType == n.ELEMENT_NODE]
-        assert elements, "Fragment must contain at least one element"
-        return nodes
+
+    def _read_namespace_declarations(self):
+        """Return the namespace declarations of the root element as XML."""
+        if self.backend == "lxml":
+            return lxml_dom.namespace_declarations(self.dom)
+
+        # Extract namespace declarations from the root document element
+        root_elem = self.dom.documentElement
+        namespaces = []
+        if root_elem and root_elem.attributes:
+            for name, value in root_elem.attributes.items():  # type: ignore
+                if name.startswith("xmlns"):
+                    namespaces.append(f'{name}="{value}"')
+        return " ".join(namespaces)
+
+    def _copy_fragment(self, nodes):
+        if self.backend == "lxml":
+            return lxml_dom.copy_fragment(nodes)
+        return [node.cloneNode(True) for node in nodes]
+
+
+class TextMatch:
+    """Text found by XMLEditor.search()."""
+
+    __slots__ = ("query", "paragraph", "start", "end", "text", "runs")
+
+    def __init__(self, query, paragraph, start, end, text, runs):
+        self.query = query  # The query as given
+        self.paragraph = paragraph
+        self.start = start  # Offsets of the match in the paragraph's text
+        self.end = end
+        self.text = text
+        self.runs = runs  # Runs holding text of the match, in order
+
+    def __repr__(self):
+        return (
+            f"TextMatch({self.query!r}, <{self.paragraph.tagName}>, "
+            f"{self.start}, {self.end}, runs={len(self.runs)})"
+        )
+
+
+class _ParagraphText:
+    """Text of a paragraph, with the run each part of it comes from."""
+
+    __slots__ = ("element", "text", "starts", "segments")
+
+    def __init__(self, element, text, segments):
+        self.element = element
+        self.text = text
+        self.segments = segments  # (start, end, run), in text order
+        self.starts = [start for start, _, _ in segments]
+
+    def runs(self, start, end):
+        """Return the runs holding text between offsets start and end."""
+        first = max(bisect_right(self.starts, start) - 1, 0)
+        last = bisect_left(self.starts, end)
+        return [run for _, run_end, run in self.segments[first:last] if run_end > start]
+
+
+class _AhoCorasick:
+    """Automaton finding many literal strings in one pass over a text."""
+
+    def __init__(self, patterns):
+        self._goto = [{}]  # state -> character -> state
+        self._outputs = [[]]  # state -> indexes of the patterns ending there
+        for i, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = self._goto[state][char] = len(self._goto)
+                    self._goto.append({})
+                    self._outputs.append([])
+                state = next_state
+            self._outputs[state].append(i)
+
+        # Failure links, breadth first; outputs include those of the fallback
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._outputs[next_state] += self._outputs[self._fail[next_state]]
+
+    def find_all(self, text):
+        """Yield (end offset, pattern index) for every occurrence in text."""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for position, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for i in outputs[state]:
+                yield position, i
+
+
+class _IdCounter:
+    """Next free number for an id attribute of some elements (e.g. rId1, rId2).
+
+    The DOM is scanned for the highest number on first use. After that the
+    counter only moves forward: past the numbers handed out by take() and the
+    ids of the nodes the editor inserts (see seen()). Ids set by changing the
+    DOM directly after the first use are not noticed.
+    """
+
+    def __init__(self, editor, tags, attribute, prefix="", first=0):
+        self._editor = editor
+        self._tags = tags
+        self._attribute = attribute
+        self._prefix = prefix
+        self._first = first
+        self._next = None
+
+    def peek(self):
+        """Return the next free number, without reserving it."""
+        if self._next is None:
+            self._next = self._first
+            for tag in self._tags:
+                self._update(self._editor.dom.getElementsByTagName(tag))
+        return self._next
+
+    def take(self):
+        """Return the next free number and reserve it."""
+        number = self.peek()
+        self._next = number + 1
+        return number
+
+    def seen(self, nodes):
+        """Move the counter past the ids of inserted nodes and their descendants."""
+        if self._next is None:
+            return  # The first use scans the whole DOM, these nodes included
+        for node in nodes:
+            if node.nodeType != node.ELEMENT_NODE:
+                continue
+            for tag in self._tags:
+                if node.tagName == tag:
+                    self._update([node])
+                self._update(node.getElementsByTagName(tag))
+
+    def _update(self, elements):
+        """Move the counter past the highest number among the ids of elements."""
+        for elem in elements:
+            value = elem.getAttribute(self._attribute)
+            if value.startswith(self._prefix):
+                try:
+                    number = int(value[len(self._prefix) :])
+                    self._next = max(self._next, number + 1)
+                except ValueError:
+                    pass
+
+
+class _NodeIndex:
+    """Elements of an XMLEditor's DOM by tag, attribute value and line.
+
+    The index is built on first use. Edits made by the editor inside
+    editing() update it in place; any other change to the DOM makes it
+    rebuild on next use. minidom (and lxml_dom) clears Document._id_cache on
+    every change to the children or attributes of a node in the document, so a
+    key the index puts in that cache is still there only if the DOM was not
+    changed since.
+
+    lxml_dom also clears it when the data of a text node is set, minidom does
+    not: with minidom the text of the elements is dropped before each lookup.
+    """
+
+    def __init__(self, editor):
+        self._editor = editor
+        self._keeps_text = editor.backend == "lxml"  # Text changes clear the key
+        self._dom = None  # DOM the index was built from, None if out of date
+        self._token = object()  # Key put in self._dom._id_cache
+        self._by_tag = {}  # tag -> {element: None}
+        self._by_line = {}  # line -> {element: None}
+        self._lines = []  # Sorted keys of _by_line
+        self._by_attr = {}  # tag -> attribute -> value -> {element: None}
+        self._text = {}  # element -> text, as XMLEditor._get_element_text
+        self._paragraphs = {}  # (paragraph tag, run tag) -> [_ParagraphText]
+        self._depth = 0  # Nesting of editing()
+        self._tracking = False  # True if the edits being made are recorded
+        self._inserted = []
+        self._removed = []  # (element, former parent)
+
+    def candidates(self, tag, attrs=None, line_number=None):
+        """Return the elements that may match a get_node() query.
+
+        The elements returned have the tag and, if given, the value of one of
+        attrs or a line in line_number; the caller checks the other filters.
+        """
+        self._ensure_current()
+        if tag == "*":
+            return self._editor.dom.getElementsByTagName(tag)
+        if line_number is not None:
+            if not isinstance(line_number, range):
+                lines = [line_number]
+            elif line_number:
+                first, last = sorted((line_number[0], line_number[-1]))
+                start = bisect_left(self._lines, first)
+                end = bisect_right(self._lines, last)
+                lines = self._lines[start:end]
+            else:
+                lines = []
+            return [
+                elem
+                for line in lines
+                for elem in self._by_line.get(line, ())
+                if elem.tagName == tag
+            ]
+        if attrs:
+            name, value = next(iter(attrs.items()))
+            return list(self._attribute_values(tag, name).get(value, ()))
+        return list(self._by_tag.get(tag, ()))
+
+    def text(self, elem):
+        """Return the text of an element (see XMLEditor._get_element_text)."""
+        text = self._text.get(elem)
+        if text is None:
+            text_parts = []
+            for node in elem.childNodes:
+                if node.nodeType == node.TEXT_NODE:
+                    if node.data.strip():
+                        text_parts.append(node.data)
+                elif node.nodeType == node.ELEMENT_NODE:
+                    text_parts.append(self.text(node))
+            text = self._text[elem] = "".join(text_parts)
+        return text
+
+    def paragraphs(self, paragraph_tag, run_tag):
+        """Return the text of every paragraph, in document order.
+
+        Text nodes count if they are in a run; whitespace-only ones only if
+        they are the content of an element (e.g. <w:t xml:space="preserve">),
+        not the indentation between elements.
+        """
+        self._ensure_current()
+        key = (paragraph_tag, run_tag)
+        if key not in self._paragraphs:
+            self._paragraphs[key] = []
+            root = self._dom.documentElement
+            if root is not None:
+                self._index_paragraphs(root, key, None, None)
+        return self._paragraphs[key]
+
+    def _index_paragraphs(self, elem, key, paragraph, run):
+        """Add the text under elem to paragraph ([parts, segments, length])."""
+        paragraph_tag, run_tag = key
+        has_elements = any(
+            child.nodeType == child.ELEMENT_NODE for child in elem.childNodes
+        )
+        for child in elem.childNodes:
+            if child.nodeType == child.ELEMENT_NODE:
+                if child.tagName == paragraph_tag:
+                    # Listed before the paragraphs nested in it
+                    position = len(self._paragraphs[key])
+                    self._paragraphs[key].append(None)
+                    state = [[], [], 0]
+                    self._index_paragraphs(child, key, state, None)
+                    parts, segments, _ = state
+                    self._paragraphs[key][position] = _ParagraphText(
+                        child, "".join(parts), segments
+                    )
+                elif child.tagName == run_tag and paragraph is not None:
+                    self._index_paragraphs(child, key, paragraph, child)
+                else:
+                    self._index_paragraphs(child, key, paragraph, run)
+            elif child.nodeType == child.TEXT_NODE and run is not None:
+                data = child.data
+                if not data or (has_elements and not data.strip()):
+                    continue
+                parts, segments, length = paragraph
+                parts.append(data)
+                if segments and segments[-1][2] is run and segments[-1][1] == length:
+                    segments[-1] = (segments[-1][0], length + len(data), run)
+                else:
+                    segments.append((length, length + len(data), run))
+                paragraph[2] = length + len(data)
+
+    @contextlib.contextmanager
+    def editing(self):
+        """Record the editor's edits to update the index when done.
+
+        Inside, the DOM may only be changed by inserting the nodes passed to
+        inserted(), removing the elements passed to removed(), setting
+        attributes of inserted nodes and declaring namespaces on the root.
+        """
+        if self._depth == 0:
+            self._tracking = self._is_current()
+            self._inserted, self._removed = [], []
+        self._depth += 1
+        completed = False
+        try:
+            yield
+            completed = True
+        finally:
+            self._depth -= 1
+            if self._depth == 0 and self._tracking:
+                if completed:
+                    self._apply_edits()
+                else:
+                    self._dom = None
+                self._inserted, self._removed = [], []
+
+    def inserted(self, nodes):
+        """Record nodes inserted into the DOM by an edit."""
+        if self._tracking:
+            self._inserted.extend(nodes)
+
+    def removed(self, elem, parent):
+        """Record an element removed from parent by an edit."""
+        if self._tracking:
+            self._removed.append((elem, parent))
+
+    def _is_current(self):
+        dom = self._editor.dom
+        return dom is self._dom and self._token in getattr(dom, "_id_cache", ())
+
+    def _ensure_current(self):
+        if self._is_current():
+            if not self._keeps_text:
+                self._text, self._paragraphs = {}, {}
+            return
+        self._by_tag, self._by_line, self._by_attr, self._text = {}, {}, {}, {}
+        self._paragraphs = {}
+        self._lines = []
+        self._dom = self._editor.dom
+        root = self._dom.documentElement
+        if root is not None:
+            self._add(root)
+        self._mark_current()
+        # Edits in progress were made before this rebuild or will clear the key
+        self._tracking = False
+
+    def _mark_current(self):
+        id_cache = getattr(self._dom, "_id_cache", None)
+        if id_cache is not None:
+            id_cache[self._token] = None
+
+    def _apply_edits(self):
+        for elem, parent in self._removed:
+            if elem.nodeType == elem.ELEMENT_NODE:
+                self._remove(elem)
+            self._forget_text(parent)
+        for node in self._inserted:
+            if self._in_document(node):
+                if node.nodeType == node.ELEMENT_NODE:
+                    self._add(node)
+                self._forget_text(node.parentNode)
+        self._paragraphs = {}
+        # Namespace declarations may have been added to the root
+        root = self._dom.documentElement
+        self._by_attr.pop(root.tagName, None)
+        self._mark_current()
+
+    def _add(self, elem):
+        """Index an element and its descendants."""
+        for elem in [elem, *elem.getElementsByTagName("*")]:
+            tag = elem.tagName
+            self._by_tag.setdefault(tag, {})[elem] = None
+            position = getattr(elem, "parse_position", None)
+            if position is not None:
+                line = position[0]
+                if line not in self._by_line:
+                    self._by_line[line] = {}
+                    insort(self._lines, line)
+                self._by_line[line][elem] = None
+            for name, values in self._by_attr.get(tag, {}).items():
+                values.setdefault(elem.getAttribute(name), {})[elem] = None
+
+    def _remove(self, elem):
+        """Remove an element and its descendants from the index."""
+        for elem in [elem, *elem.getElementsByTagName("*")]:
+            tag = elem.tagName
+            self._by_tag.get(tag, {}).pop(elem, None)
+            position = getattr(elem, "parse_position", None)
+            if position is not None:
+                line = position[0]
+                elements = self._by_line.get(line, {})
+                elements.pop(elem, None)
+                if not elements and line in self._by_line:
+                    del self._by_line[line]
+                    del self._lines[bisect_left(self._lines, line)]
+            for name, values in self._by_attr.get(tag, {}).items():
+                values.get(elem.getAttribute(name), {}).pop(elem, None)
+            self._text.pop(elem, None)
+
+    def _attribute_values(self, tag, name):
+        """Return value -> elements for one attribute of the elements with a tag."""
+        attributes = self._by_attr.setdefault(tag, {})
+        values = attributes.get(name)
+        if values is None:
+            values = attributes[name] = {}
+            for elem in self._by_tag.get(tag, ()):
+                values.setdefault(elem.getAttribute(name), {})[elem] = None
+        return values
+
+    def _forget_text(self, node):
+        """Drop the cached text of an element and its ancestors."""
+        # The text of an element is cached only with that of its descendants
+        while node is not None and self._text.pop(node, None) is not None:
+            node = node.parentNode
+
+    def _in_document(self, node):
+        while node is not None:
+            if node is self._dom:
+                return True
+            node = node.parentNode
+        return False
 
 
 def _create_line_tracking_parser():
@@ -0,0 +1,152 @@
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+if __package__:
+    from .utilities import BACKENDS, XMLEditor, _AhoCorasick
+else:
+    from utilities import BACKENDS, XMLEditor, _AhoCorasick
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+DOCUMENT = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="{W}">
+  <w:body>
+    <w:p>
+      <w:r><w:t>The parties agree</w:t></w:r>
+      <w:r><w:t xml:space="preserve"> to the terms </w:t></w:r>
+      <w:r><w:t>of this agreement.</w:t></w:r>
+    </w:p>
+    <w:p>
+      <w:r><w:t>Payment is due in 30 days; the agreement ends in 90 days.</w:t></w:r>
+    </w:p>
+  </w:body>
+</w:document>
+"""
+
+
+def _find_all(text, patterns):
+    """All occurrences of each pattern, overlapping ones included, via str.find()."""
+    found = []
+    for i, pattern in enumerate(patterns):
+        start = text.find(pattern)
+        while start >= 0:
+            found.append((start + len(pattern), i))
+            start = text.find(pattern, start + 1)
+    return sorted(found)
+
+
+class EditorTestCase(unittest.TestCase):
+    """Writes DOCUMENT to a temporary file for each test."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = Path(temp_dir.name) / "document.xml"
+        self.path.write_text(DOCUMENT, encoding="utf-8")
+
+    def editors(self):
+        """Yield an editor of the document for each backend, as a subtest."""
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                yield XMLEditor(self.path, backend=backend)
+
+
+class TestAhoCorasick(unittest.TestCase):
+    def assertMatchesFind(self, text, patterns):
+        self.assertEqual(
+            sorted(_AhoCorasick(patterns).find_all(text)), _find_all(text, patterns)
+        )
+
+    def test_overlapping_patterns(self):
+        self.assertMatchesFind("ushers", ["he", "she", "his", "hers"])
+
+    def test_patterns_that_are_prefixes_and_suffixes(self):
+        self.assertMatchesFind("aaaabaaab", ["a", "aa", "aaa", "ab", "b", "aab"])
+
+    def test_duplicate_patterns(self):
+        self.assertMatchesFind("abcabc", ["abc", "bc", "abc"])
+
+    def test_no_match(self):
+        self.assertMatchesFind("abcdef", ["xyz", "fa", "g"])
+
+    def test_random_texts(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            text = "".join(rng.choice("abc ") for _ in range(rng.randint(0, 60)))
+            patterns = [
+                "".join(rng.choice("abc ") for _ in range(rng.randint(1, 4)))
+                for _ in range(rng.randint(1, 8))
+            ]
+            with self.subTest(text=text, patterns=patterns):
+                self.assertMatchesFind(text, patterns)
+
+
+class TestSearch(EditorTestCase):
+    def test_queries_together_match_queries_alone(self):
+        queries = ["agree", "agreement", "days", " to the", "in 30 days; the"]
+        for editor in self.editors():
+            alone = sorted(
+                (match.start, match.end, match.query, id(match.paragraph))
+                for query in queries
+                for match in editor.search(query)
+            )
+            together = sorted(
+                (match.start, match.end, match.query, id(match.paragraph))
+                for match in editor.search(queries)
+            )
+            self.assertEqual(together, alone)
+
+    def test_match_across_runs(self):
+        for editor in self.editors():
+            (match,) = editor.search("agree to the terms of")
+            self.assertEqual(match.text, "agree to the terms of")
+            self.assertEqual(len(match.runs), 3)
+
+
+class TestNodeIndex(EditorTestCase):
+    """Lookups must see the changes made to the DOM after the index was built."""
+
+    def test_text_data_set_after_a_lookup(self):
+        for editor in self.editors():
+            paragraph = editor.get_node(tag="w:p", contains="30 days")
+            self.assertEqual(len(editor.search("90 days")), 1)
+            text = paragraph.getElementsByTagName("w:t")[0].firstChild
+            text.data = text.data.replace("90 days", "60 days")
+            self.assertIs(editor.get_node(tag="w:p", contains="60 days"), paragraph)
+            with self.assertRaises(ValueError):
+                editor.get_node(tag="w:p", contains="90 days")
+            self.assertEqual(editor.search("90 days"), [])
+            (match,) = editor.search("60 days")
+            self.assertIs(match.paragraph, paragraph)
+
+    def test_edits_made_by_the_editor(self):
+        for editor in self.editors():
+            first = editor.get_node(tag="w:p", contains="parties")
+            editor.insert_after(first, "<w:p><w:r><w:t>Inserted</w:t></w:r></w:p>")
+            inserted = editor.get_node(tag="w:p", contains="Inserted")
+            self.assertIs(inserted.previousSibling, first)
+            (replaced,) = editor.replace_node(
+                inserted, "<w:p><w:r><w:t>Replaced</w:t></w:r></w:p>"
+            )
+            self.assertIs(editor.get_node(tag="w:p", contains="Replaced"), replaced)
+            with self.assertRaises(ValueError):
+                editor.get_node(tag="w:p", contains="Inserted")
+            self.assertEqual(len(editor.dom.getElementsByTagName("w:p")), 3)
+
+    def test_other_changes_to_the_dom(self):
+        for editor in self.editors():
+            paragraph = editor.get_node(tag="w:p", contains="30 days")
+            paragraph.parentNode.removeChild(paragraph)
+            with self.assertRaises(ValueError):
+                editor.get_node(tag="w:p", contains="30 days")
+            self.assertEqual(editor.search("days"), [])
+            first = editor.get_node(tag="w:p", contains="parties")
+            text = first.getElementsByTagName("w:t")[0]
+            text.setAttribute("w:val", "x")
+            self.assertIs(editor.get_node(tag="w:t", attrs={"w:val": "x"}), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
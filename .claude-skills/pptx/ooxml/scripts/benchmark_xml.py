@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark the XML condensing and pretty-printing of pack.py against minidom.
+
+Each XML part is condensed (as pack.py does) and pretty-printed (as unpack.py
+does) with the lxml-based engine and with the minidom implementation it
+replaces. Both outputs must be identical. Every measurement runs in a fresh
+process, so peak memory can be compared.
+
+Usage:
+    python benchmark_xml.py <path>... [--repeat N]
+
+Each path is an XML part, an unpacked Office document directory, or an Office
+file (.docx/.pptx/.xlsx) whose XML parts are read from the archive.
+"""
+
+import argparse
+import hashlib
+import resource
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pack
+
+# Operation -> (lxml engine, minidom implementation)
+OPERATIONS = {
+    "condense": ("condense_xml_data", "_condense_xml_minidom"),
+    "pretty": ("pretty_xml_data", "_pretty_xml_minidom"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the lxml and minidom XML formatting of pack/unpack"
+    )
+    parser.add_argument(
+        "paths", nargs="+", help="XML parts, directories or Office files"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Runs per measurement (best is kept)"
+    )
+    args = parser.parse_args()
+
+    parts = [part for path in args.paths for part in find_parts(Path(path))]
+    if not parts:
+        sys.exit("Error: no XML parts found")
+
+    identical = True
+    print(
+        f"{'part':<40} {'size':>9} {'operation':<9} {'lxml':>8} {'minidom':>8} "
+        f"{'speedup':>7} {'lxml MB':>8} {'minidom MB':>10}  output"
+    )
+    for source, member in parts:
+        size = len(read_part(source, member))
+        for operation, functions in OPERATIONS.items():
+            (new_time, new_memory, new_digest), (old_time, old_memory, old_digest) = (
+                measure(source, member, function, args.repeat) for function in functions
+            )
+            same = new_digest == old_digest
+            identical = identical and same
+            print(
+                f"{part_label(source, member):<40} {size:>9} {operation:<9} "
+                f"{new_time:>7.3f}s {old_time:>7.3f}s {old_time / new_time:>6.1f}x "
+                f"{new_memory:>8.1f} {old_memory:>10.1f}  "
+                f"{'identical' if same else 'DIFFERENT'}"
+            )
+
+    if not identical:
+        print("FAILED - lxml and minidom outputs differ", file=sys.stderr)
+        sys.exit(1)
+
+
+def find_parts(path):
+    """Return (source, member) for each XML part of path; member is None for files."""
+    if path.is_dir():
+        return [
+            (f, None)
+            for f in sorted(path.rglob("*"))
+            if f.is_file() and f.name.endswith((".xml", ".rels"))
+        ]
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            return [
+                (path, name)
+                for name in zf.namelist()
+                if name.endswith((".xml", ".rels"))
+            ]
+    return [(path, None)]
+
+
+def read_part(source, member):
+    if member is None:
+        return source.read_bytes()
+    with zipfile.ZipFile(source) as zf:
+        return zf.read(member)
+
+
+def part_label(source, member):
+    label = f"{source.name}:{member}" if member else str(source)
+    return label if len(label) <= 40 else "..." + label[-37:]
+
+
+def measure(source, member, function, repeat):
+    """Return (best time, peak memory in MB, output digest) of one function."""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(_run, source, member, function, repeat).result()
+
+
+def _run(source, member, function, repeat):
+    data = read_part(source, member)
+    format_xml = getattr(pack, function)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = format_xml(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    return best, peak / 1024, hashlib.sha256(output).hexdigest()
+
+
+if __name__ == "__main__":
+    main()
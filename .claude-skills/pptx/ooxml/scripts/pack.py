@@ -4,28 +4,121 @@ Tool to pack a directory into a .docx, .pptx, or .xlsx file with XML formatting
 
 Example usage:
     python pack.py <input_directory> <office_file> [--force]
+    python pack.py --batch <jobs.jsonl> [--jobs N] [--validators N] [--results FILE]
+    python pack.py --pair <input_directory> <office_file> --pair ... [--force]
+
+In batch mode, each line of the jobs file is a JSON object with input_dir,
+output_file and optionally original ("-" reads the jobs from stdin). One JSON
+result per document is written as soon as it is packed and validated.
 """
 
 import argparse
-import shutil
-import subprocess
+import codecs
+import collections
+import contextlib
+import hashlib
+import io
+import json
+import os
+import struct
 import sys
 import tempfile
+import time
 import defusedxml.minidom
+import xml.dom.minidom
 import zipfile
+import zlib
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 
+from lxml import etree
+
+if __package__:
+    from .soffice import convert, start_service
+    from .validation.package import MANIFEST_NAME, DirectoryPackage
+else:
+    from soffice import convert, start_service
+    from validation.package import MANIFEST_NAME, DirectoryPackage
+
 
 def main():
     parser = argparse.ArgumentParser(description="Pack a directory into an Office file")
-    parser.add_argument("input_directory", help="Unpacked Office document directory")
-    parser.add_argument("output_file", help="Output Office file (.docx/.pptx/.xlsx)")
+    parser.add_argument(
+        "input_directory", nargs="?", help="Unpacked Office document directory"
+    )
+    parser.add_argument(
+        "output_file", nargs="?", help="Output Office file (.docx/.pptx/.xlsx)"
+    )
     parser.add_argument("--force", action="store_true", help="Skip validation")
+    parser.add_argument(
+        "--original",
+        help="Office file to copy unchanged parts from (default: the file "
+        "input_directory was unpacked from)",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Pack the documents listed in a JSON Lines file ('-' for stdin)",
+    )
+    parser.add_argument(
+        "--pair",
+        nargs=2,
+        action="append",
+        metavar=("INPUT_DIRECTORY", "OUTPUT_FILE"),
+        help="Pack one document of a batch (can be repeated)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes packing documents of a batch (0 = all CPUs)",
+    )
+    parser.add_argument(
+        "--validators",
+        type=int,
+        default=1,
+        help="Number of documents of a batch validated at a time",
+    )
+    parser.add_argument(
+        "--results",
+        metavar="FILE",
+        help="Write the results of a batch to FILE instead of stdout",
+    )
     args = parser.parse_args()
 
+    if args.batch or args.pair:
+        if args.input_directory or args.original:
+            parser.error("input_directory and --original are not used with a batch")
+        jobs = list(args.pair or [])
+        if args.batch:
+            try:
+                jobs.extend(read_batch(args.batch))
+            except ValueError as e:
+                sys.exit(f"Error: {e}")
+        success = pack_batch(
+            jobs,
+            args.results,
+            workers=args.jobs or os.cpu_count() or 1,
+            validate=not args.force,
+            validators=args.validators,
+        )
+        sys.exit(0 if success else 1)
+    if not args.output_file:
+        parser.error("input_directory and output_file are required")
+
     try:
         success = pack_document(
-            args.input_directory, args.output_file, validate=not args.force
+            args.input_directory,
+            args.output_file,
+            validate=not args.force,
+            original=args.original,
         )
 
         # Show warning if validation was skipped
@@ -42,16 +135,33 @@ def main():
         sys.exit(f"Error: {e}")
 
 
-def pack_document(input_dir, output_file, validate=False):
+def pack_document(input_dir, output_file, validate=False, original=None):
     """Pack a directory into an Office file (.docx/.pptx/.xlsx).
 
+    Parts that are unchanged from a member of the original document are copied
+    from it as they are, still compressed; only changed parts are condensed
+    and compressed. A part is unchanged if it is still the file unpack.py
+    wrote from that member, according to the SHA-256 in the manifest of
+    input_dir. Without a manifest entry, a non-XML file is unchanged if its
+    size and CRC-32 match the member's.
+
+    The parts of a lazily unpacked directory (see unpack.py --parts) that are
+    still in the source archive are copied from it in the same way, once
+    checked against the manifest.
+
     Args:
         input_dir: Path to unpacked Office document directory
         output_file: Path to output Office file
         validate: If True, validates with soffice (default: False)
+        original: Path to the original Office file (default: the file
+            input_dir was unpacked from, if any)
 
     Returns:
         bool: True if successful, False if validation failed
+
+    Raises:
+        ValueError: If the arguments are invalid, or the source archive of a
+            lazily unpacked directory changed since (see DirectoryPackage)
     """
     input_dir = Path(input_dir)
     output_file = Path(output_file)
@@ -60,35 +170,364 @@ def pack_document(input_dir, output_file, validate=False):
         raise ValueError(f"{input_dir} is not a directory")
     if output_file.suffix.lower() not in {".docx", ".pptx", ".xlsx"}:
         raise ValueError(f"{output_file} must be a .docx, .pptx, or .xlsx file")
+    if original is not None and not Path(original).is_file():
+        raise ValueError(f"{original} is not a file")
 
-    # Work in temporary directory to avoid modifying original
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_content_dir = Path(temp_dir) / "content"
-        shutil.copytree(input_dir, temp_content_dir)
-
-        # Process XML files to remove pretty-printing whitespace
-        for pattern in ["*.xml", "*.rels"]:
-            for xml_file in temp_content_dir.rglob(pattern):
-                condense_xml(xml_file)
-
-        # Create final Office file as zip archive
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zf:
-            for f in temp_content_dir.rglob("*"):
-                if f.is_file():
-                    zf.write(f, f.relative_to(temp_content_dir))
-
-        # Validate if requested
-        if validate:
-            if not validate_document(output_file):
-                output_file.unlink()  # Delete the corrupt file
-                return False
+    # List the files first; the output file may be written inside input_dir
+    output_path = output_file.resolve()
+    files = [
+        f
+        for f in input_dir.rglob("*")
+        if f.is_file() and f.resolve() != output_path and f != input_dir / MANIFEST_NAME
+    ]
+    # Parts of a lazily unpacked directory that are still in its source archive
+    package = DirectoryPackage(input_dir)
+    if package.base is not None:
+        raise ValueError(
+            f"{input_dir} is an overlay of {package.base.path}; save it to a "
+            "directory of its own before packing"
+        )
+    archived = package.archived_names()
+    manifest = package.manifest or {"source": None, "parts": {}}
+    source = manifest["source"]
+    if original is None and source is not None and Path(source).is_file():
+        original = source
+
+    # The archive is written to a new file that replaces output_file once
+    # complete, so a failure never leaves a truncated archive behind, and the
+    # original document can be packed over
+    zip_path = output_file.with_name(output_file.name + ".tmp")
+
+    # Create final Office file as zip archive, straight from input_dir (which
+    # is not modified): XML is condensed in memory, other files are streamed
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with contextlib.ExitStack() as stack:
+            zf = stack.enter_context(_ArchiveWriter(zip_path))
+            reference, members = None, {}
+            if original is not None:
+                try:
+                    reference = stack.enter_context(zipfile.ZipFile(original))
+                except (OSError, zipfile.BadZipFile) as e:
+                    raise ValueError(f"Cannot read {original}: {e}") from None
+                members = {info.filename: info for info in reference.infolist()}
+
+            for f in files:
+                arcname = f.relative_to(input_dir).as_posix()
+                info = members.get(arcname)
+                entry = manifest["parts"].get(arcname)
+                if f.name.endswith((".xml", ".rels")):
+                    data = f.read_bytes()
+                    if info is not None and _unpacked_unchanged(data, info, entry):
+                        zf.copy(original, info)
+                    else:
+                        # Remove pretty-printing whitespace
+                        zinfo = zipfile.ZipInfo.from_file(f, arcname)
+                        zf.writestr(zinfo, condense_xml_data(data))
+                elif info is not None and _file_unchanged(f, info, entry):
+                    zf.copy(original, info)
+                else:
+                    zf.write(f, arcname)
+
+            # Checked against the manifest: the source may have changed since
+            stack.callback(package.close)
+            for name in archived:
+                zf.copy(source, package.archived_info(name))
+    except BaseException:
+        zip_path.unlink(missing_ok=True)
+        raise
+
+    os.replace(zip_path, output_file)
+
+    # Validate if requested
+    if validate:
+        if not validate_document(output_file):
+            output_file.unlink()  # Delete the corrupt file
+            return False
 
     return True
 
 
+def _unpacked_unchanged(data, info, entry):
+    """Return True if data is what unpack.py wrote for a member (see manifest)."""
+    return (
+        entry is not None
+        and entry.get("unpacked")
+        and entry.get("crc32") == info.CRC
+        and entry["sha256"] == hashlib.sha256(data).hexdigest()
+    )
+
+
+def _file_unchanged(path, info, entry):
+    """Return True if a file still holds the data of a member.
+
+    If the manifest has an entry for the member, the file must have the
+    SHA-256 unpack.py recorded; otherwise its CRC-32 must match the member's.
+    """
+    if path.stat().st_size != info.file_size:
+        return False
+    if entry is not None and entry.get("unpacked") and entry.get("crc32") == info.CRC:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                digest.update(chunk)
+        return digest.hexdigest() == entry["sha256"]
+    crc = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            crc = zlib.crc32(chunk, crc)
+    return crc == info.CRC
+
+
+# Bit 3 of the flags: sizes and CRC follow the data instead of the header
+_MASK_USE_DATA_DESCRIPTOR = 0x08
+# Bit 11 of the flags: the file name is UTF-8
+_MASK_UTF_FILENAME = 0x800
+# Extra field record holding ZIP64 sizes and offsets
+_EXTRA_ZIP64 = 0x0001
+
+
+class _ArchiveWriter:
+    """Writes a ZIP archive, copying members of other archives still compressed.
+
+    zipfile can only add members it compresses itself, so the local headers,
+    the data and the central directory are written here. Members are
+    deflated as ZipFile.write() deflates them. ZIP64 is not supported: Office
+    documents do not come near its limits.
+    """
+
+    # Local file header, central directory header and end of central directory
+    LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+    CENTRAL_HEADER = struct.Struct("<4s4B4HL2L5H2L")
+    END_RECORD = struct.Struct("<4s4H2LH")
+    # Offset of the CRC-32 and sizes in a local header
+    CRC_OFFSET = 14
+
+    def __init__(self, path):
+        self.fp = open(path, "wb")
+        self.members = []  # ZipInfos in the order written
+        self._sources = {}  # Path of a copied archive -> open file
+        self._data_start = 0  # Offset of the data of the member being written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self._write_central_directory()
+        finally:
+            self.fp.close()
+            for source in self._sources.values():
+                source.close()
+
+    def write(self, path, arcname):
+        """Add a file, deflated while it is read."""
+        zinfo = zipfile.ZipInfo.from_file(path, arcname)
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+        zinfo.CRC = zinfo.compress_size = zinfo.file_size = 0
+        self._write_local_header(zinfo)
+        compressor = _compressor()
+        crc, size = 0, 0
+        with open(path, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+                self.fp.write(compressor.compress(chunk))
+        self.fp.write(compressor.flush())
+        self._finish_member(zinfo, crc, size)
+
+    def writestr(self, zinfo, data):
+        """Add a member with the given bytes, deflated."""
+        compressor = _compressor()
+        compressed = compressor.compress(data) + compressor.flush()
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+        zinfo.CRC = zlib.crc32(data)
+        zinfo.compress_size = len(compressed)
+        zinfo.file_size = len(data)
+        self._write_local_header(zinfo)
+        self.fp.write(compressed)
+        self._check_limits(zinfo)
+        self.members.append(zinfo)
+
+    def copy(self, archive, info):
+        """Add a member of another archive without recompressing it.
+
+        Args:
+            archive: Path of the archive info was read from
+            info: ZipInfo of the member
+        """
+        source = self._sources.get(archive)
+        if source is None:
+            source = self._sources[archive] = open(archive, "rb")
+
+        # The data follows the local header, whose extra field may differ from
+        # the one in the central directory
+        source.seek(info.header_offset)
+        header = source.read(self.LOCAL_HEADER.size)
+        if len(header) != self.LOCAL_HEADER.size or header[:4] != b"PK\003\004":
+            raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+        name_length, extra_length = struct.unpack("<HH", header[26:30])
+        source.seek(name_length, io.SEEK_CUR)
+        local_extra = source.read(extra_length)
+
+        zinfo = zipfile.ZipInfo(info.filename, info.date_time)
+        zinfo.compress_type = info.compress_type
+        zinfo.flag_bits = info.flag_bits & ~_MASK_USE_DATA_DESCRIPTOR
+        zinfo.comment = info.comment
+        zinfo.extra = _strip_zip64(info.extra)
+        zinfo.create_system = info.create_system
+        zinfo.create_version = info.create_version
+        zinfo.extract_version = info.extract_version
+        zinfo.internal_attr = info.internal_attr
+        zinfo.external_attr = info.external_attr
+        zinfo.CRC = info.CRC
+        zinfo.compress_size = info.compress_size
+        zinfo.file_size = info.file_size
+
+        self._write_local_header(zinfo, extra=_strip_zip64(local_extra))
+        remaining = info.compress_size
+        while remaining:
+            chunk = source.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                raise zipfile.BadZipFile(f"Truncated member {info.filename}")
+            self.fp.write(chunk)
+            remaining -= len(chunk)
+        self._check_limits(zinfo)
+        self.members.append(zinfo)
+
+    def _write_local_header(self, zinfo, extra=b""):
+        """Write the local header of a member; its CRC and sizes may follow."""
+        zinfo.header_offset = self.fp.tell()
+        if zinfo.compress_type == zipfile.ZIP_DEFLATED:
+            zinfo.extract_version = max(zinfo.extract_version, 20)
+        filename = self._encode_name(zinfo)
+        self.fp.write(
+            self.LOCAL_HEADER.pack(
+                b"PK\003\004",
+                zinfo.extract_version,
+                0,
+                zinfo.flag_bits,
+                zinfo.compress_type,
+                *_dos_time(zinfo.date_time),
+                zinfo.CRC,
+                zinfo.compress_size,
+                zinfo.file_size,
+                len(filename),
+                len(extra),
+            )
+        )
+        self.fp.write(filename)
+        self.fp.write(extra)
+        self._data_start = self.fp.tell()
+
+    def _finish_member(self, zinfo, crc, size):
+        """Fill in the CRC and sizes of the member whose data was just written."""
+        end = self.fp.tell()
+        zinfo.CRC = crc
+        zinfo.file_size = size
+        zinfo.compress_size = end - self._data_start
+        self._check_limits(zinfo)
+        self.fp.seek(zinfo.header_offset + self.CRC_OFFSET)
+        self.fp.write(struct.pack("<3L", crc, zinfo.compress_size, size))
+        self.fp.seek(end)
+        self.members.append(zinfo)
+
+    def _check_limits(self, zinfo):
+        if (
+            max(zinfo.header_offset, zinfo.compress_size, zinfo.file_size)
+            >= zipfile.ZIP64_LIMIT
+            or len(self.members) + 1 >= zipfile.ZIP_FILECOUNT_LIMIT
+        ):
+            raise zipfile.LargeZipFile(
+                f"{zinfo.filename}: archive too large (ZIP64 is not supported)"
+            )
+
+    def _write_central_directory(self):
+        start = self.fp.tell()
+        for zinfo in self.members:
+            filename = self._encode_name(zinfo)
+            self.fp.write(
+                self.CENTRAL_HEADER.pack(
+                    b"PK\001\002",
+                    zinfo.create_version,
+                    zinfo.create_system,
+                    zinfo.extract_version,
+                    0,
+                    zinfo.flag_bits,
+                    zinfo.compress_type,
+                    *_dos_time(zinfo.date_time),
+                    zinfo.CRC,
+                    zinfo.compress_size,
+                    zinfo.file_size,
+                    len(filename),
+                    len(zinfo.extra),
+                    len(zinfo.comment),
+                    0,
+                    zinfo.internal_attr,
+                    zinfo.external_attr,
+                    zinfo.header_offset,
+                )
+            )
+            self.fp.write(filename)
+            self.fp.write(zinfo.extra)
+            self.fp.write(zinfo.comment)
+        end = self.fp.tell()
+        if end >= zipfile.ZIP64_LIMIT:
+            raise zipfile.LargeZipFile("archive too large (ZIP64 is not supported)")
+        count = len(self.members)
+        self.fp.write(
+            self.END_RECORD.pack(
+                b"PK\005\006", 0, 0, count, count, end - start, start, 0
+            )
+        )
+
+    def _encode_name(self, zinfo):
+        """Return the file name as stored, setting the UTF-8 flag if needed."""
+        try:
+            return zinfo.filename.encode("ascii")
+        except UnicodeEncodeError:
+            zinfo.flag_bits |= _MASK_UTF_FILENAME
+            return zinfo.filename.encode("utf-8")
+
+
+def _compressor():
+    """Return a raw deflate compressor set up as zipfile's."""
+    return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+
+
+def _dos_time(date_time):
+    """Return (time, date) of a ZipInfo date_time in MS-DOS format."""
+    year, month, day, hour, minute, second = date_time
+    return (
+        hour << 11 | minute << 5 | second // 2,
+        (year - 1980) << 9 | month << 5 | day,
+    )
+
+
+def _strip_zip64(extra):
+    """Return an extra field without its ZIP64 record."""
+    kept = []
+    position = 0
+    while position + 4 <= len(extra):
+        record_id, size = struct.unpack("<HH", extra[position : position + 4])
+        end = position + 4 + size
+        if record_id != _EXTRA_ZIP64:
+            kept.append(extra[position:end])
+        position = end
+    return b"".join(kept)
+
+
 def validate_document(doc_path):
-    """Validate document by converting to HTML with soffice."""
+    """Validate document by converting to HTML with soffice (see soffice.py)."""
+    passed, message = _check_document(doc_path)
+    if message:
+        print(message, file=sys.stderr)
+    return passed
+
+
+def _check_document(doc_path):
+    """Convert a document to HTML with soffice; return (passed, message or None)."""
     # Determine the correct filter based on file extension
     match doc_path.suffix.lower():
         case ".docx":
@@ -100,40 +539,241 @@ def validate_document(doc_path):
 
     with tempfile.TemporaryDirectory() as temp_dir:
         try:
-            result = subprocess.run(
-                [
-                    "soffice",
-                    "--headless",
-                    "--convert-to",
-                    filter_name,
-                    "--outdir",
-                    temp_dir,
-                    str(doc_path),
-                ],
-                capture_output=True,
-                timeout=10,
-                text=True,
-            )
-            if not (Path(temp_dir) / f"{doc_path.stem}.html").exists():
-                error_msg = result.stderr.strip() or "Document validation failed"
-                print(f"Validation error: {error_msg}", file=sys.stderr)
-                return False
-            return True
+            convert(doc_path, temp_dir, filter_name, timeout=10)
+            return True, None
         except FileNotFoundError:
-            print("Warning: soffice not found. Skipping validation.", file=sys.stderr)
-            return True
-        except subprocess.TimeoutExpired:
-            print("Validation error: Timeout during conversion", file=sys.stderr)
-            return False
+            return True, "Warning: soffice not found. Skipping validation."
+        except TimeoutError:
+            return False, "Validation error: Timeout during conversion"
         except Exception as e:
-            print(f"Validation error: {e}", file=sys.stderr)
-            return False
+            return False, f"Validation error: {e}"
+
+
+def read_batch(jobs_file):
+    """Read the jobs of a batch from a JSON Lines file ("-" for stdin).
+
+    Each line is an object with input_dir, output_file and optionally
+    original (see pack_document); blank lines are skipped.
+
+    Raises:
+        ValueError: If a line is not such an object
+    """
+    with contextlib.ExitStack() as stack:
+        if jobs_file == "-":
+            lines = sys.stdin
+        else:
+            lines = stack.enter_context(open(jobs_file, encoding="utf-8"))
+        jobs = []
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+                jobs.append((job["input_dir"], job["output_file"], job.get("original")))
+            except (ValueError, TypeError, KeyError) as e:
+                raise ValueError(f"{jobs_file}: Line {line_number}: invalid job ({e})")
+        return jobs
+
+
+def pack_batch(jobs, results_file=None, workers=1, validate=False, validators=1):
+    """Pack a batch of documents, writing one JSON result per line.
+
+    Args:
+        jobs: (input_dir, output_file) or (input_dir, output_file, original)
+            tuples
+        results_file: Path to write the results to (default: stdout)
+        workers, validate, validators: See pack_documents()
+
+    Returns:
+        bool: True if every document was packed (and is valid, if validated)
+    """
+    success = True
+    with contextlib.ExitStack() as stack:
+        if results_file is None:
+            out = sys.stdout
+        else:
+            out = stack.enter_context(open(results_file, "w", encoding="utf-8"))
+        for result in pack_documents(jobs, workers, validate, validators):
+            success = success and result["status"] in ("packed", "valid")
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+    return success
+
+
+def pack_documents(jobs, workers=1, validate=False, validators=1):
+    """Pack many documents, validating each one as soon as it is written.
+
+    Documents are packed in worker processes if workers > 1. Packed documents
+    are validated in up to validators threads, while the others are still
+    being packed; the shared soffice service (see soffice.py) is started with
+    that many instances if it is not running. Without the service, documents
+    are validated one at a time.
+
+    If a worker process dies, the documents being packed are packed again one
+    at a time in a new pool, and the one whose worker dies again is reported
+    as an error; every job gets exactly one result.
+
+    Args:
+        jobs: (input_dir, output_file) or (input_dir, output_file, original)
+            tuples
+        workers: Number of processes packing documents
+        validate: If True, validates each document with soffice and deletes
+            it if it is invalid
+        validators: Number of documents validated at a time
+
+    Yields:
+        dict: Result of each document, in the order they finish, with
+            input_dir, output_file, status ("packed", "valid", "invalid" or
+            "error"), error and warning messages (or None), and pack_time,
+            validate_time and elapsed (since the batch started) in seconds
+    """
+    started = time.perf_counter()
+    if validate and validators > 1 and not start_service(validators):
+        validators = 1
+
+    workers = max(workers, 1)
+    executor_class = ProcessPoolExecutor if workers > 1 else ThreadPoolExecutor
+    queued = collections.deque(tuple(job) for job in jobs)
+    # Jobs being packed when a worker process died: any of them may have
+    # killed it, so they are packed again one at a time
+    suspects = collections.deque()
+    isolated = None  # Suspect being packed on its own
+    packing = {}  # Future -> job
+    validating = set()
+    pack_executor = executor_class(max_workers=workers)
+    try:
+        with ThreadPoolExecutor(max_workers=max(validators, 1)) as validate_executor:
+            while queued or suspects or packing or validating:
+                # No more jobs are submitted than there are workers, so a
+                # broken pool only takes the jobs being packed down with it
+                if suspects and not packing:
+                    isolated = suspects.popleft()
+                    packing[pack_executor.submit(_pack_batch_job, *isolated)] = isolated
+                while (
+                    queued
+                    and not suspects
+                    and isolated is None
+                    and len(packing) < workers
+                ):
+                    job = queued.popleft()
+                    packing[pack_executor.submit(_pack_batch_job, *job)] = job
+
+                done, _ = wait([*packing, *validating], return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    if future in validating:
+                        validating.remove(future)
+                        result = future.result()
+                    else:
+                        job = packing.pop(future)
+                        try:
+                            result = future.result()
+                        except BrokenProcessPool:
+                            broken = True
+                            if job is not isolated:
+                                suspects.append(job)
+                                continue
+                            result = _batch_result(*job[:2])
+                            result["status"] = "error"
+                            result["error"] = (
+                                "The worker process packing the document died"
+                            )
+                        except Exception as e:
+                            result = _batch_result(*job[:2])
+                            result["status"] = "error"
+                            result["error"] = str(e) or type(e).__name__
+                        if job is isolated:
+                            isolated = None
+                        if validate and result["status"] == "packed":
+                            validating.add(
+                                validate_executor.submit(_validate_batch_job, result)
+                            )
+                            continue
+                    result["elapsed"] = round(time.perf_counter() - started, 6)
+                    yield result
+
+                if broken:
+                    # The other jobs of the pool fail as well; pack them again
+                    suspects.extend(packing.values())
+                    packing.clear()
+                    pack_executor.shutdown(wait=False)
+                    pack_executor = executor_class(max_workers=workers)
+    finally:
+        pack_executor.shutdown()
+
+
+def _pack_batch_job(input_dir, output_file, original=None):
+    """Pack one document of a batch and return its result."""
+    result = _batch_result(input_dir, output_file)
+    start = time.perf_counter()
+    try:
+        pack_document(input_dir, output_file, original=original)
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e) or type(e).__name__
+    result["pack_time"] = round(time.perf_counter() - start, 6)
+    return result
+
+
+def _batch_result(input_dir, output_file):
+    """Return the result of a batch job that has not run yet."""
+    return {
+        "input_dir": str(input_dir),
+        "output_file": str(output_file),
+        "status": "packed",
+        "error": None,
+        "warning": None,
+        "pack_time": None,
+        "validate_time": None,
+    }
+
+
+def _validate_batch_job(result):
+    """Validate a packed document of a batch, deleting it if it is invalid."""
+    output_file = Path(result["output_file"])
+    start = time.perf_counter()
+    passed, message = _check_document(output_file)
+    result["validate_time"] = round(time.perf_counter() - start, 6)
+    if passed:
+        result["status"] = "valid"
+        result["warning"] = message
+    else:
+        output_file.unlink(missing_ok=True)  # Delete the corrupt file
+        result["status"] = "invalid"
+        result["error"] = message
+    return result
 
 
 def condense_xml(xml_file):
-    """Strip unnecessary whitespace and remove comments."""
-    with open(xml_file, "r", encoding="utf-8") as f:
-        dom = defusedxml.minidom.parse(f)
+    """Strip unnecessary whitespace and remove comments from a file in place."""
+    xml_file = Path(xml_file)
+    xml_file.write_bytes(condense_xml_data(xml_file.read_bytes()))
+
+
+def condense_xml_data(data):
+    """Return XML bytes with unnecessary whitespace and comments removed.
+
+    Whitespace-only text and comments are kept inside elements whose name ends
+    with ":t" (e.g. w:t), so text content is never changed.
+    """
+    try:
+        return _format_xml(data, "UTF-8", condense=True)
+    except _UseMinidom:
+        return _condense_xml_minidom(data)
+
+
+def pretty_xml_data(data):
+    """Return XML bytes pretty-printed as unpack.py writes them (ASCII, with
+    non-ASCII characters as character references, indented by two spaces)."""
+    try:
+        return _format_xml(data, "ascii", indent="  ", newl="\n")
+    except _UseMinidom:
+        return _pretty_xml_minidom(data)
+
+
+def _condense_xml_minidom(data):
+    """condense_xml_data() on a minidom tree (slow; used for DTDs and CDATA)."""
+    dom = defusedxml.minidom.parseString(data)
 
     # Process each element to remove whitespace and comments
     for element in dom.getElementsByTagName("*"):
@@ -150,9 +790,200 @@ def condense_xml(xml_file):
             ) or child.nodeType == child.COMMENT_NODE:
                 element.removeChild(child)
 
-    # Write back the condensed XML
-    with open(xml_file, "wb") as f:
-        f.write(dom.toxml(encoding="UTF-8"))
+    return dom.toxml(encoding="UTF-8")
+
+
+def _pretty_xml_minidom(data):
+    """pretty_xml_data() on a minidom tree (slow; used for DTDs and CDATA)."""
+    dom = defusedxml.minidom.parseString(data)
+    return dom.toprettyxml(indent="  ", encoding="ascii")
+
+
+class _UseMinidom(Exception):
+    """Raised for documents _format_xml() cannot lay out exactly like minidom."""
+
+
+def _minidom_escapes():
+    """Return the (character, replacement) pairs minidom writes for text and
+    for attribute values. They differ between Python versions, so they are
+    read from minidom's own output."""
+    document = xml.dom.minidom.Document()
+    text_escapes, attribute_escapes = [], []
+    for char in '&<>"\r\n\t':  # "&" first: the others contain "&"
+        element = document.createElement("a")
+        element.setAttribute("b", char)
+        element.appendChild(document.createTextNode(char))
+        start_tag, text = element.toxml().removesuffix("</a>").split(">", 1)
+        attribute = start_tag.removeprefix('<a b="').removesuffix('"')
+        if text != char:
+            text_escapes.append((char, text))
+        if attribute != char:
+            attribute_escapes.append((char, attribute))
+    return text_escapes, attribute_escapes
+
+
+_TEXT_ESCAPES, _ATTRIBUTE_ESCAPES = _minidom_escapes()
+
+XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
+
+
+def _escape(data, escapes):
+    for char, replacement in escapes:
+        if char in data:
+            data = data.replace(char, replacement)
+    return data
+
+
+class _OpenElement:
+    """An element being written by _format_xml()."""
+
+    __slots__ = ("element", "qname", "indent", "keep", "text", "opened", "last")
+
+    def __init__(self, element, qname, indent, keep):
+        self.element = element
+        self.qname = qname
+        self.indent = indent
+        self.keep = keep  # Keep whitespace-only text and comments
+        self.text = None  # Text child held back while it may be the only child
+        self.opened = False  # Whether ">" has been written
+        self.last = None  # Last child node read, whose tail is the next text
+
+
+def _format_xml(data, encoding, indent="", newl="", condense=False):
+    """Serialize XML bytes exactly as minidom's writexml() would.
+
+    The document is streamed through lxml instead of being built as a minidom
+    tree, which is several times faster and needs a fraction of the memory.
+    As with minidom, namespace declarations are written before the other
+    attributes, a text node that is the only child of its element is written
+    inline, and any other text node is written on its own line.
+
+    Args:
+        data: XML bytes
+        encoding: Encoding of the output and its XML declaration
+        indent: Indentation added per level
+        newl: Written after each node
+        condense: Remove whitespace-only text and comments from elements,
+            except from elements whose name ends with ":t"
+
+    Raises:
+        _UseMinidom: If the document has a DOCTYPE, CDATA sections, is not
+            UTF-8 or uses prefixes that cannot be told apart in lxml
+    """
+    if (
+        b"<!DOCTYPE" in data
+        or b"<![CDATA[" in data
+        or b"\x00" in data[:4]
+        or data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE))
+    ):
+        # Left to defusedxml, which rejects entity declarations
+        raise _UseMinidom()
+
+    out = io.StringIO()
+    write = out.write
+    write(f'<?xml version="1.0" encoding="{encoding}"?>{newl}')
+    stack = []
+    declarations = []  # Namespace declarations of the next element
+    scopes = [({"xml": XML_NAMESPACE}, {XML_NAMESPACE: "xml"})]  # prefix <-> URI
+
+    def add_text(parent, text):
+        if condense and not parent.keep and not text.strip():
+            return
+        if parent.opened:
+            write(_escape(parent.indent + indent + text + newl, _TEXT_ESCAPES))
+        elif parent.text is None:
+            parent.text = text
+        else:
+            open_parent(parent)
+            add_text(parent, text)
+
+    def open_parent(parent):
+        if not parent.opened:
+            write(">" + newl)
+            parent.opened = True
+            if parent.text is not None:
+                add_text(parent, parent.text)
+                parent.text = None
+
+    def add_text_before(parent):
+        text = parent.element.text if parent.last is None else parent.last.tail
+        if text:
+            add_text(parent, text)
+
+    events = etree.iterparse(
+        io.BytesIO(data),
+        events=("start-ns", "start", "end", "comment", "pi"),
+        resolve_entities=False,
+        no_network=True,
+        load_dtd=False,
+    )
+    for event, node in events:
+        if event == "start-ns":
+            declarations.append(node)
+            continue
+
+        parent = stack[-1] if stack else None
+        if parent is not None and event != "end":
+            add_text_before(parent)
+            parent.last = node
+            if condense and event == "comment" and not parent.keep:
+                continue
+            open_parent(parent)
+        node_indent = parent.indent + indent if parent is not None else ""
+
+        if event == "comment":
+            write(f"{node_indent}<!--{node.text}-->{newl}")
+        elif event == "pi":
+            write(f"{node_indent}<?{node.target} {node.text or ''}?>{newl}")
+        elif event == "start":
+            prefixes, uris = scopes[-1]
+            if declarations:
+                prefixes = dict(prefixes)
+                prefixes.update((p, uri) for p, uri in declarations if p)
+                uris = {}
+                for p, uri in prefixes.items():
+                    uris[uri] = None if uri in uris else p  # None: ambiguous
+            scopes.append((prefixes, uris))
+
+            tag = node.tag
+            if tag[0] == "{":
+                tag = tag.split("}", 1)[1]
+            qname = f"{node.prefix}:{tag}" if node.prefix else tag
+            write(node_indent + "<" + qname)
+            for p, uri in declarations:
+                name = f"xmlns:{p}" if p else "xmlns"
+                write(f' {name}="{_escape(uri, _ATTRIBUTE_ESCAPES)}"')
+            declarations.clear()
+            for name, value in node.attrib.items():
+                if name[0] == "{":
+                    uri, name = name[1:].split("}", 1)
+                    if not uris.get(uri):
+                        raise _UseMinidom()
+                    name = f"{uris[uri]}:{name}"
+                write(f' {name}="{_escape(value, _ATTRIBUTE_ESCAPES)}"')
+
+            keep = qname.endswith(":t")
+            stack.append(_OpenElement(node, qname, node_indent, keep))
+        else:  # end
+            current = stack.pop()
+            scopes.pop()
+            add_text_before(current)
+            if current.opened:
+                write(f"{current.indent}</{current.qname}>{newl}")
+            elif current.text is not None:
+                text = _escape(current.text, _TEXT_ESCAPES)
+                write(f">{text}</{current.qname}>{newl}")
+            else:
+                write("/>" + newl)
+
+            # Free the nodes already written; the tail is the parent's text
+            node.clear(keep_tail=True)
+            if stack:
+                stack[-1].last = node
+                while node.getprevious() is not None:
+                    del stack[-1].element[0]
+
+    return out.getvalue().encode(encoding, "xmlcharrefreplace")
 
 
 if __name__ == "__main__":
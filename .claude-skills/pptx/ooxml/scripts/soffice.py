@@ -0,0 +1,773 @@
+#!/usr/bin/env python3
+"""
+Shared LibreOffice service for converting and recalculating Office files.
+
+Cold-starting soffice takes most of the time of a single conversion. The
+service keeps one or more headless soffice instances running, each with its
+own profile, and drives them over a UNO pipe. Jobs from any number of clients
+are queued and run by the first free instance. Idle instances are
+health-checked, instances that crash or time out are restarted, and the
+service exits after a while without jobs.
+
+Scripts use convert() and recalculate(), which start the service on first use.
+If it cannot be started (no Python that can import uno, no Unix sockets, or
+SOFFICE_SERVICE=0 in the environment) they run soffice once per job instead.
+
+Usage:
+    python soffice.py start [--instances N] [--idle-timeout SECONDS]
+    python soffice.py serve [--instances N] [--idle-timeout SECONDS]
+    python soffice.py status
+    python soffice.py stop
+
+start runs the service in the background; serve runs it in the foreground,
+and needs a Python that can import uno.
+"""
+
+import argparse
+import contextlib
+import functools
+import getpass
+import json
+import os
+import platform
+import queue
+import shutil
+import signal
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+# Socket, lock, log and soffice profiles of the service
+STATE_DIR = Path(
+    os.environ.get("SOFFICE_SERVICE_DIR")
+    or Path(tempfile.gettempdir()) / f"soffice-service-{getpass.getuser()}"
+)
+DEFAULT_INSTANCES = 1
+IDLE_TIMEOUT = 600  # Seconds without jobs before the service exits
+HEALTH_CHECK_INTERVAL = 30  # Seconds between checks of an idle instance
+HEALTH_CHECK_TIMEOUT = 10
+START_TIMEOUT = 60  # Seconds to wait for soffice or the service to accept connections
+
+# Pythons that may be able to import uno: system packages (python3-uno) are
+# built for the system python3, other installs bundle their own interpreter
+UNO_PYTHONS = [
+    "/usr/bin/python3",
+    "/usr/lib/libreoffice/program/python",
+    "/opt/libreoffice/program/python",
+    "/Applications/LibreOffice.app/Contents/Resources/python",
+]
+
+# Document service -> PDF export filter, for "pdf" targets without a filter
+PDF_FILTERS = [
+    ("com.sun.star.presentation.PresentationDocument", "impress_pdf_Export"),
+    ("com.sun.star.sheet.SpreadsheetDocument", "calc_pdf_Export"),
+    ("com.sun.star.drawing.DrawingDocument", "draw_pdf_Export"),
+    ("com.sun.star.text.TextDocument", "writer_pdf_Export"),
+]
+
+RECALC_MACRO = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE script:module PUBLIC "-//OpenOffice.org//DTD OfficeDocument 1.0//EN" "module.dtd">
+<script:module xmlns:script="http://openoffice.org/2000/script" script:name="Module1" script:language="StarBasic">
+    Sub RecalculateAndSave()
+      ThisComponent.calculateAll()
+      ThisComponent.store()
+      ThisComponent.close(True)
+    End Sub
+</script:module>"""
+
+
+class OfficeError(RuntimeError):
+    """A document could not be converted or recalculated."""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared LibreOffice service")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command, help_text in [
+        ("start", "Start the service in the background"),
+        ("serve", "Run the service in the foreground"),
+    ]:
+        subparser = subparsers.add_parser(command, help=help_text)
+        subparser.add_argument(
+            "--instances",
+            type=int,
+            default=DEFAULT_INSTANCES,
+            help=f"Number of soffice instances (default: {DEFAULT_INSTANCES})",
+        )
+        subparser.add_argument(
+            "--idle-timeout",
+            type=float,
+            default=IDLE_TIMEOUT,
+            help=f"Seconds without jobs before exiting (default: {IDLE_TIMEOUT})",
+        )
+    subparsers.add_parser("status", help="Show the service's instances and queue")
+    subparsers.add_parser("stop", help="Stop the service")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        sys.exit(serve(args.instances, args.idle_timeout))
+    if args.command == "start" and not start_service(args.instances, args.idle_timeout):
+        log_file = STATE_DIR / "service.log"
+        sys.exit(f"Error: could not start the service (see {log_file})")
+
+    try:
+        reply = _send(
+            {"command": "status" if args.command == "start" else args.command}
+        )
+    except (EOFError, OSError):
+        reply = None  # Stopped while answering
+    if reply is None:
+        sys.exit("Error: the service is not running")
+    print(json.dumps(reply, indent=2))
+
+
+# ==================== Client ====================
+
+
+def convert(input_file, output_dir, convert_to, timeout=None):
+    """Convert a document as soffice --convert-to does.
+
+    Args:
+        input_file: Path to the document
+        output_dir: Directory to write <stem>.<extension> to (created if needed)
+        convert_to: Target as for soffice --convert-to: an extension, optionally
+            followed by a filter name and filter options (e.g. "pdf",
+            "html:HTML")
+        timeout: Seconds the conversion may take (None = no limit)
+
+    Returns:
+        Path: The converted file
+
+    Raises:
+        FileNotFoundError: If soffice is not installed
+        TimeoutError: If the conversion took longer than timeout
+        OfficeError: If the document could not be converted
+    """
+    input_file = Path(input_file).resolve()
+    output_dir = Path(output_dir).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_file = output_dir / f"{input_file.stem}.{convert_to.split(':')[0]}"
+
+    request = {
+        "command": "convert",
+        "input_file": str(input_file),
+        "output_file": str(output_file),
+        "convert_to": convert_to,
+        "timeout": timeout,
+    }
+    if _run_job(request) is None:
+        result = _run_soffice(
+            ["--convert-to", convert_to, "--outdir", str(output_dir), str(input_file)],
+            timeout,
+        )
+        if not output_file.exists():
+            raise OfficeError(
+                result.stderr.strip() or f"Could not convert {input_file.name}"
+            )
+    return output_file
+
+
+def recalculate(input_file, timeout=None):
+    """Recalculate all formulas of a spreadsheet and save it in place.
+
+    Args:
+        input_file: Path to the spreadsheet
+        timeout: Seconds the recalculation may take (None = no limit)
+
+    Raises:
+        FileNotFoundError: If soffice is not installed
+        TimeoutError: If the spreadsheet was not recalculated and saved within
+            timeout, by the service or by soffice run on its own
+        OfficeError: If the spreadsheet could not be recalculated
+    """
+    input_file = Path(input_file).resolve()
+    request = {
+        "command": "recalculate",
+        "input_file": str(input_file),
+        "timeout": timeout,
+    }
+    if _run_job(request) is None:
+        _recalculate_with_macro(input_file, timeout)
+
+
+def start_service(instances=DEFAULT_INSTANCES, idle_timeout=IDLE_TIMEOUT):
+    """Start the service in the background, unless it is already running.
+
+    A running service keeps its number of instances.
+
+    Args:
+        instances: Number of soffice instances
+        idle_timeout: Seconds without jobs before the service exits
+
+    Returns:
+        bool: True if the service is running
+    """
+    connection = _connect(True, instances, idle_timeout)
+    if connection is None:
+        return False
+    connection.close()
+    return True
+
+
+def _run_job(request):
+    """Run a job in the service; return its reply, or None if it is unavailable."""
+    deadline = time.monotonic() + START_TIMEOUT
+    try:
+        reply = _send(request, start=True)
+        # A service that is stopping takes no more jobs: wait for a new one
+        while reply is not None and reply.get("stopping"):
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.1)
+            reply = _send(request, start=True)
+    except (EOFError, OSError) as e:
+        raise OfficeError(f"Lost connection to the soffice service: {e}") from e
+    if reply is not None and "error" in reply:
+        if reply.get("timeout"):
+            raise TimeoutError(reply["error"])
+        raise OfficeError(reply["error"])
+    return reply
+
+
+def _send(request, start=False):
+    """Send a request to the service and return its reply (None if not running)."""
+    connection = _connect(start=start)
+    if connection is None:
+        return None
+    with connection:
+        connection.send_bytes(json.dumps(request).encode())
+        return json.loads(connection.recv_bytes())
+
+
+def _connect(start=False, instances=DEFAULT_INSTANCES, idle_timeout=IDLE_TIMEOUT):
+    """Connect to the service, starting it if requested; None if unavailable."""
+    if os.environ.get("SOFFICE_SERVICE") == "0" or not hasattr(socket, "AF_UNIX"):
+        return None
+    if not _state_dir_is_private():
+        return None
+
+    address = str(STATE_DIR / "service.sock")
+    with contextlib.suppress(OSError):
+        return Client(address, family="AF_UNIX")
+    if not start:
+        return None
+
+    process = _spawn_service(instances, idle_timeout)
+    if process is None:
+        return None
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        with contextlib.suppress(OSError):
+            return Client(address, family="AF_UNIX")
+        if process.poll() is not None:
+            # Another client's service may have won the race for the lock
+            with contextlib.suppress(OSError):
+                return Client(address, family="AF_UNIX")
+            return None
+        time.sleep(0.05)
+    return None
+
+
+def _spawn_service(instances, idle_timeout):
+    """Start the service in the background; return the process, or None."""
+    if shutil.which("soffice") is None:
+        return None
+    python = _find_uno_python()
+    if python is None:
+        return None
+    with open(STATE_DIR / "service.log", "ab") as log:
+        return subprocess.Popen(
+            [
+                python,
+                str(Path(__file__).resolve()),
+                "serve",
+                "--instances",
+                str(instances),
+                "--idle-timeout",
+                str(idle_timeout),
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+
+
+@functools.cache
+def _find_uno_python():
+    """Return a Python interpreter that can import uno, or None.
+
+    Each candidate is probed in a subprocess, so the answer (None included)
+    is looked up once per process.
+    """
+    candidates = [sys.executable, *UNO_PYTHONS]
+    for python in dict.fromkeys(candidates):
+        if not python or not os.path.exists(python):
+            continue
+        with contextlib.suppress(OSError, subprocess.TimeoutExpired):
+            result = subprocess.run(
+                [python, "-c", "import uno"], capture_output=True, timeout=10
+            )
+            if result.returncode == 0:
+                return python
+    return None
+
+
+def _state_dir_is_private():
+    """Create STATE_DIR if needed; return True if only the current user can use it."""
+    with contextlib.suppress(FileExistsError):
+        STATE_DIR.mkdir(mode=0o700, parents=True)
+    info = STATE_DIR.lstat()
+    return (
+        stat.S_ISDIR(info.st_mode)
+        and info.st_uid == os.getuid()
+        and not info.st_mode & 0o077
+    )
+
+
+def _run_soffice(args, timeout):
+    """Run soffice once for a job, as if there were no service."""
+    try:
+        return subprocess.run(
+            ["soffice", "--headless", *args],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired as e:
+        raise TimeoutError(f"soffice did not finish within {timeout}s") from e
+
+
+def _recalculate_with_macro(input_file, timeout):
+    """Recalculate a spreadsheet by running soffice with a Basic macro.
+
+    soffice may keep running after the macro has saved the spreadsheet: a
+    timeout only raises TimeoutError if the file was not saved.
+    """
+    if platform.system() == "Darwin":
+        macro_dir = Path(
+            "~/Library/Application Support/LibreOffice/4/user/basic/Standard"
+        ).expanduser()
+    else:
+        macro_dir = Path("~/.config/libreoffice/4/user/basic/Standard").expanduser()
+    macro_file = macro_dir / "Module1.xba"
+
+    if not macro_file.exists() or "RecalculateAndSave" not in macro_file.read_text():
+        if not macro_dir.exists():
+            # Let soffice create its user profile first
+            subprocess.run(
+                ["soffice", "--headless", "--terminate_after_init"],
+                capture_output=True,
+                timeout=10,
+            )
+            macro_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            macro_file.write_text(RECALC_MACRO)
+        except OSError as e:
+            raise OfficeError("Failed to setup LibreOffice macro") from e
+
+    modified = input_file.stat().st_mtime_ns
+    try:
+        result = _run_soffice(
+            [
+                "--norestore",
+                "vnd.sun.star.script:Standard.Module1.RecalculateAndSave"
+                "?language=Basic&location=application",
+                str(input_file),
+            ],
+            timeout,
+        )
+    except TimeoutError:
+        if input_file.stat().st_mtime_ns == modified:
+            raise
+        return
+
+    if result.returncode != 0:
+        error_msg = result.stderr or "Unknown error during recalculation"
+        if "Module1" in error_msg or "RecalculateAndSave" not in error_msg:
+            raise OfficeError("LibreOffice macro not configured properly")
+        raise OfficeError(error_msg)
+
+
+# ==================== Service ====================
+
+
+def serve(instances=DEFAULT_INSTANCES, idle_timeout=IDLE_TIMEOUT):
+    """Run the service until it is stopped or idle; return the exit status."""
+    import fcntl
+
+    if shutil.which("soffice") is None:
+        _log("soffice not found")
+        return 1
+    if not _state_dir_is_private():
+        _log(f"{STATE_DIR} is not private to the current user")
+        return 1
+
+    lock = open(STATE_DIR / "service.lock", "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        _log("Another service is running")
+        lock.close()
+        return 0
+
+    address = STATE_DIR / "service.sock"
+    address.unlink(missing_ok=True)  # Left by a service that was killed
+    with lock, Listener(str(address), family="AF_UNIX") as listener:
+        service = OfficeService(
+            [OfficeInstance(i, STATE_DIR / f"profile-{i}") for i in range(instances)],
+            idle_timeout,
+            str(address),
+        )
+        signal.signal(signal.SIGTERM, lambda signum, frame: service.stop())
+        _log(f"Serving {instances} instance(s) on {address}")
+        service.serve(listener)
+    _log("Stopped")
+    return 0
+
+
+class OfficeService:
+    """Queue of jobs run by a pool of soffice instances."""
+
+    def __init__(self, instances, idle_timeout, address):
+        self.instances = instances
+        self.idle_timeout = idle_timeout
+        self.address = address
+        self.jobs = queue.Queue()
+        self.pending = 0  # Jobs queued or running
+        self.last_job = time.monotonic()
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+
+    def serve(self, listener):
+        """Accept requests until stop() is called or the service is idle."""
+        for instance in self.instances:
+            threading.Thread(target=self._work, args=(instance,), daemon=True).start()
+        threading.Thread(target=self._watch_idle, daemon=True).start()
+
+        while not self.stopping.is_set():
+            try:
+                connection = listener.accept()
+            except OSError:
+                continue
+            threading.Thread(
+                target=self._handle, args=(connection,), daemon=True
+            ).start()
+
+        # Let running jobs finish, then close the instances
+        for _ in self.instances:
+            self.jobs.put(None)
+        for instance in self.instances:
+            instance.stop()
+
+    def stop(self):
+        with self.lock:
+            self.stopping.set()
+        # Wake up listener.accept()
+        with contextlib.suppress(OSError):
+            Client(self.address, family="AF_UNIX").close()
+
+    def status(self):
+        return {
+            "pid": os.getpid(),
+            "pending": self.pending,
+            "idle_timeout": self.idle_timeout,
+            "instances": [instance.status() for instance in self.instances],
+        }
+
+    def _handle(self, connection):
+        with connection:
+            try:
+                request = json.loads(connection.recv_bytes())
+            except (EOFError, OSError, ValueError):
+                return
+            command = request.get("command")
+            if command == "status":
+                reply = self.status()
+            elif command == "stop":
+                reply = {"stopping": True}
+                self.stop()
+            elif command in ("convert", "recalculate"):
+                reply = self._submit(request)
+            else:
+                reply = {"error": f"Unknown command: {command}"}
+            with contextlib.suppress(OSError):
+                connection.send_bytes(json.dumps(reply).encode())
+
+    def _submit(self, request):
+        """Queue a job and wait for its reply."""
+        job = _Job(request)
+        with self.lock:
+            if self.stopping.is_set():
+                return {"error": "The soffice service is stopping", "stopping": True}
+            self.pending += 1
+        self.jobs.put(job)
+        job.done.wait()
+        with self.lock:
+            self.pending -= 1
+            self.last_job = time.monotonic()
+        return job.reply
+
+    def _work(self, instance):
+        """Run jobs on one instance, checking its health while idle."""
+        try:
+            instance.start()
+        except Exception as e:
+            _log(f"Instance {instance.index}: {e}")
+
+        while True:
+            try:
+                job = self.jobs.get(timeout=HEALTH_CHECK_INTERVAL)
+            except queue.Empty:
+                if not self.stopping.is_set():
+                    instance.check_health()
+                continue
+            if job is None:
+                return
+            try:
+                job.reply = instance.run(job.request)
+            finally:
+                job.done.set()
+
+    def _watch_idle(self):
+        while not self.stopping.wait(1):
+            with self.lock:
+                if self.pending or time.monotonic() - self.last_job < self.idle_timeout:
+                    continue
+                # Under the lock, so no job is accepted after this
+                self.stopping.set()
+            _log(f"No jobs for {self.idle_timeout}s")
+            self.stop()
+
+
+class OfficeInstance:
+    """One headless soffice process with its own profile, driven over UNO."""
+
+    def __init__(self, index, profile_dir):
+        self.index = index
+        self.profile_dir = profile_dir
+        self.pipe_name = f"soffice-service-{os.getpid()}-{index}"
+        self.process = None
+        self.desktop = None
+        self.jobs = 0
+        self.restarts = 0
+
+    @property
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def status(self):
+        return {
+            "index": self.index,
+            "pid": self.process.pid if self.running else None,
+            "jobs": self.jobs,
+            "restarts": self.restarts,
+        }
+
+    def run(self, request):
+        """Run a job and return its reply; restart the instance if it crashed."""
+        self.jobs += 1
+        for attempt in range(2):
+            try:
+                if not self.running:
+                    self.start()
+                output = _call_with_timeout(
+                    lambda: self._run(request), request.get("timeout")
+                )
+                return {} if output is None else {"output_file": output}
+            except TimeoutError:
+                _log(f"Instance {self.index}: job timed out, restarting")
+                self.kill()
+                return {
+                    "error": f"soffice did not finish within {request['timeout']}s",
+                    "timeout": True,
+                }
+            except Exception as e:
+                if self.running or attempt:
+                    return {"error": str(e) or type(e).__name__}
+                # soffice crashed during the job: run it again on a new process
+                _log(f"Instance {self.index}: soffice exited, restarting")
+                self.restarts += 1
+
+    def check_health(self):
+        """Restart the instance if soffice exited or stopped responding."""
+        if self.process is None:
+            return
+        try:
+            if not self.running:
+                raise OfficeError(f"soffice exited with code {self.process.returncode}")
+            _call_with_timeout(
+                lambda: self.desktop.getComponents(), HEALTH_CHECK_TIMEOUT
+            )
+        except Exception as e:
+            _log(f"Instance {self.index}: health check failed ({e}), restarting")
+            self.kill()
+            self.restarts += 1
+            with contextlib.suppress(Exception):
+                self.start()
+
+    def start(self):
+        """Start soffice and connect to it."""
+        import uno
+
+        self.kill()
+        self.process = subprocess.Popen(
+            [
+                "soffice",
+                "--headless",
+                "--invisible",
+                "--nologo",
+                "--nodefault",
+                "--norestore",
+                "--nolockcheck",
+                f"-env:UserInstallation={self.profile_dir.as_uri()}",
+                f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext",
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context
+        )
+        deadline = time.monotonic() + START_TIMEOUT
+        while True:
+            if not self.running:
+                raise OfficeError(
+                    f"soffice exited with code {self.process.returncode} on startup"
+                )
+            try:
+                context = resolver.resolve(
+                    f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext"
+                )
+                break
+            except Exception:
+                if time.monotonic() > deadline:
+                    self.kill()
+                    raise OfficeError(f"soffice did not start within {START_TIMEOUT}s")
+                time.sleep(0.1)
+        self.desktop = context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.frame.Desktop", context
+        )
+        _log(f"Instance {self.index}: started soffice (pid {self.process.pid})")
+
+    def stop(self):
+        """Close soffice, killing it if it does not exit."""
+        if self.running:
+            with contextlib.suppress(Exception):
+                _call_with_timeout(self.desktop.terminate, HEALTH_CHECK_TIMEOUT)
+            with contextlib.suppress(subprocess.TimeoutExpired):
+                self.process.wait(HEALTH_CHECK_TIMEOUT)
+        self.kill()
+
+    def kill(self):
+        if self.running:
+            self.process.kill()
+            self.process.wait()
+        self.desktop = None
+
+    def _run(self, request):
+        document = self._load(request["input_file"])
+        try:
+            if request["command"] == "recalculate":
+                document.calculateAll()
+                document.store()
+                return None
+
+            # "ext", "ext:filter" or "ext:filter:options", as soffice --convert-to
+            extension, _, filter_spec = request["convert_to"].partition(":")
+            filter_name, _, filter_options = filter_spec.partition(":")
+            if not filter_name:
+                if extension != "pdf":
+                    raise OfficeError(
+                        f"No filter given for {extension}, e.g. html:HTML"
+                    )
+                filter_name = next(
+                    (
+                        name
+                        for service, name in PDF_FILTERS
+                        if document.supportsService(service)
+                    ),
+                    "writer_pdf_Export",
+                )
+            properties = {"FilterName": filter_name, "Overwrite": True}
+            if filter_options:
+                properties["FilterOptions"] = filter_options
+            document.storeToURL(
+                Path(request["output_file"]).as_uri(), _properties(**properties)
+            )
+            return request["output_file"]
+        finally:
+            with contextlib.suppress(Exception):
+                document.close(True)
+
+    def _load(self, path):
+        document = self.desktop.loadComponentFromURL(
+            Path(path).as_uri(), "_blank", 0, _properties(Hidden=True)
+        )
+        if document is None:
+            raise OfficeError(f"Could not open {Path(path).name}")
+        return document
+
+
+class _Job:
+    __slots__ = ("request", "reply", "done")
+
+    def __init__(self, request):
+        self.request = request
+        self.reply = None
+        self.done = threading.Event()
+
+
+def _properties(**values):
+    """Return a tuple of com.sun.star.beans.PropertyValue."""
+    import uno
+
+    properties = []
+    for name, value in values.items():
+        prop = uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+        prop.Name = name
+        prop.Value = value
+        properties.append(prop)
+    return tuple(properties)
+
+
+def _call_with_timeout(function, timeout):
+    """Call function in a thread; raise TimeoutError if it is still running
+    after timeout seconds (None = no limit). The caller must then stop
+    whatever the call is blocked on.
+    """
+    result = {}
+
+    def target():
+        try:
+            result["value"] = function()
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError
+    if "error" in result:
+        raise result["error"]
+    return result.get("value")
+
+
+def _log(message):
+    print(
+        f"{time.strftime('%Y-%m-%d %H:%M:%S')} {message}", file=sys.stderr, flush=True
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,53 @@
 """
 Validation modules for Word document processing.
+
+Set OOXML_SCHEMA_WARM_START=1 to start compiling all bundled XSD schemas in a
+background thread as soon as this package is imported.
 """
 
-from .base import BaseSchemaValidator
+import os
+
+from .base import SCHEMAS_DIR, BaseSchemaValidator
+from .cache import ValidationSnapshot, schema_registry
 from .docx import DOCXSchemaValidator
 from .pptx import PPTXSchemaValidator
 from .redlining import RedliningValidator
+from .report import (
+    CheckFailure,
+    CheckResult,
+    ValidationError,
+    ValidationReport,
+    format_profile,
+)
+
+
+def warm_start_schemas():
+    """Compile all bundled XSD schemas in a background thread.
+
+    The schemas used directly by the validators are compiled first.
+
+    Returns:
+        threading.Thread: The started daemon thread
+    """
+    mapped = dict.fromkeys(BaseSchemaValidator.SCHEMA_MAPPINGS.values())
+    return schema_registry.warm_start(
+        SCHEMAS_DIR, first=[SCHEMAS_DIR / schema for schema in mapped]
+    )
+
+
+if os.environ.get("OOXML_SCHEMA_WARM_START", "").lower() in {"1", "true", "yes"}:
+    warm_start_schemas()
 
 __all__ = [
     "BaseSchemaValidator",
+    "CheckFailure",
+    "CheckResult",
     "DOCXSchemaValidator",
     "PPTXSchemaValidator",
     "RedliningValidator",
+    "ValidationError",
+    "ValidationReport",
+    "ValidationSnapshot",
+    "format_profile",
+    "warm_start_schemas",
 ]
@@ -3,12 +3,10 @@ Validator for Word document XML files against XSD schemas.
 """
 
 import re
-import tempfile
-import zipfile
-
-import lxml.etree
 
 from .base import BaseSchemaValidator
+from .report import ValidationError, failed
+from .stream import ElementRule
 
 
 class DOCXSchemaValidator(BaseSchemaValidator):
@@ -22,52 +20,58 @@ class DOCXSchemaValidator(BaseSchemaValidator):
     ELEMENT_RELATIONSHIP_TYPES = {}
 
     def validate(self):
-        """Run all validation checks and return True if all pass."""
+        """Run all validation checks.
+
+        Returns:
+            ValidationReport: Results and timing of each check; true if all pass
+        """
+        report = self._new_report()
+
         # Test 0: XML well-formedness
-        if not self.validate_xml():
-            return False
+        if not self._check("xml", self.validate_xml):
+            return report
 
         # Test 1: Namespace declarations
-        all_valid = True
-        if not self.validate_namespaces():
-            all_valid = False
+        self._check("namespaces", self.validate_namespaces)
 
         # Test 2: Unique IDs
-        if not self.validate_unique_ids():
-            all_valid = False
+        self._check("unique_ids", self.validate_unique_ids)
 
         # Test 3: Relationship and file reference validation
-        if not self.validate_file_references():
-            all_valid = False
+        self._check("file_references", self.validate_file_references)
 
         # Test 4: Content type declarations
-        if not self.validate_content_types():
-            all_valid = False
+        self._check("content_types", self.validate_content_types)
 
         # Test 5: XSD schema validation
-        if not self.validate_against_xsd():
-            all_valid = False
+        self._check("xsd", self.validate_against_xsd)
 
         # Test 6: Whitespace preservation
-        if not self.validate_whitespace_preservation():
-            all_valid = False
+        self._check("whitespace_preservation", self.validate_whitespace_preservation)
 
         # Test 7: Deletion validation
-        if not self.validate_deletions():
-            all_valid = False
+        self._check("deletions", self.validate_deletions)
 
         # Test 8: Insertion validation
-        if not self.validate_insertions():
-            all_valid = False
+        self._check("insertions", self.validate_insertions)
 
         # Test 9: Relationship ID reference validation
-        if not self.validate_all_relationship_ids():
-            all_valid = False
+        self._check("relationship_ids", self.validate_all_relationship_ids)
 
         # Count and compare paragraphs
-        self.compare_paragraph_counts()
+        self._check("paragraph_counts", self.compare_paragraph_counts)
+
+        return report
 
-        return all_valid
+    def _element_rules(self, xml_file):
+        """Add the tracked-change and text rules for document.xml parts."""
+        rules = super()._element_rules(xml_file)
+        if xml_file.name == "document.xml":
+            rules["whitespace"] = WhitespacePreservationRule(self, xml_file)
+            rules["deletions"] = TextInDeletionRule(self, xml_file)
+            rules["insertions"] = DeletedTextInInsertionRule(self, xml_file)
+            rules["paragraphs"] = ParagraphCountRule(self, xml_file)
+        return rules
 
     def validate_whitespace_preservation(self):
         """
@@ -80,42 +84,12 @@ class DOCXSchemaValidator(BaseSchemaValidator):
             if xml_file.name != "document.xml":
                 continue
 
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-
-                # Find all w:t elements
-                for elem in root.iter(f"{{{self.WORD_2006_NAMESPACE}}}t"):
-                    if elem.text:
-                        text = elem.text
-                        # Check if text starts or ends with whitespace
-                        if re.match(r"^\s.*", text) or re.match(r".*\s$", text):
-                            # Check if xml:space="preserve" attribute exists
-                            xml_space_attr = f"{{{self.XML_NAMESPACE}}}space"
-                            if (
-                                xml_space_attr not in elem.attrib
-                                or elem.attrib[xml_space_attr] != "preserve"
-                            ):
-                                # Show a preview of the text
-                                text_preview = (
-                                    repr(text)[:50] + "..."
-                                    if len(repr(text)) > 50
-                                    else repr(text)
-                                )
-                                errors.append(
-                                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                    f"Line {elem.sourceline}: w:t element with whitespace missing xml:space='preserve': {text_preview}"
-                                )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+            errors.extend(self._rule_result("whitespace", xml_file))
 
         if errors:
-            print(f"FAILED - Found {len(errors)} whitespace preservation violations:")
-            for error in errors:
-                print(error)
-            return False
+            return failed(
+                f"Found {len(errors)} whitespace preservation violations:", errors
+            )
         else:
             if self.verbose:
                 print("PASSED - All whitespace is properly preserved")
@@ -133,38 +107,12 @@ class DOCXSchemaValidator(BaseSchemaValidator):
             if xml_file.name != "document.xml":
                 continue
 
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-
-                # Find all w:t elements that are descendants of w:del elements
-                namespaces = {"w": self.WORD_2006_NAMESPACE}
-                xpath_expression = ".//w:del//w:t"
-                problematic_t_elements = root.xpath(
-                    xpath_expression, namespaces=namespaces
-                )
-                for t_elem in problematic_t_elements:
-                    if t_elem.text:
-                        # Show a preview of the text
-                        text_preview = (
-                            repr(t_elem.text)[:50] + "..."
-                            if len(repr(t_elem.text)) > 50
-                            else repr(t_elem.text)
-                        )
-                        errors.append(
-                            f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                            f"Line {t_elem.sourceline}: <w:t> found within <w:del>: {text_preview}"
-                        )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+            errors.extend(self._rule_result("deletions", xml_file))
 
         if errors:
-            print(f"FAILED - Found {len(errors)} deletion validation violations:")
-            for error in errors:
-                print(error)
-            return False
+            return failed(
+                f"Found {len(errors)} deletion validation violations:", errors
+            )
         else:
             if self.verbose:
                 print("PASSED - No w:t elements found within w:del elements")
@@ -179,13 +127,11 @@ class DOCXSchemaValidator(BaseSchemaValidator):
             if xml_file.name != "document.xml":
                 continue
 
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                # Count all w:p elements
-                paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
-                count = len(paragraphs)
-            except Exception as e:
-                print(f"Error counting paragraphs in unpacked document: {e}")
+            result = self._rule_result("paragraphs", xml_file)
+            if isinstance(result, Exception):
+                print(f"Error counting paragraphs in unpacked document: {result}")
+            else:
+                count = result
 
         return count
 
@@ -194,19 +140,12 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         count = 0
 
         try:
-            # Create temporary directory to unpack original
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # Unpack original docx
-                with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                    zip_ref.extractall(temp_dir)
+            # Parse document.xml straight from the original archive
+            root = self._get_original_tree("word/document.xml").getroot()
 
-                # Parse document.xml
-                doc_xml_path = temp_dir + "/word/document.xml"
-                root = lxml.etree.parse(doc_xml_path).getroot()
-
-                # Count all w:p elements
-                paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
-                count = len(paragraphs)
+            # Count all w:p elements
+            paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
+            count = len(paragraphs)
 
         except Exception as e:
             print(f"Error counting paragraphs in original document: {e}")
@@ -224,37 +163,12 @@ class DOCXSchemaValidator(BaseSchemaValidator):
             if xml_file.name != "document.xml":
                 continue
 
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                namespaces = {"w": self.WORD_2006_NAMESPACE}
-
-                # Find w:delText in w:ins that are NOT within w:del
-                invalid_elements = root.xpath(
-                    ".//w:ins//w:delText[not(ancestor::w:del)]",
-                    namespaces=namespaces
-                )
-
-                for elem in invalid_elements:
-                    text_preview = (
-                        repr(elem.text or "")[:50] + "..."
-                        if len(repr(elem.text or "")) > 50
-                        else repr(elem.text or "")
-                    )
-                    errors.append(
-                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                        f"Line {elem.sourceline}: <w:delText> within <w:ins>: {text_preview}"
-                    )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+            errors.extend(self._rule_result("insertions", xml_file))
 
         if errors:
-            print(f"FAILED - Found {len(errors)} insertion validation violations:")
-            for error in errors:
-                print(error)
-            return False
+            return failed(
+                f"Found {len(errors)} insertion validation violations:", errors
+            )
         else:
             if self.verbose:
                 print("PASSED - No w:delText elements within w:ins elements")
@@ -270,5 +184,110 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         print(f"\nParagraphs: {original_count} → {new_count} ({diff_str})")
 
 
+def _text_preview(text):
+    """Return repr(text), shortened to 50 characters."""
+    return repr(text)[:50] + "..." if len(repr(text)) > 50 else repr(text)
+
+
+class WhitespacePreservationRule(ElementRule):
+    """Finds w:t elements with leading or trailing whitespace but no xml:space="preserve"."""
+
+    tags = {f"{{{DOCXSchemaValidator.WORD_2006_NAMESPACE}}}t"}
+    LEADING_WHITESPACE = re.compile(r"^\s.*")
+    TRAILING_WHITESPACE = re.compile(r".*\s$")
+
+    def __init__(self, validator, xml_file):
+        super().__init__(validator, xml_file)
+        self.errors = []
+
+    def end(self, elem, stream):
+        text = elem.text
+        if not text:
+            return
+        # Check if text starts or ends with whitespace
+        if self.LEADING_WHITESPACE.match(text) or self.TRAILING_WHITESPACE.match(text):
+            # Check if xml:space="preserve" attribute exists
+            xml_space_attr = f"{{{self.validator.XML_NAMESPACE}}}space"
+            if elem.attrib.get(xml_space_attr) != "preserve":
+                self.errors.append(
+                    ValidationError(
+                        f"w:t element with whitespace missing xml:space='preserve': {_text_preview(text)}",
+                        self.relative_path,
+                        elem.sourceline,
+                    )
+                )
+
+    def result(self):
+        return self.errors
+
+
+class TextInDeletionRule(ElementRule):
+    """Finds w:t elements with text inside w:del (XSD validation does not catch this)."""
+
+    tags = {f"{{{DOCXSchemaValidator.WORD_2006_NAMESPACE}}}t"}
+    DEL = f"{{{DOCXSchemaValidator.WORD_2006_NAMESPACE}}}del"
+
+    def __init__(self, validator, xml_file):
+        super().__init__(validator, xml_file)
+        self.errors = []
+
+    def end(self, elem, stream):
+        if elem.text and stream.inside(self.DEL):
+            self.errors.append(
+                ValidationError(
+                    f"<w:t> found within <w:del>: {_text_preview(elem.text)}",
+                    self.relative_path,
+                    elem.sourceline,
+                )
+            )
+
+    def result(self):
+        return self.errors
+
+
+class DeletedTextInInsertionRule(ElementRule):
+    """Finds w:delText elements inside w:ins that are not within a w:del."""
+
+    tags = {f"{{{DOCXSchemaValidator.WORD_2006_NAMESPACE}}}delText"}
+    INS = f"{{{DOCXSchemaValidator.WORD_2006_NAMESPACE}}}ins"
+    DEL = f"{{{DOCXSchemaValidator.WORD_2006_NAMESPACE}}}del"
+
+    def __init__(self, validator, xml_file):
+        super().__init__(validator, xml_file)
+        self.errors = []
+
+    def end(self, elem, stream):
+        if stream.inside(self.INS) and not stream.inside(self.DEL):
+            self.errors.append(
+                ValidationError(
+                    f"<w:delText> within <w:ins>: {_text_preview(elem.text or '')}",
+                    self.relative_path,
+                    elem.sourceline,
+                )
+            )
+
+    def result(self):
+        return self.errors
+
+
+class ParagraphCountRule(ElementRule):
+    """Counts w:p elements. The result is the exception if the part cannot be read."""
+
+    tags = {f"{{{DOCXSchemaValidator.WORD_2006_NAMESPACE}}}p"}
+
+    def __init__(self, validator, xml_file):
+        super().__init__(validator, xml_file)
+        self.count = 0
+
+    def start(self, elem, stream):
+        self.count += 1
+
+    def result(self):
+        return self.count
+
+    def failed(self, error):
+        return error
+
+
 if __name__ == "__main__":
     raise RuntimeError("This module should not be run directly.")
@@ -0,0 +1,261 @@
+"""
+Read-only access to the parts of an Office document, packed or unpacked.
+"""
+
+import json
+import zipfile
+from pathlib import Path
+
+# Manifest of an unpacked directory (see unpack.unpack_document)
+MANIFEST_NAME = ".unpack-manifest.json"
+
+
+def read_manifest(directory):
+    """Return the manifest of an unpacked directory, or None if it has none.
+
+    The manifest is a dictionary with the "source" archive and its "parts":
+    part name -> {"size", "sha256", "formatted", "unpacked", "crc32"}. Parts
+    that are not unpacked are still read from the source archive. An optional
+    "base" directory supplies the parts that have no file in the directory,
+    except those listed as "deleted" (see DirectoryPackage).
+    """
+    try:
+        with open(Path(directory) / MANIFEST_NAME, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_manifest(directory, manifest):
+    """Write the manifest of an unpacked directory (see read_manifest)."""
+    with open(Path(directory) / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def open_package(path):
+    """Return the package for a document directory or a .docx/.pptx/.xlsx archive."""
+    path = Path(path)
+    if path.is_dir():
+        return DirectoryPackage(path)
+    return ZipPackage(path)
+
+
+class DirectoryPackage:
+    """Parts of an unpacked document, read from its directory.
+
+    Part names are POSIX paths relative to the directory, as in the archive.
+    If the directory was unpacked lazily, the parts its manifest lists as not
+    unpacked are read from the source archive unless a file replaced them.
+    They must still be the members the manifest describes (same size and
+    CRC-32); otherwise reading them raises ValueError.
+
+    If the manifest names a base directory, the directory is a copy-on-write
+    overlay of it: the parts without a file in the directory are read from the
+    base directory (itself a DirectoryPackage), unless the manifest lists them
+    as deleted.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.manifest = read_manifest(self.path)
+        self._source = None  # ZipPackage of the source archive, if needed
+        self._base = None  # DirectoryPackage of the base directory, if any
+
+    def __contains__(self, name):
+        return (
+            (self.path / name).is_file() or self.archived(name) or self._in_base(name)
+        )
+
+    def names(self):
+        """Return the part names in directory walk order, then the names of
+        the parts still in the source archive in archive order, then those of
+        the parts read from the base directory."""
+        names = [
+            file_path.relative_to(self.path).as_posix()
+            for file_path in self.path.rglob("*")
+            if file_path.is_file() and file_path != self.path / MANIFEST_NAME
+        ]
+        names += self.archived_names()
+        if self.base is not None:
+            hidden = set(names).union(self.manifest.get("deleted", ()))
+            names += [name for name in self.base.names() if name not in hidden]
+        return names
+
+    def archived_names(self):
+        """Return the names of the parts read from the source archive."""
+        if self.manifest is None:
+            return []
+        return [name for name in self.manifest["parts"] if self.archived(name)]
+
+    def archived(self, name):
+        """Return True if a part is read from the source archive."""
+        if self.manifest is None:
+            return False
+        entry = self.manifest["parts"].get(name)
+        return (
+            entry is not None
+            and not entry["unpacked"]
+            and not (self.path / name).is_file()
+        )
+
+    def file(self, name):
+        """Return the path of the file holding a part, in this directory or the
+        base directory; None if the part is read from an archive or missing."""
+        path = self.path / name
+        if path.is_file():
+            return path
+        if self._in_base(name) and not self.archived(name):
+            return self.base.file(name)
+        return None
+
+    @property
+    def base(self):
+        """DirectoryPackage of the base directory, if the manifest names one."""
+        if self._base is None and self.manifest and self.manifest.get("base"):
+            self._base = DirectoryPackage(self.manifest["base"])
+        return self._base
+
+    def _in_base(self, name):
+        """Return True if a part is read from the base directory."""
+        return (
+            self.base is not None
+            and name not in self.manifest.get("deleted", ())
+            and not (self.path / name).is_file()
+            and name in self.base
+        )
+
+    @property
+    def source(self):
+        """ZipPackage of the archive a lazily unpacked directory came from.
+
+        Raises:
+            ValueError: If the archive cannot be read
+        """
+        if self._source is None:
+            source = self.manifest["source"]
+            try:
+                self._source = ZipPackage(source)
+            except (OSError, zipfile.BadZipFile) as e:
+                raise ValueError(
+                    f"Cannot read {source}, which {self.path} was unpacked "
+                    f"from ({e}); unpack the document again"
+                ) from None
+        return self._source
+
+    def archived_info(self, name):
+        """Return the ZipInfo of a part read from the source archive.
+
+        Raises:
+            ValueError: If the source archive cannot be read, or no longer
+                holds the part as it was when the directory was unpacked
+        """
+        entry = self.manifest["parts"][name]
+        source = self.source
+        if name not in source:
+            problem = "is no longer in"
+        else:
+            info = source.info(name)
+            if (info.CRC, info.file_size) == (entry["crc32"], entry["size"]):
+                return info
+            problem = "has changed in"
+        raise ValueError(
+            f"{name} {problem} {source.path} since {self.path} was unpacked "
+            "from it; unpack the document again"
+        )
+
+    def open(self, name):
+        """Open a part for reading in binary mode.
+
+        Raises:
+            KeyError: If the part does not exist
+            ValueError: If the part is read from a source archive that changed
+                (see archived_info)
+        """
+        if self.archived(name):
+            self.archived_info(name)  # Checks the member
+            return self.source.open(name)
+        try:
+            return open(self.path / name, "rb")
+        except (FileNotFoundError, IsADirectoryError):
+            if not self._in_base(name):
+                raise KeyError(name) from None
+        return self.base.open(name)
+
+    def read(self, name):
+        """Return the bytes of a part.
+
+        Raises:
+            KeyError: If the part does not exist
+        """
+        with self.open(name) as f:
+            return f.read()
+
+    def size(self, name):
+        """Return the size in bytes of a part."""
+        if self.archived(name):
+            return self.archived_info(name).file_size
+        if self._in_base(name):
+            return self.base.size(name)
+        return (self.path / name).stat().st_size
+
+    def close(self):
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+        if self._base is not None:
+            self._base.close()
+            self._base = None
+
+
+class ZipPackage:
+    """Index of the parts of a .docx/.pptx/.xlsx archive.
+
+    The central directory is read once when the package is opened. Parts are
+    read straight from the archive, decompressed as they are consumed;
+    nothing is extracted to disk.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._zip = zipfile.ZipFile(self.path, "r")
+        self._infos = {
+            info.filename: info for info in self._zip.infolist() if not info.is_dir()
+        }
+
+    def __contains__(self, name):
+        return name in self._infos
+
+    def names(self):
+        """Return the part names in archive order."""
+        return list(self._infos)
+
+    def info(self, name):
+        """Return the ZipInfo of a part.
+
+        Raises:
+            KeyError: If the part does not exist
+        """
+        return self._infos[name]
+
+    def open(self, name):
+        """Open a part for reading; it is decompressed as it is read.
+
+        Raises:
+            KeyError: If the part does not exist
+        """
+        return self._zip.open(self._infos[name])
+
+    def read(self, name):
+        """Return the bytes of a part.
+
+        Raises:
+            KeyError: If the part does not exist
+        """
+        return self._zip.read(self._infos[name])
+
+    def size(self, name):
+        """Return the uncompressed size in bytes of a part."""
+        return self._infos[name].file_size
+
+    def close(self):
+        self._zip.close()
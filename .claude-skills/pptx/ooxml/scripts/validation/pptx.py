@@ -5,6 +5,8 @@ Validator for PowerPoint presentation XML files against XSD schemas.
 import re
 
 from .base import BaseSchemaValidator
+from .report import ValidationError, failed
+from .stream import ElementRule
 
 
 class PPTXSchemaValidator(BaseSchemaValidator):
@@ -26,93 +28,64 @@ class PPTXSchemaValidator(BaseSchemaValidator):
     }
 
     def validate(self):
-        """Run all validation checks and return True if all pass."""
+        """Run all validation checks.
+
+        Returns:
+            ValidationReport: Results and timing of each check; true if all pass
+        """
+        report = self._new_report()
+
         # Test 0: XML well-formedness
-        if not self.validate_xml():
-            return False
+        if not self._check("xml", self.validate_xml):
+            return report
 
         # Test 1: Namespace declarations
-        all_valid = True
-        if not self.validate_namespaces():
-            all_valid = False
+        self._check("namespaces", self.validate_namespaces)
 
         # Test 2: Unique IDs
-        if not self.validate_unique_ids():
-            all_valid = False
+        self._check("unique_ids", self.validate_unique_ids)
 
         # Test 3: UUID ID validation
-        if not self.validate_uuid_ids():
-            all_valid = False
+        self._check("uuid_ids", self.validate_uuid_ids)
 
         # Test 4: Relationship and file reference validation
-        if not self.validate_file_references():
-            all_valid = False
+        self._check("file_references", self.validate_file_references)
 
         # Test 5: Slide layout ID validation
-        if not self.validate_slide_layout_ids():
-            all_valid = False
+        self._check("slide_layout_ids", self.validate_slide_layout_ids)
 
         # Test 6: Content type declarations
-        if not self.validate_content_types():
-            all_valid = False
+        self._check("content_types", self.validate_content_types)
 
         # Test 7: XSD schema validation
-        if not self.validate_against_xsd():
-            all_valid = False
+        self._check("xsd", self.validate_against_xsd)
 
         # Test 8: Notes slide reference validation
-        if not self.validate_notes_slide_references():
-            all_valid = False
+        self._check("notes_slide_references", self.validate_notes_slide_references)
 
         # Test 9: Relationship ID reference validation
-        if not self.validate_all_relationship_ids():
-            all_valid = False
+        self._check("relationship_ids", self.validate_all_relationship_ids)
 
         # Test 10: Duplicate slide layout references validation
-        if not self.validate_no_duplicate_slide_layouts():
-            all_valid = False
+        self._check("duplicate_slide_layouts", self.validate_no_duplicate_slide_layouts)
+
+        return report
 
-        return all_valid
+    def _element_rules(self, xml_file):
+        """Add the UUID ID rule to the rules of every part."""
+        rules = super()._element_rules(xml_file)
+        rules["uuid_ids"] = UUIDRule(self, xml_file)
+        return rules
 
     def validate_uuid_ids(self):
         """Validate that ID attributes that look like UUIDs contain only hex values."""
-        import lxml.etree
-
         errors = []
-        # UUID pattern: 8-4-4-4-12 hex digits with optional braces/hyphens
-        uuid_pattern = re.compile(
-            r"^[\{\(]?[0-9A-Fa-f]{8}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{12}[\}\)]?$"
-        )
 
         for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-
-                # Check all elements for ID attributes
-                for elem in root.iter():
-                    for attr, value in elem.attrib.items():
-                        # Check if this is an ID attribute
-                        attr_name = attr.split("}")[-1].lower()
-                        if attr_name == "id" or attr_name.endswith("id"):
-                            # Check if value looks like a UUID (has the right length and pattern structure)
-                            if self._looks_like_uuid(value):
-                                # Validate that it contains only hex characters in the right positions
-                                if not uuid_pattern.match(value):
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: ID '{value}' appears to be a UUID but contains invalid hex characters"
-                                    )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+            errors.extend(self._rule_result("uuid_ids", xml_file))
 
         if errors:
-            print(f"FAILED - Found {len(errors)} UUID ID validation errors:")
-            for error in errors:
-                print(error)
-            return False
+            return failed(f"Found {len(errors)} UUID ID validation errors:", errors)
         else:
             if self.verbose:
                 print("PASSED - All UUID-like IDs contain valid hex values")
@@ -132,7 +105,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         errors = []
 
         # Find all slide master files
-        slide_masters = list(self.unpacked_dir.glob("ppt/slideMasters/*.xml"))
+        slide_masters = self._glob_parts("ppt/slideMasters/*.xml")
 
         if not slide_masters:
             if self.verbose:
@@ -141,100 +114,112 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         for slide_master in slide_masters:
             try:
-                # Parse the slide master file
-                root = lxml.etree.parse(str(slide_master)).getroot()
-
                 # Find the corresponding _rels file for this slide master
                 rels_file = slide_master.parent / "_rels" / f"{slide_master.name}.rels"
 
-                if not rels_file.exists():
+                if self._part_name(rels_file) not in self.relationship_graph:
                     errors.append(
-                        f"  {slide_master.relative_to(self.unpacked_dir)}: "
-                        f"Missing relationships file: {rels_file.relative_to(self.unpacked_dir)}"
+                        ValidationError(
+                            f"Missing relationships file: {rels_file.relative_to(self.unpacked_dir)}",
+                            slide_master.relative_to(self.unpacked_dir),
+                        )
                     )
                     continue
 
-                # Parse the relationships file
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-
-                # Build a set of valid relationship IDs that point to slide layouts
-                valid_layout_rids = set()
-                for rel in rels_root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
-                    rel_type = rel.get("Type", "")
-                    if "slideLayout" in rel_type:
-                        valid_layout_rids.add(rel.get("Id"))
-
-                # Find all sldLayoutId elements in the slide master
-                for sld_layout_id in root.findall(
-                    f".//{{{self.PRESENTATIONML_NAMESPACE}}}sldLayoutId"
-                ):
-                    r_id = sld_layout_id.get(
-                        f"{{{self.OFFICE_RELATIONSHIPS_NAMESPACE}}}id"
+                errors.extend(
+                    self._part_result(
+                        "slide_layout_ids",
+                        slide_master,
+                        lambda: self._check_slide_layout_ids(slide_master, rels_file),
+                        depends_on=(rels_file,),
                     )
-                    layout_id = sld_layout_id.get("id")
-
-                    if r_id and r_id not in valid_layout_rids:
-                        errors.append(
-                            f"  {slide_master.relative_to(self.unpacked_dir)}: "
-                            f"Line {sld_layout_id.sourceline}: sldLayoutId with id='{layout_id}' "
-                            f"references r:id='{r_id}' which is not found in slide layout relationships"
-                        )
+                )
 
             except (lxml.etree.XMLSyntaxError, Exception) as e:
                 errors.append(
-                    f"  {slide_master.relative_to(self.unpacked_dir)}: Error: {e}"
+                    ValidationError(
+                        f"Error: {e}", slide_master.relative_to(self.unpacked_dir)
+                    )
                 )
 
         if errors:
-            print(f"FAILED - Found {len(errors)} slide layout ID validation errors:")
-            for error in errors:
-                print(error)
-            print(
-                "Remove invalid references or add missing slide layouts to the relationships file."
+            return failed(
+                f"Found {len(errors)} slide layout ID validation errors:",
+                errors,
+                "Remove invalid references or add missing slide layouts to the relationships file.",
             )
-            return False
         else:
             if self.verbose:
                 print("PASSED - All slide layout IDs reference valid slide layouts")
             return True
 
+    def _check_slide_layout_ids(self, slide_master, rels_file):
+        """Return the errors for sldLayoutId elements of one slide master."""
+        errors = []
+
+        # Parse the slide master file
+        root = self._parse(slide_master).getroot()
+
+        # Build a set of valid relationship IDs that point to slide layouts
+        valid_layout_rids = {
+            rel.id
+            for rel in self.relationship_graph.relationships(self._part_name(rels_file))
+            if "slideLayout" in rel.type
+        }
+
+        # Find all sldLayoutId elements in the slide master
+        for sld_layout_id in root.findall(
+            f".//{{{self.PRESENTATIONML_NAMESPACE}}}sldLayoutId"
+        ):
+            r_id = sld_layout_id.get(f"{{{self.OFFICE_RELATIONSHIPS_NAMESPACE}}}id")
+            layout_id = sld_layout_id.get("id")
+
+            if r_id and r_id not in valid_layout_rids:
+                errors.append(
+                    ValidationError(
+                        f"sldLayoutId with id='{layout_id}' "
+                        f"references r:id='{r_id}' which is not found in slide layout relationships",
+                        slide_master.relative_to(self.unpacked_dir),
+                        sld_layout_id.sourceline,
+                    )
+                )
+
+        return errors
+
     def validate_no_duplicate_slide_layouts(self):
         """Validate that each slide has exactly one slideLayout reference."""
         import lxml.etree
 
         errors = []
-        slide_rels_files = list(self.unpacked_dir.glob("ppt/slides/_rels/*.xml.rels"))
+        slide_rels_files = self._glob_parts("ppt/slides/_rels/*.xml.rels")
 
         for rels_file in slide_rels_files:
             try:
-                root = lxml.etree.parse(str(rels_file)).getroot()
-
-                # Find all slideLayout relationships
-                layout_rels = [
-                    rel
-                    for rel in root.findall(
-                        f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
+                layout_count = sum(
+                    1
+                    for rel in self.relationship_graph.relationships(
+                        self._part_name(rels_file)
                     )
-                    if "slideLayout" in rel.get("Type", "")
-                ]
+                    if "slideLayout" in rel.type
+                )
 
-                if len(layout_rels) > 1:
+                if layout_count > 1:
                     errors.append(
-                        f"  {rels_file.relative_to(self.unpacked_dir)}: has {len(layout_rels)} slideLayout references"
+                        ValidationError(
+                            f"has {layout_count} slideLayout references",
+                            rels_file.relative_to(self.unpacked_dir),
+                        )
                     )
 
             except Exception as e:
                 errors.append(
-                    f"  {rels_file.relative_to(self.unpacked_dir)}: Error: {e}"
+                    ValidationError(
+                        f"Error: {e}", rels_file.relative_to(self.unpacked_dir)
+                    )
                 )
 
         if errors:
-            print("FAILED - Found slides with duplicate slideLayout references:")
-            for error in errors:
-                print(error)
-            return False
+            return failed("Found slides with duplicate slideLayout references:", errors)
         else:
             if self.verbose:
                 print("PASSED - All slides have exactly one slideLayout reference")
@@ -248,7 +233,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         notes_slide_references = {}  # Track which slides reference each notesSlide
 
         # Find all slide relationship files
-        slide_rels_files = list(self.unpacked_dir.glob("ppt/slides/_rels/*.xml.rels"))
+        slide_rels_files = self._glob_parts("ppt/slides/_rels/*.xml.rels")
 
         if not slide_rels_files:
             if self.verbose:
@@ -257,34 +242,23 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         for rels_file in slide_rels_files:
             try:
-                # Parse the relationships file
-                root = lxml.etree.parse(str(rels_file)).getroot()
-
-                # Find all notesSlide relationships
-                for rel in root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
-                    rel_type = rel.get("Type", "")
-                    if "notesSlide" in rel_type:
-                        target = rel.get("Target", "")
-                        if target:
-                            # Normalize the target path to handle relative paths
-                            normalized_target = target.replace("../", "")
-
-                            # Track which slide references this notesSlide
-                            slide_name = rels_file.stem.replace(
-                                ".xml", ""
-                            )  # e.g., "slide1"
-
-                            if normalized_target not in notes_slide_references:
-                                notes_slide_references[normalized_target] = []
-                            notes_slide_references[normalized_target].append(
-                                (slide_name, rels_file)
-                            )
+                notes_targets = self._collect_notes_targets(rels_file)
+
+                for normalized_target in notes_targets:
+                    # Track which slide references this notesSlide
+                    slide_name = rels_file.stem.replace(".xml", "")  # e.g., "slide1"
+
+                    if normalized_target not in notes_slide_references:
+                        notes_slide_references[normalized_target] = []
+                    notes_slide_references[normalized_target].append(
+                        (slide_name, rels_file)
+                    )
 
             except (lxml.etree.XMLSyntaxError, Exception) as e:
                 errors.append(
-                    f"  {rels_file.relative_to(self.unpacked_dir)}: Error: {e}"
+                    ValidationError(
+                        f"Error: {e}", rels_file.relative_to(self.unpacked_dir)
+                    )
                 )
 
         # Check for duplicate references
@@ -292,24 +266,69 @@ class PPTXSchemaValidator(BaseSchemaValidator):
             if len(references) > 1:
                 slide_names = [ref[0] for ref in references]
                 errors.append(
-                    f"  Notes slide '{target}' is referenced by multiple slides: {', '.join(slide_names)}"
+                    ValidationError(
+                        f"Notes slide '{target}' is referenced by multiple slides: {', '.join(slide_names)}",
+                        details=[
+                            str(rels_file.relative_to(self.unpacked_dir))
+                            for _, rels_file in references
+                        ],
+                    )
                 )
-                for slide_name, rels_file in references:
-                    errors.append(f"    - {rels_file.relative_to(self.unpacked_dir)}")
 
         if errors:
-            print(
-                f"FAILED - Found {len([e for e in errors if not e.startswith('    ')])} notes slide reference validation errors:"
+            return failed(
+                f"Found {len(errors)} notes slide reference validation errors:",
+                errors,
+                "Each slide may optionally have its own slide file.",
             )
-            for error in errors:
-                print(error)
-            print("Each slide may optionally have its own slide file.")
-            return False
         else:
             if self.verbose:
                 print("PASSED - All notes slide references are unique")
             return True
 
+    def _collect_notes_targets(self, rels_file):
+        """Return the normalized notesSlide targets of a slide's .rels file."""
+        targets = []
+        for rel in self.relationship_graph.relationships(self._part_name(rels_file)):
+            if "notesSlide" in rel.type and rel.target:
+                # Normalize the target path to handle relative paths
+                targets.append(rel.target.replace("../", ""))
+        return targets
+
+
+class UUIDRule(ElementRule):
+    """Finds ID attributes that look like UUIDs but contain invalid hex characters."""
+
+    # UUID pattern: 8-4-4-4-12 hex digits with optional braces/hyphens
+    UUID_PATTERN = re.compile(
+        r"^[\{\(]?[0-9A-Fa-f]{8}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{12}[\}\)]?$"
+    )
+
+    def __init__(self, validator, xml_file):
+        super().__init__(validator, xml_file)
+        self.errors = []
+
+    def start(self, elem, stream):
+        # Check all elements for ID attributes
+        for attr, value in elem.attrib.items():
+            # Check if this is an ID attribute
+            attr_name = attr.split("}")[-1].lower()
+            if attr_name == "id" or attr_name.endswith("id"):
+                # Check if value looks like a UUID (has the right length and pattern structure)
+                if self.validator._looks_like_uuid(value):
+                    # Validate that it contains only hex characters in the right positions
+                    if not self.UUID_PATTERN.match(value):
+                        self.errors.append(
+                            ValidationError(
+                                f"ID '{value}' appears to be a UUID but contains invalid hex characters",
+                                self.relative_path,
+                                elem.sourceline,
+                            )
+                        )
+
+    def result(self):
+        return self.errors
+
 
 if __name__ == "__main__":
     raise RuntimeError("This module should not be run directly.")
@@ -4,14 +4,17 @@ Validator for tracked changes in Word documents.
 
 import subprocess
 import tempfile
-import zipfile
 from pathlib import Path
 
+from .package import open_package
+from .report import failed
+
 
 class RedliningValidator:
     """Validator for tracked changes in Word documents."""
 
     def __init__(self, unpacked_dir, original_docx, verbose=False):
+        # Unpacked directory, or the packed .docx itself
         self.unpacked_dir = Path(unpacked_dir)
         self.original_docx = Path(original_docx)
         self.verbose = verbose
@@ -21,18 +24,25 @@ class RedliningValidator:
 
     def validate(self):
         """Main validation method that returns True if valid, False otherwise."""
-        # Verify unpacked directory exists and has correct structure
+        # Verify the modified document exists and has correct structure
         modified_file = self.unpacked_dir / "word" / "document.xml"
-        if not modified_file.exists():
-            print(f"FAILED - Modified document.xml not found at {modified_file}")
-            return False
+        try:
+            modified_package = open_package(self.unpacked_dir)
+        except Exception as e:
+            return failed(f"Error reading modified document: {e}")
+
+        try:
+            if "word/document.xml" not in modified_package:
+                return failed(f"Modified document.xml not found at {modified_file}")
+            modified_data = modified_package.read("word/document.xml")
+        finally:
+            modified_package.close()
 
         # First, check if there are any tracked changes by Claude to validate
         try:
             import xml.etree.ElementTree as ET
 
-            tree = ET.parse(modified_file)
-            root = tree.getroot()
+            root = ET.fromstring(modified_data)
 
             # Check for w:del or w:ins tags authored by Claude
             del_elements = root.findall(".//w:del", self.namespaces)
@@ -60,61 +70,57 @@ class RedliningValidator:
             # If we can't parse the XML, continue with full validation
             pass
 
-        # Create temporary directory for unpacking original docx
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            # Unpack original docx
-            try:
-                with zipfile.ZipFile(self.original_docx, "r") as zip_ref:
-                    zip_ref.extractall(temp_path)
-            except Exception as e:
-                print(f"FAILED - Error unpacking original docx: {e}")
-                return False
-
-            original_file = temp_path / "word" / "document.xml"
-            if not original_file.exists():
-                print(
-                    f"FAILED - Original document.xml not found in {self.original_docx}"
-                )
-                return False
-
-            # Parse both XML files using xml.etree.ElementTree for redlining validation
-            try:
-                import xml.etree.ElementTree as ET
-
-                modified_tree = ET.parse(modified_file)
-                modified_root = modified_tree.getroot()
-                original_tree = ET.parse(original_file)
-                original_root = original_tree.getroot()
-            except ET.ParseError as e:
-                print(f"FAILED - Error parsing XML files: {e}")
-                return False
-
-            # Remove Claude's tracked changes from both documents
-            self._remove_claude_tracked_changes(original_root)
-            self._remove_claude_tracked_changes(modified_root)
-
-            # Extract and compare text content
-            modified_text = self._extract_text_content(modified_root)
-            original_text = self._extract_text_content(original_root)
-
-            if modified_text != original_text:
-                # Show detailed character-level differences for each paragraph
-                error_message = self._generate_detailed_diff(
-                    original_text, modified_text
+        # Read original document.xml straight from the original docx (or directory)
+        try:
+            original_package = open_package(self.original_docx)
+        except Exception as e:
+            return failed(f"Error reading original docx: {e}")
+
+        try:
+            if "word/document.xml" not in original_package:
+                return failed(
+                    f"Original document.xml not found in {self.original_docx}"
                 )
-                print(error_message)
-                return False
+            original_data = original_package.read("word/document.xml")
+        finally:
+            original_package.close()
+
+        # Parse both XML files using xml.etree.ElementTree for redlining validation
+        try:
+            import xml.etree.ElementTree as ET
+
+            modified_root = ET.fromstring(modified_data)
+            original_root = ET.fromstring(original_data)
+        except ET.ParseError as e:
+            return failed(f"Error parsing XML files: {e}")
+
+        # Remove Claude's tracked changes from both documents
+        self._remove_claude_tracked_changes(original_root)
+        self._remove_claude_tracked_changes(modified_root)
+
+        # Extract and compare text content
+        modified_text = self._extract_text_content(modified_root)
+        original_text = self._extract_text_content(original_root)
 
-            if self.verbose:
-                print("PASSED - All changes by Claude are properly tracked")
-            return True
+        if modified_text != original_text:
+            # Show detailed character-level differences for each paragraph
+            return self._text_mismatch(original_text, modified_text)
 
-    def _generate_detailed_diff(self, original_text, modified_text):
-        """Generate detailed word-level differences using git word diff."""
+        if self.verbose:
+            print("PASSED - All changes by Claude are properly tracked")
+        return True
+
+    def _text_mismatch(self, original_text, modified_text):
+        """Report the text differences left after removing Claude's changes."""
+        git_diff = self._get_git_word_diff(original_text, modified_text)
+        return failed(
+            "Document text doesn't match after removing Claude's tracked changes",
+            footer=self._generate_detailed_diff(git_diff),
+        )
+
+    def _generate_detailed_diff(self, git_diff):
+        """Generate the advice and word-level differences shown on a mismatch."""
         error_parts = [
-            "FAILED - Document text doesn't match after removing Claude's tracked changes",
             "",
             "Likely causes:",
             "  1. Modified text inside another author's <w:ins> or <w:del> tags",
@@ -128,7 +134,6 @@ class RedliningValidator:
         ]
 
         # Show git word diff
-        git_diff = self._get_git_word_diff(original_text, modified_text)
         if git_diff:
             error_parts.extend(["Differences:", "============", git_diff])
         else:
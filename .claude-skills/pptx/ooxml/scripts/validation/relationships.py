@@ -0,0 +1,111 @@
+"""
+Relationship graph of a package, built from its .rels parts.
+"""
+
+import posixpath
+
+
+class Relationship:
+    """One <Relationship> element of a .rels part."""
+
+    __slots__ = ("id", "type", "target", "line")
+
+    def __init__(self, rel_id, rel_type, target, line):
+        self.id = rel_id
+        self.type = rel_type  # Full relationship type URI ("" if missing)
+        self.target = target
+        self.line = line  # Line of the element in the .rels part
+
+    @property
+    def is_internal(self):
+        """True if the target is a part of the package rather than a URL."""
+        return bool(self.target) and not self.target.startswith(("http", "mailto:"))
+
+
+class RelationshipGraph:
+    """Relationships of every part of a package, indexed both ways.
+
+    The graph is built once from the relationships of every .rels part, and
+    internal targets are resolved against the package's part names, so
+    queries never touch the filesystem.
+
+    Parts are identified by their part names (e.g. "word/document.xml"); the
+    relationships of a part live in its .rels part (see rels_part_name).
+    """
+
+    def __init__(self, part_names, relationships):
+        """
+        Args:
+            part_names: Names of all parts of the package
+            relationships: Dictionary of .rels part name -> list of
+                Relationship, or the exception raised reading that part
+        """
+        self._part_names = set(part_names)
+        self._relationships = relationships
+        self._targets = {}  # (.rels part name, index) -> resolved part name
+        self._referenced_by = {}  # part name -> [(.rels part name, Relationship)]
+
+        for rels_name, rels in relationships.items():
+            if isinstance(rels, Exception):
+                continue
+            for index, rel in enumerate(rels):
+                if not rel.is_internal:
+                    continue
+                target_part = self._resolve(rels_name, rel.target)
+                if target_part is not None:
+                    self._targets[(rels_name, index)] = target_part
+                    self._referenced_by.setdefault(target_part, []).append(
+                        (rels_name, rel)
+                    )
+
+    def __contains__(self, rels_name):
+        return rels_name in self._relationships
+
+    @property
+    def rels_parts(self):
+        """Names of the .rels parts, in package order."""
+        return list(self._relationships)
+
+    @staticmethod
+    def rels_part_name(part_name):
+        """Return the name of a part's .rels part (dir/_rels/file.xml.rels)."""
+        directory, name = posixpath.split(part_name)
+        return posixpath.join(directory, "_rels", f"{name}.rels")
+
+    def relationships(self, rels_name):
+        """Return the relationships of a .rels part.
+
+        Raises:
+            KeyError: If there is no such .rels part
+            Exception: The error raised reading the .rels part, if any
+        """
+        rels = self._relationships[rels_name]
+        if isinstance(rels, Exception):
+            raise rels
+        return rels
+
+    def target_parts(self, rels_name):
+        """Return (Relationship, resolved part name or None) for each internal
+        relationship of a .rels part. Targets that are not parts resolve to None.
+        """
+        return [
+            (rel, self._targets.get((rels_name, index)))
+            for index, rel in enumerate(self.relationships(rels_name))
+            if rel.is_internal
+        ]
+
+    def referenced_by(self, part_name):
+        """Return (.rels part name, Relationship) for each reference to a part."""
+        return self._referenced_by.get(part_name, [])
+
+    def _resolve(self, rels_name, target):
+        """Return the part name an internal target refers to, or None."""
+        if posixpath.basename(rels_name) == ".rels":
+            # Package relationships - targets are relative to the package root
+            base_dir = ""
+        else:
+            # Part relationships - targets are relative to the part's directory
+            # e.g., word/_rels/document.xml.rels -> targets relative to word/
+            base_dir = posixpath.dirname(posixpath.dirname(rels_name))
+        target_part = posixpath.normpath(posixpath.join(base_dir, target))
+        return target_part if target_part in self._part_names else None
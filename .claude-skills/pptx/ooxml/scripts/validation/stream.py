@@ -0,0 +1,183 @@
+"""
+Single-pass evaluation of per-element validation rules.
+
+Each part is streamed once with lxml.etree.iterparse. Every element is handed
+to all rules registered for its tag, and is cleared as soon as it has been
+processed, so memory use does not grow with the size of the part.
+"""
+
+import lxml.etree
+
+from .report import ValidationError
+
+
+class ElementRule:
+    """A check evaluated on the elements of one part while it is streamed.
+
+    Subclasses set tags to the Clark names ("{namespace}local") of the
+    elements they inspect, or leave it as None to see every element, and
+    override start() and/or end(). Rules that only look at the root element
+    set root_only instead of tags. A new rule is created for every part, so
+    rules may keep per-part state.
+
+    start() is called when the element's start tag has been read: its
+    attributes and namespace declarations are available, its text and
+    children are not. end() is called once the whole element has been read:
+    its text is available, but its children have already been cleared.
+    """
+
+    tags = None
+
+    # If True, start() is only called for the root element
+    root_only = False
+
+    def __init__(self, validator, xml_file):
+        self.validator = validator
+        self.xml_file = xml_file
+        self.relative_path = xml_file.relative_to(validator.unpacked_dir)
+
+    def prepare(self):
+        """Load anything the rule needs before streaming starts."""
+
+    def start(self, elem, stream):
+        """Inspect an element after its start tag."""
+
+    def end(self, elem, stream):
+        """Inspect an element after its end tag."""
+
+    def result(self):
+        """Return what the rule found in the part."""
+        return []
+
+    def failed(self, error):
+        """Return the result reported when the part or the rule raised error."""
+        return [ValidationError(f"Error: {error}", self.relative_path)]
+
+
+class PartStream:
+    """Dispatches the elements of a streamed part to element rules."""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.depth = 0  # Depth of the current element; the root is at 1
+        self._open = {}  # Clark name -> number of open elements with that name
+        self._failures = {}  # rule -> exception raised by the rule
+        self._build_dispatch_tables()
+
+    def inside(self, tag):
+        """Return True if the current element or one of its ancestors is tag."""
+        return self._open.get(tag, 0) > 0
+
+    def run(self, source):
+        """Stream a part through the rules.
+
+        Args:
+            source: File name or binary file object of the part
+
+        Returns:
+            dict: Rule -> result (rule.result(), or rule.failed() if the part
+                could not be parsed or the rule raised)
+        """
+        for rule in self.rules:
+            try:
+                rule.prepare()
+            except Exception as e:
+                self._fail(rule, e)
+
+        error = None
+        open_tags = self._open
+        try:
+            for event, elem in lxml.etree.iterparse(source, events=("start", "end")):
+                tag = elem.tag
+                if event == "start":
+                    self.depth += 1
+                    open_tags[tag] = open_tags.get(tag, 0) + 1
+                    handlers = self._handlers(tag, "start")
+                    if self.depth == 1:
+                        handlers = self._start_root + handlers
+                else:
+                    handlers = self._handlers(tag, "end")
+
+                for rule, callback in handlers:
+                    try:
+                        callback(elem, self)
+                    except Exception as e:
+                        self._fail(rule, e)
+
+                if event == "end":
+                    open_tags[tag] -= 1
+                    self.depth -= 1
+
+                    # Free the element and the siblings processed before it
+                    elem.clear(keep_tail=True)
+                    parent = elem.getparent()
+                    if parent is not None:
+                        while elem.getprevious() is not None:
+                            del parent[0]
+        except Exception as e:
+            error = e
+
+        results = {}
+        for rule in self.rules:
+            failure = error if error is not None else self._failures.get(rule)
+            results[rule] = (
+                rule.failed(failure) if failure is not None else rule.result()
+            )
+        return results
+
+    def _handlers(self, tag, event):
+        """Return the handlers for an event on elements named tag."""
+        handlers = self._by_event_and_tag.get((event, tag))
+        if handlers is None:
+            if event == "start":
+                handlers = self._start_any + self._start_by_tag.get(tag, [])
+            else:
+                handlers = self._end_any + self._end_by_tag.get(tag, [])
+            self._by_event_and_tag[(event, tag)] = handlers
+        return handlers
+
+    def _fail(self, rule, error):
+        """Record the first error of a rule and stop dispatching to it."""
+        if rule not in self._failures:
+            self._failures[rule] = error
+            self._build_dispatch_tables()
+
+    def _build_dispatch_tables(self):
+        """Index the (rule, bound method) handlers of the active rules by tag."""
+        self._start_root = []
+        self._start_any, self._start_by_tag = [], {}
+        self._end_any, self._end_by_tag = [], {}
+        self._by_event_and_tag = {}  # (event, tag) -> handlers, see _handlers
+
+        for rule in self.rules:
+            if rule in self._failures:
+                continue
+            for method, any_tag, by_tag in (
+                ("start", self._start_any, self._start_by_tag),
+                ("end", self._end_any, self._end_by_tag),
+            ):
+                if getattr(type(rule), method) is getattr(ElementRule, method):
+                    continue  # Rule does not handle this event
+                handler = (rule, getattr(rule, method))
+                if rule.root_only:
+                    if method == "start":
+                        self._start_root.append(handler)
+                elif rule.tags is None:
+                    any_tag.append(handler)
+                else:
+                    for tag in rule.tags:
+                        by_tag.setdefault(tag, []).append(handler)
+
+
+def stream_part(source, rules):
+    """Stream a part once, evaluating every rule on its elements.
+
+    Args:
+        source: File name or binary file object of the part
+        rules: Dictionary of rule name -> ElementRule
+
+    Returns:
+        dict: Rule name -> result
+    """
+    results = PartStream(rules.values()).run(source)
+    return {name: results[rule] for name, rule in rules.items()}
@@ -50,6 +50,10 @@ from inventory import extract_text_inventory
 from PIL import Image, ImageDraw, ImageFont
 from pptx import Presentation
 
+# Shared LibreOffice service (ooxml/scripts/soffice.py)
+sys.path.append(str(Path(__file__).resolve().parent.parent / "ooxml" / "scripts"))
+from soffice import OfficeError, convert  # noqa: E402
+
 # Constants
 THUMBNAIL_WIDTH = 300  # Fixed thumbnail width in pixels
 CONVERSION_DPI = 100  # DPI for PDF to image conversion
@@ -212,25 +216,12 @@ def convert_to_images(pptx_path, temp_dir, dpi):
     if hidden_slides:
         print(f"Hidden slides: {sorted(hidden_slides)}")
 
-    pdf_path = temp_dir / f"{pptx_path.stem}.pdf"
-
     # Convert to PDF
     print("Converting to PDF...")
-    result = subprocess.run(
-        [
-            "soffice",
-            "--headless",
-            "--convert-to",
-            "pdf",
-            "--outdir",
-            str(temp_dir),
-            str(pptx_path),
-        ],
-        capture_output=True,
-        text=True,
-    )
-    if result.returncode != 0 or not pdf_path.exists():
-        raise RuntimeError("PDF conversion failed")
+    try:
+        pdf_path = convert(pptx_path, temp_dir, "pdf")
+    except OfficeError as e:
+        raise RuntimeError("PDF conversion failed") from e
 
     # Convert PDF to images
     print(f"Converting to images at {dpi} DPI...")